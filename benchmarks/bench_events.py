@@ -0,0 +1,55 @@
+"""Cost of one /events tick with N subscribers.
+
+Compares the previous scheme (every connection serializes the full snapshot
+itself) with EventHub (one delta encoded per tick and queued to everyone)."""
+
+import os, sys, json, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from macstress.metrics import MetricsCollector
+from macstress.events import EventHub
+
+TICKS = 2000
+SYS_INFO = {"arch": "intel", "cores": 4, "ram_gb": 16.0, "model_name": "Mac", "os": "macOS 14.0"}
+
+
+class Stress:
+    def get_active(self):
+        return []
+
+
+def per_client(mc, sm, n):
+    t0 = time.perf_counter()
+    for i in range(TICKS):
+        mc._set(cpu_usage=float(i % 100))
+        for _ in range(n):
+            payload = {"metrics": mc.get_snapshot(), "active": sm.get_active(), "sys_info": SYS_INFO}
+            (f"data: {json.dumps(payload)}\n\n").encode()
+    return (time.perf_counter() - t0) / TICKS * 1e6
+
+
+def hub(mc, sm, n):
+    h = EventHub(mc, sm, SYS_INFO)
+    h._thread = True    # ticks are driven here, not by the hub thread
+    subs = [h.subscribe() for _ in range(n)]
+    sent = sum(len(s.pop()) for s in subs)
+    t0 = time.perf_counter()
+    for i in range(TICKS):
+        mc._set(cpu_usage=float(i % 100))
+        h.publish()
+        for s in subs:
+            sent += len(s.pop() or b"")
+    dt = (time.perf_counter() - t0) / TICKS * 1e6
+    h.stop()
+    return dt, sent / (TICKS * n)
+
+
+if __name__ == "__main__":
+    mc, sm = MetricsCollector(dict(SYS_INFO)), Stress()
+    full = len(json.dumps({"metrics": mc.get_snapshot(), "active": [], "sys_info": SYS_INFO}))
+    print(f"full frame {full} B")
+    print(f"{'subs':>5} {'per-client us/tick':>19} {'hub us/tick':>12} {'B/frame':>8}")
+    for n in (1, 10, 100):
+        old = per_client(mc, sm, n)
+        new, size = hub(mc, sm, n)
+        print(f"{n:>5} {old:>19,.1f} {new:>12,.1f} {size:>8,.0f}")
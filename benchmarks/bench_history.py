@@ -0,0 +1,53 @@
+"""History store: memory, insert cost and range-query cost at 1 Hz and 10 Hz.
+
+Fills 8 hours of all HISTORY_FIELDS, then queries 5 min / 1 h / 8 h ranges. The
+old deque of per-sample dicts is measured alongside for memory and insert cost."""
+
+import os, sys, time, random, tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from macstress.history import History
+from macstress.metrics import MetricsCollector
+
+FIELDS = MetricsCollector.HISTORY_FIELDS
+HOURS = 8
+
+
+def _deque(samples, n):
+    tracemalloc.start()
+    d = deque(maxlen=n)
+    t0 = time.perf_counter()
+    for i in range(n):
+        d.append(dict(samples[i % len(samples)], timestamp=i))
+    ins = (time.perf_counter() - t0) / n * 1e6
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return ins, mem
+
+
+def main():
+    samples = [{f: random.random() * 100 for f in FIELDS} for _ in range(1000)]
+    for hz in (1, 10):
+        n, t0 = HOURS * 3600 * hz, 1.7e9
+        h = History(FIELDS)
+        start = time.perf_counter()
+        for i in range(n):
+            h.append(t0 + i / hz, samples[i % 1000])
+        ins = (time.perf_counter() - start) / n * 1e6
+        end = t0 + n / hz
+        print(f"{hz:>2} Hz, {n} samples: insert {ins:.1f} µs/sample, {h.nbytes() / 1e6:.1f} MB fixed")
+        for rng in (300, 3600, HOURS * 3600):
+            q0 = time.perf_counter()
+            res, t, _ = h.query(end - rng, end, ["cpu_usage", "cpu_temp", "mem_used_pct"])
+            q = (time.perf_counter() - q0) * 1e3
+            s0 = time.perf_counter()
+            h.series(end - rng, end, ["cpu_usage", "cpu_temp", "mem_used_pct"], points=500)
+            s = (time.perf_counter() - s0) * 1e3
+            print(f"      range {rng:>5} s -> {res:>2} s tier, {len(t):>5} rows: query {q:.2f} ms, LTTB series {s:.2f} ms")
+        ins_d, mem_d = _deque(samples, n)
+        print(f"      old deque of dicts: insert {ins_d:.1f} µs/sample, {mem_d / 1e6:.1f} MB for the same window")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Threads, peak RSS and /api/status latency with N idle /events clients open.
+
+Runs the threaded server and --async-server in turn, each in its own process,
+so thread counts and memory are not shared between the two.
+
+    python benchmarks/bench_server_load.py [clients]"""
+
+import os, sys, json, time, socket, threading, resource, statistics, subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REQUESTS = 300
+SYS_INFO = {"arch": "intel", "cores": 4, "ram_gb": 16.0, "model_name": "Mac", "os": "macOS 14.0"}
+
+
+class Stress:
+    def get_active(self):
+        return []
+
+
+def serve(mode):
+    """Child: serve on a free port, print it, answer "stats" lines with threads and peak RSS."""
+    from macstress import server
+    from macstress.metrics import MetricsCollector
+    mc = MetricsCollector(dict(SYS_INFO))
+    server.set_globals(mc, Stress(), SYS_INFO)
+    if mode == "async":
+        from macstress.async_server import AsyncHTTPServer
+        srv = AsyncHTTPServer(("127.0.0.1", 0))
+    else:
+        srv = server.ThreadedHTTPServer(("127.0.0.1", 0), server.Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    def tick():     # something changes every tick, like a running collector
+        while True:
+            mc._set(cpu_usage=time.time() % 100)
+            time.sleep(0.5)
+    threading.Thread(target=tick, daemon=True).start()
+    print(srv.server_address[1], flush=True)
+    for _ in sys.stdin:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss = rss / 1024**2 if sys.platform == "darwin" else rss / 1024    # bytes on macOS, KiB on Linux
+        print(json.dumps({"threads": threading.active_count(), "rss_mb": round(rss, 1)}), flush=True)
+
+
+def run(mode, clients):
+    p = subprocess.Popen([sys.executable, __file__, "--serve", mode], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, text=True)
+    port = int(p.stdout.readline())
+
+    def stats():
+        p.stdin.write("stats\n"); p.stdin.flush()
+        return json.loads(p.stdout.readline())
+
+    idle = stats()
+    socks = []
+    for _ in range(clients):
+        s = socket.create_connection(("127.0.0.1", port))
+        s.sendall(b"GET /events HTTP/1.1\r\nHost: x\r\n\r\n")
+        socks.append(s)
+    for s in socks:
+        buf = b""
+        while b"data:" not in buf:
+            buf += s.recv(65536)
+        s.setblocking(False)
+
+    def drain():
+        for s in socks:
+            try:
+                while s.recv(65536): pass
+            except BlockingIOError: pass
+
+    lat = []
+    for i in range(REQUESTS):
+        t0 = time.perf_counter()
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status").read()
+        lat.append((time.perf_counter() - t0) * 1000)
+        if i % 50 == 0:
+            drain()
+    loaded = stats()
+    for s in socks:
+        s.close()
+    p.stdin.close()
+    p.wait(10)
+    lat.sort()
+    return idle, loaded, statistics.median(lat), lat[int(len(lat) * 0.99)]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        serve(sys.argv[2])
+        sys.exit()
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{n} idle /events clients")
+    print(f"{'server':>8} {'threads idle/loaded':>20} {'peak RSS MB':>12} {'p50 ms':>7} {'p99 ms':>7}")
+    for mode in ("threaded", "async"):
+        idle, loaded, p50, p99 = run(mode, n)
+        print(f"{mode:>8} {idle['threads']:>9}/{loaded['threads']:<10} {loaded['rss_mb']:>12} {p50:>7.2f} {p99:>7.2f}")
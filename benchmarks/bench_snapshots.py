@@ -0,0 +1,58 @@
+"""Reads per second with N concurrent readers while 4 writers update the collector.
+
+Compares the previous scheme (dict copy under a lock on every read) with the
+published immutable Snapshot (get_snapshot() returns a shared reference)."""
+
+import os, sys, time, threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from macstress.metrics import MetricsCollector
+
+DURATION = 1.0
+WRITERS = 4
+
+
+class LockedCopy:
+    def __init__(self, data):
+        self.data, self.lock = dict(data), threading.Lock()
+
+    def get(self):
+        with self.lock:
+            return dict(self.data)
+
+    def put(self, **fields):
+        with self.lock:
+            self.data.update(fields)
+
+
+def run(get, put, readers):
+    stop = time.monotonic() + DURATION
+    counts = [0] * readers
+
+    def read(i):
+        n = 0
+        while time.monotonic() < stop:
+            get()
+            n += 1
+        counts[i] = n
+
+    def write():
+        while time.monotonic() < stop:
+            put(cpu_usage=1.0)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / DURATION
+
+
+if __name__ == "__main__":
+    mc = MetricsCollector({"arch": "intel", "cores": 4, "ram_gb": 16.0})
+    old = LockedCopy(mc.get_snapshot())
+    print(f"{'readers':>8} {'copy+lock reads/s':>18} {'snapshot reads/s':>17}")
+    for n in (1, 8, 32):
+        print(f"{n:>8} {run(old.get, old.put, n):>18,.0f} {run(mc.get_snapshot, mc._set, n):>17,.0f}")
@@ -0,0 +1,38 @@
+"""Processes spawned per minute of CPU sampling: one-shot `top -l 1` per cycle vs the TopStream.
+
+Runs 30 collector cycles (one minute at the 2 s default interval) of _sample_cpu
+and _sample_cpu_breakdown and counts every subprocess started. macOS only — on
+other systems `top -l` is unavailable and both modes fall back to forking."""
+
+import os, sys, time, subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from macstress.metrics import MetricsCollector
+
+CYCLES = 30
+spawned = []
+_popen_init = subprocess.Popen.__init__
+
+
+def _counting_init(self, args, *a, **kw):
+    spawned.append(args)
+    _popen_init(self, args, *a, **kw)
+
+
+def run(stream):
+    mc = MetricsCollector({"arch": "intel", "cores": os.cpu_count() or 1, "ram_gb": 16.0})
+    if stream:
+        mc._top.start()
+        time.sleep(mc._top.interval * 2 + 0.5)     # first sample is skipped (since-boot average)
+    spawned.clear()
+    for _ in range(CYCLES):
+        mc._sample_cpu()
+        mc._sample_cpu_breakdown()
+    mc._top.stop()
+    return len(spawned)
+
+
+if __name__ == "__main__":
+    subprocess.Popen.__init__ = _counting_init
+    print(f"one-shot top: {run(False)} processes/min")
+    print(f"TopStream:    {run(True)} processes/min (plus 1 long-lived top)")
@@ -172,7 +172,7 @@ curl -fsSL "https://raw.githubusercontent.com/vzekalo/MacStressMonitor/main/macs
 PKG_DIR="$INSTALL_DIR/macstress"
 mkdir -p "$PKG_DIR"
 REPO_RAW="https://raw.githubusercontent.com/vzekalo/MacStressMonitor/main/macstress"
-PKG_MODULES="__init__.py __main__.py benchmark.py dashboard.py launchd.py launcher.py metrics.py native_app.py popover.py server.py stress.py stress_manager.py sudo.py system.py updater.py"
+PKG_MODULES="__init__.py __main__.py async_server.py benchmark.py dashboard.py diskio.py drive.py events.py export.py history.py launchd.py launcher.py libc.py metrics.py native_app.py popover.py procs.py recorder.py replay.py scheduler.py server.py streams.py stress.py stress_manager.py sudo.py system.py telemetry.py updater.py websocket.py"
 dl_ok=0; dl_fail=0
 for mod in $PKG_MODULES; do
     if curl -fsSL "$REPO_RAW/$mod" -o "$PKG_DIR/$mod" 2>/dev/null; then
@@ -4,8 +4,9 @@ import os, sys, time, signal, socket, subprocess, threading
 import multiprocessing as mp
 
 from . import VERSION
-from .system import detect_system
+from .system import detect_system, data_dir
 from .metrics import MetricsCollector
+from .recorder import Recorder
 from .stress_manager import StressManager
 from .server import ThreadedHTTPServer, Handler, set_globals
 from .updater import check_for_updates
@@ -13,25 +14,17 @@ from .launcher import create_app_launcher, ensure_app_bundle
 from .sudo import pre_elevate_sudo
 
 
-def main():
-    # Handle CLI flags
-    if "--install-app" in sys.argv:
-        create_app_launcher("full")
-        return
-    if "--install-lite-app" in sys.argv:
-        create_app_launcher("lite")
-        return
-    if "--check-update" in sys.argv:
-        check_for_updates()
-        return
-    if "--version" in sys.argv:
-        print(f"MacStressMonitor v{VERSION}")
-        return
+def _arg(name, default=None, cast=str):
+    """Value following `name` in argv, e.g. --min-interval 1.0."""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            try: return cast(sys.argv[i + 1])
+            except ValueError: pass
+    return default
 
-    print("\n" + "="*60)
-    print(f"  ⚡ MacStressMonitor v{VERSION} — Native macOS Stress Test + Monitor")
-    print("="*60)
 
+def _live_collector(started_at):
     si = detect_system()
     si["has_sudo"] = os.geteuid() == 0
     print(f"\n  🖥  {si['model_name']}  ({si['model_id']})")
@@ -47,24 +40,97 @@ def main():
     sudo_pw = pre_elevate_sudo()
     si["has_sudo"] = os.geteuid() == 0 or sudo_pw is not None
 
-    mc = MetricsCollector(si)
+    # Crash-safe on-disk recording (survives restarts, kill -9 and panics)
+    recorder = None
+    if "--no-record" not in sys.argv:
+        try:
+            recorder = Recorder(data_dir() / "recordings", MetricsCollector.HISTORY_FIELDS, si)
+            if recorder.recovered:
+                print(f"  💾 Recording resumed ({recorder.recovered} samples in {recorder.path.name})")
+        except Exception as e:
+            print(f"  ⚠️  Recorder disabled: {e}")
+
+    mc = MetricsCollector(si, adaptive="--fixed-rate" not in sys.argv,
+                          min_interval=_arg("--min-interval", 0.5, float),
+                          max_interval=_arg("--max-interval", 300.0, float),
+                          started_at=started_at, recorder=recorder)
     if sudo_pw:
         mc._sudo_pw = sudo_pw
         del sudo_pw
+    return mc
+
+
+def _replay_collector():
+    """--replay FILE_OR_DIR [--speed N|max] [--loop]: recorded session instead of live sensors."""
+    from .replay import ReplayCollector
+    source, speed = _arg("--replay"), _arg("--speed", "1")
+    try:
+        speed = 0.0 if speed == "max" else float(speed)
+        mc = ReplayCollector(source, speed=speed, loop="--loop" in sys.argv)
+    except (TypeError, ValueError) as e:
+        print(f"  ❌ Replay: {e}")
+        return None
+    print(f"\n  ▶️  Replaying {source} at {'max' if not speed else f'{speed:g}x'} speed"
+          f"{' (looping)' if mc.loop else ''}")
+    return mc
+
+
+def main():
+    started_at = time.monotonic()
+    # Handle CLI flags
+    if "--install-app" in sys.argv:
+        create_app_launcher("full")
+        return
+    if "--install-lite-app" in sys.argv:
+        create_app_launcher("lite")
+        return
+    if "--check-update" in sys.argv:
+        check_for_updates()
+        return
+    if "--version" in sys.argv:
+        print(f"MacStressMonitor v{VERSION}")
+        return
+    if "--export" in sys.argv:
+        # --export FILE.csv|FILE.npz [--source DIR_OR_SEGMENT] [--range SECONDS]
+        from .export import export_file
+        path = _arg("--export")
+        if not path:
+            print("  Usage: python3 -m macstress --export FILE.csv|FILE.npz [--source DIR] [--range SECONDS]")
+            return
+        export_file(path, _arg("--source", str(data_dir() / "recordings")), _arg("--range", None, float))
+        return
+
+    print("\n" + "="*60)
+    print(f"  ⚡ MacStressMonitor v{VERSION} — Native macOS Stress Test + Monitor")
+    print("="*60)
+
+    if "--replay" in sys.argv:
+        mc = _replay_collector()
+        if mc is None:
+            return
+    else:
+        mc = _live_collector(started_at)
+    si = mc.sys_info
     sm = StressManager(si)
+    mc.set_stress_probe(sm.get_active)
     mc.start()
 
     # Set globals for server handlers
     set_globals(mc, sm, si)
 
     # Auto-create/update .app bundle
-    ensure_app_bundle()
+    if "--replay" not in sys.argv:
+        ensure_app_bundle()
 
-    port = 9630
+    port = _arg("--port", 9630, int)
     subprocess.run(f"lsof -ti:{port} | xargs kill -9 2>/dev/null", shell=True, capture_output=True)
     time.sleep(0.3)
 
-    server = ThreadedHTTPServer(("0.0.0.0", port), Handler)
+    if "--async-server" in sys.argv:
+        from .async_server import AsyncHTTPServer
+        server = AsyncHTTPServer(("0.0.0.0", port))
+    else:
+        server = ThreadedHTTPServer(("0.0.0.0", port), Handler)
     threading.Thread(target=server.serve_forever, daemon=True).start()
 
     ip = "127.0.0.1"
@@ -0,0 +1,187 @@
+"""Event-loop HTTP server (--async-server) — same routes as server.Handler.
+
+A single thread runs one asyncio loop for every connection. /events is a coroutine
+fed by the EventHub, so an idle dashboard or popover stream costs a socket and
+a small task instead of a parked OS thread. Other requests go through the
+unchanged Handler code against in-memory files: quick routes run inline on the
+loop, and routes that block (network, subprocess, long exports, history
+downsampling) run on a small executor whose writes go back through the loop
+with backpressure."""
+
+import io, socket, asyncio, threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from . import server, websocket
+from .server import Handler, SSE_HEADERS
+
+# Routes whose handlers can block for a noticeable time (network, subprocess, or CPU-heavy
+# like LTTB downsampling of a long history range)
+BLOCKING = ("/api/export", "/api/history", "/api/check_update", "/api/do_update", "/api/install_dock",
+            "/api/toggle_launchd")
+HEADER_LIMIT = 64 * 1024
+IDLE_TIMEOUT = 30       # seconds to wait for a request (or keep-alive idle), or to drain a stalled write
+
+_BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+_SSE_HEAD = ("HTTP/1.1 200 OK\r\n" + "".join(f"{k}: {v}\r\n" for k, v in SSE_HEADERS) + "\r\n").encode()
+
+
+class _Exchange(Handler):
+    """Runs one request through Handler with `raw` as the request and `wfile` as the response."""
+
+    def __init__(self, raw, client_address, wfile):
+        self._raw, self._out = raw, wfile
+        super().__init__(None, client_address, None)
+
+    def setup(self):
+        self.rfile = io.BytesIO(self._raw)
+        self.wfile = self._out
+        self.connection = None
+
+    def handle(self):
+        self.handle_one_request()   # the connection loop lives in AsyncHTTPServer._client
+
+    def finish(self):
+        pass
+
+
+class _LoopWriter:
+    """File-like wfile for executor threads: each write is sent and drained on the loop."""
+
+    def __init__(self, loop, writer):
+        self._loop, self._writer = loop, writer
+
+    async def _send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data):
+        asyncio.run_coroutine_threadsafe(self._send(bytes(data)), self._loop).result(IDLE_TIMEOUT)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class AsyncHTTPServer:
+    """Drop-in for ThreadedHTTPServer: binds on construction, serve_forever() / shutdown()."""
+
+    def __init__(self, address, workers=8):
+        self.socket = socket.create_server(address)
+        self.server_address = self.socket.getsockname()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="ms-http")
+        self._loop = None
+        self._done = threading.Event()
+
+    def serve_forever(self):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        srv = loop.run_until_complete(asyncio.start_server(self._client, sock=self.socket, limit=HEADER_LIMIT))
+        try:
+            loop.run_forever()
+        finally:
+            srv.close()
+            tasks = asyncio.all_tasks(loop)
+            for t in tasks:
+                t.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._executor.shutdown(wait=False)
+            loop.close()
+            self._done.set()
+
+    def shutdown(self):
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._done.wait(5)
+
+    async def _client(self, reader, writer):
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            keep = True
+            while keep:     # HTTP/1.1 keep-alive: next request on the same connection
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                method, path = (head.split(b"\r\n", 1)[0].decode("latin-1").split(" ") + ["", ""])[:2]
+                length = next((l.split(b":", 1)[1].strip() for l in head.split(b"\r\n")[1:]
+                               if l.lower().startswith(b"content-length:")), b"0")
+                if not length.isdigit():    # the next request can't be framed either
+                    writer.write(_BAD_REQUEST)
+                    await asyncio.wait_for(writer.drain(), IDLE_TIMEOUT)
+                    break
+                length = int(length)
+                body = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT) if length else b""
+                url = urllib.parse.urlparse(path)
+                if method == "GET" and url.path == "/events":
+                    await self._events(writer, urllib.parse.parse_qs(url.query).get("details") == ["1"])
+                    break
+                if method == "GET" and url.path == "/ws" and b"sec-websocket-key" in head.lower():
+                    await self._websocket(reader, writer, head, urllib.parse.parse_qs(url.query))
+                    break
+                if path.startswith(BLOCKING):
+                    loop = asyncio.get_running_loop()
+                    keep = await loop.run_in_executor(self._executor, self._run, head + body, peer,
+                                                      _LoopWriter(loop, writer))
+                else:
+                    out = io.BytesIO()
+                    keep = not _Exchange(head + body, peer, out).close_connection
+                    writer.write(out.getvalue())
+                    await asyncio.wait_for(writer.drain(), IDLE_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                asyncio.CancelledError, ConnectionError, OSError, ValueError):
+            pass    # CancelledError: server shutting down
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _run(raw, peer, wfile):
+        """Executor side of a blocking route; True when the connection can be reused."""
+        try:
+            return not _Exchange(raw, peer, wfile).close_connection
+        except Exception:
+            return False    # client went away mid-response
+
+    async def _events(self, writer, details=False):
+        loop, ready = asyncio.get_running_loop(), asyncio.Event()
+
+        def wake():
+            try: loop.call_soon_threadsafe(ready.set)
+            except RuntimeError: pass   # loop already closed
+
+        sub = server._hub.subscribe(wake, details)
+        try:
+            writer.write(_SSE_HEAD)
+            while not sub.closed:
+                frame = sub.pop()
+                if frame is None:
+                    await ready.wait()
+                    ready.clear()
+                    continue
+                writer.write(frame)
+                await asyncio.wait_for(writer.drain(), IDLE_TIMEOUT)
+        finally:
+            server._hub.unsubscribe(sub)
+
+    async def _websocket(self, reader, writer, head, query):
+        key = next(l.split(b":", 1)[1].decode("latin-1") for l in head.split(b"\r\n")
+                   if l.lower().startswith(b"sec-websocket-key:"))
+        ws = websocket.Session(server._mc, query.get("fields", [None])[0], query.get("rate", [None])[0])
+        server._mc.client_connected()
+        try:
+            writer.write(websocket.handshake(key) + ws.schema())
+            while not ws.closed:
+                try:
+                    data = await asyncio.wait_for(reader.read(65536), ws.wait() or ws.interval)
+                    if not data:
+                        break
+                    for out in ws.feed(data):
+                        writer.write(out)
+                    if ws.closed:   # nothing may follow our close frame
+                        break
+                except asyncio.TimeoutError:
+                    pass
+                frame = ws.sample()
+                if frame:
+                    writer.write(frame)
+                await asyncio.wait_for(writer.drain(), IDLE_TIMEOUT)
+        finally:
+            ws.close()
+            server._mc.client_disconnected()
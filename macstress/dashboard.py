@@ -15,6 +15,7 @@ body{font-family:-apple-system,BlinkMacSystemFont,'SF Pro Display','Helvetica Ne
 .si{display:flex;gap:6px;flex-wrap:wrap}
 .sb{background:rgba(255,255,255,.04);border:1px solid var(--border);border-radius:8px;padding:4px 10px;font-size:11px;color:#999}
 .sb b{color:#48dbfb}.sb.os b{color:#a29bfe}.sb.md b{color:#ffa500}
+.sb a{color:#ccc;font-weight:600;text-decoration:none}
 .ctrl{padding:8px 16px;display:flex;gap:6px;flex-wrap:wrap;align-items:center;justify-content:center}
 .b{padding:7px 16px;border:1px solid var(--border);border-radius:10px;background:rgba(255,255,255,.04);color:#ccc;cursor:pointer;font-size:12px;font-weight:500;transition:.2s;display:flex;align-items:center;gap:5px;user-select:none}
 .b:hover{background:rgba(255,255,255,.08);transform:translateY(-1px)}
@@ -59,6 +60,9 @@ body{font-family:-apple-system,BlinkMacSystemFont,'SF Pro Display','Helvetica Ne
 .cs{font-size:12px;color:#555;margin-top:4px}
 .p{font-size:14px;color:#777;font-weight:400}
 canvas{width:100%;height:60px;margin-top:8px;border-radius:6px}
+.cores{display:flex;gap:2px;height:24px;align-items:flex-end;margin-top:8px}
+.cores i{flex:1;min-height:1px;border-radius:2px 2px 0 0;background:#ff6b6b;transition:height .4s}
+.cores i.e{background:#48dbfb}
 .gr{display:flex;gap:14px;flex-wrap:wrap}
 .gi{display:flex;align-items:center;gap:12px;flex:1;min-width:180px}
 .ga{width:80px;height:80px;position:relative;flex-shrink:0}
@@ -86,11 +90,15 @@ canvas{width:100%;height:60px;margin-top:8px;border-radius:6px}
 <div id="dndBanner"></div>
 <div class="g" id="grid"></div>
 <script>
-const H=120;let hist=[],SI={},running=false,cdi=null,endT=0;
+const H=120,SPAN=H*2,CAP=SPAN*20;
+// Chart history: one typed-array ring per series, filled by /ws frames (or upd() when /ws is down).
+// Charts span SPAN seconds by timestamp; CAP holds that window at the 20 Hz /ws cap.
+const R={t:new Float64Array(CAP),cpu:new Float32Array(CAP),mem:new Float32Array(CAP),disk:new Float32Array(CAP),pwr:new Float32Array(CAP)};let rn=0;
+let SI={},running=false,cdi=null,endT=0;
 const $=id=>document.getElementById(id);
 
 const TILES={
-cpu:`<div class="c cpu" data-tile="cpu" draggable="true"><div class="ct">CPU Usage</div><div class="cv" id="cpuV">&mdash;</div><div class="cs" id="cpuS"></div><canvas id="cpuC"></canvas></div>`,
+cpu:`<div class="c cpu" data-tile="cpu" draggable="true"><div class="ct">CPU Usage</div><div class="cv" id="cpuV">&mdash;</div><div class="cs" id="cpuS"></div><div class="cores" id="cpuCores"></div><canvas id="cpuC"></canvas></div>`,
 tmp:`<div class="c tmp" data-tile="tmp" draggable="true"><div class="ct">Temperatures</div><div class="gr">
 <div class="gi"><div class="ga"><svg viewBox="0 0 100 100"><circle class="bg" cx="50" cy="50" r="42"/><circle class="fg" id="ctA" cx="50" cy="50" r="42" stroke="#ff4757" stroke-dasharray="264" stroke-dashoffset="264"/></svg><div class="gv" id="ctV">&mdash;</div></div><div><div class="gl">CPU</div><div class="gb" id="ctB">&mdash;</div><div class="gu">&deg;C</div></div></div>
 <div class="gi"><div class="ga"><svg viewBox="0 0 100 100"><circle class="bg" cx="50" cy="50" r="42"/><circle class="fg" id="gtA" cx="50" cy="50" r="42" stroke="#ffa500" stroke-dasharray="264" stroke-dashoffset="264"/></svg><div class="gv" id="gtV">&mdash;</div></div><div><div class="gl">GPU</div><div class="gb" id="gtB">&mdash;</div><div class="gu">&deg;C</div></div></div>
@@ -99,7 +107,7 @@ pwr:`<div class="c pwr" data-tile="pwr" draggable="true"><div class="ct">Power C
 <div class="pi"><div class="pl">CPU</div><div class="pv" id="cpwV">&mdash;</div><div class="pu">watts</div></div>
 <div class="pi"><div class="pl">GPU</div><div class="pv" id="gpwV">&mdash;</div><div class="pu">watts</div></div>
 <div class="pi"><div class="pl">TOTAL</div><div class="pv" id="tpwV">&mdash;</div><div class="pu">watts</div></div>
-</div><div class="cs" id="pwrH" style="color:#777;text-align:center;margin-top:6px"></div></div>`,
+</div><div class="cs" id="pwrH" style="color:#777;text-align:center;margin-top:6px"></div><canvas id="pwrC"></canvas></div>`,
 mem:`<div class="c mem" data-tile="mem" draggable="true"><div class="ct">Memory (RAM)</div><div class="cv" id="memV">&mdash;</div><div class="cs" id="memS"></div><canvas id="memC"></canvas></div>`,
 swp:`<div class="c swp" data-tile="swp" draggable="true"><div class="ct">Swap (SSD &#8594; RAM)</div><div class="cv" id="swpV" style="font-size:26px">&mdash;</div><div class="cs" id="swpS"></div><div class="sbar"><div class="sfill" id="swpB"></div></div></div>`,
 dsk:`<div class="c dsk" data-tile="dsk" draggable="true"><div class="ct">Disk I/O</div><div class="cv" id="dskV" style="font-size:26px">&mdash;</div><div class="cs" id="dskS"></div><canvas id="dskC"></canvas></div>`,
@@ -136,10 +144,17 @@ $('grid').innerHTML=order.map(k=>TILES[k]).join('');
 initDrag();
 initBanner();}
 
-function ch(id,data,col,mx){let c=$(id);if(!c)return;let x=c.getContext('2d'),W=c.width=c.offsetWidth*2,Hc=c.height=c.offsetHeight*2;
+function ch(id,t,data,col,mx){let c=$(id);if(!c||!data.length)return;let x=c.getContext('2d'),W=c.width=c.offsetWidth*2,Hc=c.height=c.offsetHeight*2;
 x.clearRect(0,0,W,Hc);let g=x.createLinearGradient(0,0,0,Hc);g.addColorStop(0,col+'35');g.addColorStop(1,col+'05');
-x.beginPath();let s=W/(H-1);for(let i=0;i<data.length;i++){let px=i*s,py=Hc-(data[i]/mx)*Hc;i===0?x.moveTo(px,py):x.lineTo(px,py);}
-x.strokeStyle=col;x.lineWidth=2;x.stroke();x.lineTo((data.length-1)*s,Hc);x.lineTo(0,Hc);x.closePath();x.fillStyle=g;x.fill();}
+let t1=t[t.length-1],X=i=>W-(t1-t[i])/SPAN*W;
+x.beginPath();for(let i=0;i<data.length;i++){let px=X(i),py=Hc-((data[i]||0)/mx)*Hc;i===0?x.moveTo(px,py):x.lineTo(px,py);}
+x.strokeStyle=col;x.lineWidth=2;x.stroke();x.lineTo(W,Hc);x.lineTo(X(0),Hc);x.closePath();x.fillStyle=g;x.fill();}
+function rpush(t,cpu,mem,disk,pwr){if(rn&&t<R.t[rn-1])return;if(rn===CAP){for(let k in R)R[k].copyWithin(0,1);}else rn++;
+let i=rn-1;R.t[i]=t;R.cpu[i]=cpu;R.mem[i]=mem;R.disk[i]=disk;R.pwr[i]=pwr;}
+function rmax(a,m){for(let i=0;i<a.length;i++)if(a[i]>m)m=a[i];return m;}
+function draw(){if(!rn)return;let i0=0;while(R.t[i0]<R.t[rn-1]-SPAN)i0++;let v=k=>R[k].subarray(i0,rn),t=v('t');
+ch('cpuC',t,v('cpu'),'#ff6b6b',100);ch('memC',t,v('mem'),'#48dbfb',100);
+ch('dskC',t,v('disk'),'#a29bfe',rmax(v('disk'),.1));ch('pwrC',t,v('pwr'),'#ffa502',rmax(v('pwr'),1));}
 
 function ga(aId,vId,bId,val,mx,col){
 if(val==null){$(vId)&&($(vId).textContent='\u2014');$(bId)&&($(bId).textContent='\u2014');return;}
@@ -154,7 +169,10 @@ else h.textContent='\u23f3 Waiting for power data...';}
 
 function upd(d){
 let cpu=d.cpu_usage||0;$('cpuV').innerHTML=cpu.toFixed(1)+'<span class="p">%</span>';
-$('cpuS').textContent=(SI.cores||'?')+' cores'+(d.cpu_freq_ghz?' \u00b7 '+d.cpu_freq_ghz.toFixed(2)+' GHz':'');
+$('cpuS').textContent=(SI.cores||'?')+' cores'+(d.cpu_freq_ghz?' \u00b7 '+d.cpu_freq_ghz.toFixed(2)+' GHz':'')
+ +(d.p_cluster_usage!=null?' \u00b7 P '+d.p_cluster_usage.toFixed(0)+'%':'')+(d.e_cluster_usage!=null?' \u00b7 E '+d.e_cluster_usage.toFixed(0)+'%':'');
+let pc=d.per_core_usage||[],ne=SI.eff_cores||0;
+$('cpuCores').innerHTML=pc.map((v,i)=>'<i class="'+(i<ne?'e':'')+'" style="height:'+Math.max(v,2)+'%" title="CPU '+i+(i<ne?' (E)':' (P)')+': '+v.toFixed(0)+'%"></i>').join('');
 let mp=d.mem_used_pct||0;$('memV').innerHTML=mp.toFixed(1)+'<span class="p">%</span>';
 $('memS').textContent=(d.mem_used_gb||0)+' / '+(d.mem_total_gb||0)+' GB RAM';
 ga('ctA','ctV','ctB',d.cpu_temp,110,'#ff4757');
@@ -165,16 +183,13 @@ $('swpV').innerHTML=su.toFixed(2)+' <span class="p">/ '+st.toFixed(1)+' GB</span
 $('swpS').textContent=st>0?(su/st*100).toFixed(1)+'% used \u2014 SSD pressure':'No swap active';
 $('swpB').style.width=(st>0?Math.min(su/st*100,100):0)+'%';
 $('dskV').textContent=(d.disk_read_mb||0).toFixed(1)+' / '+(d.disk_write_mb||0).toFixed(1);
-$('dskS').textContent='Read / Write MB/s';
+$('dskS').textContent='Read / Write MB/s'+(d.disk_read_iops!=null?' \u00b7 '+d.disk_read_iops+' / '+d.disk_write_iops+' IOPS':'');
 let i='';function r(l,v){return '<div class="ir"><span class="il">'+l+'</span><span class="iv">'+v+'</span></div>';}
 i+=r('Model',SI.model_name||'\u2014');i+=r('OS',SI.os||'\u2014');i+=r('Arch',(SI.arch||'').toUpperCase());
 i+=r('CPU',SI.cpu||'\u2014');i+=r('GPU',SI.gpu||'\u2014');
 if(d.fan_rpm!=null)i+=r('Fan',d.fan_rpm+' RPM');
 $('info').innerHTML=i;
-hist.push({cpu,mem:mp,disk:(d.disk_read_mb||0)+(d.disk_write_mb||0)});if(hist.length>H)hist.shift();
-ch('cpuC',hist.map(h=>h.cpu),'#ff6b6b',100);
-ch('memC',hist.map(h=>h.mem),'#48dbfb',100);
-ch('dskC',hist.map(h=>h.disk),'#a29bfe',Math.max(...hist.map(h=>h.disk),.1));}
+if(!wsLive){rpush(d.timestamp,cpu,mp,(d.disk_read_mb||0)+(d.disk_write_mb||0),d.total_power_w||0);draw();}}
 
 let ctrlInit=false;
 function mkC(a){
@@ -274,19 +289,42 @@ fetch('/api/disk_bench',{method:'POST'}).then(()=>{
  },1000);
 });}
 
+// Backfill charts from server-side history (LTTB-downsampled) so a reopened window isn't empty
+function backfill(){
+fetch('/api/history?range='+SPAN+'&points='+H+'&metrics=cpu_usage,mem_used_pct,disk_read_mb,disk_write_mb,total_power_w').then(r=>r.json()).then(d=>{
+let s=d.series,c=s.cpu_usage;if(!c||!c.t.length)return;
+let at=(k,t)=>{let q=s[k];if(!q||!q.t.length)return 0;let j=0;while(j+1<q.t.length&&q.t[j+1]<=t)j++;return q.v[j]||0;};
+let t0=rn?R.t[0]:Infinity,back=c.t.map((t,i)=>[d.t0+t,c.v[i],at('mem_used_pct',t),at('disk_read_mb',t)+at('disk_write_mb',t),at('total_power_w',t)]).filter(b=>b[0]<t0);
+let live=[];for(let i=0;i<rn;i++)live.push([R.t[i],R.cpu[i],R.mem[i],R.disk[i],R.pwr[i]]);
+rn=0;for(let b of back.concat(live).slice(-CAP))rpush(...b);draw();}).catch(()=>{});}
+
+// /ws: schema text frame, then binary [f64 timestamp, f32 per field] whenever a value changes (see websocket.py)
+let wsLive=false;
+function wsc(){let w=new WebSocket((location.protocol==='https:'?'wss://':'ws://')+location.host+'/ws?rate=10&fields=cpu_usage,mem_used_pct,disk_read_mb,disk_write_mb,total_power_w'),ix={};
+w.binaryType='arraybuffer';
+w.onmessage=e=>{if(typeof e.data==='string'){let f=JSON.parse(e.data).fields;ix={};f.forEach((k,i)=>ix[k]=i);ix.n=f.length;wsLive=true;return;}
+let v=new Float32Array(e.data,8,ix.n),g=k=>ix[k]!=null?v[ix[k]]||0:0;
+rpush(new DataView(e.data).getFloat64(0,true),g('cpu_usage'),g('mem_used_pct'),g('disk_read_mb')+g('disk_write_mb'),g('total_power_w'));draw();};
+w.onclose=()=>{wsLive=false;setTimeout(wsc,2000);};}
+
+// /events: a keyframe on connect, then only changed fields (see events.py); a seq gap means resync
+let M={},seq=0;
 function sse(){let es=new EventSource('/events');
 es.onmessage=e=>{try{let d=JSON.parse(e.data);
-if(d.sys_info&&!ctrlInit){SI=d.sys_info;mkI();mkC(d.active||[]);}
-if(d.sys_info&&ctrlInit){SI=d.sys_info;mkI();}
-if(d.metrics)upd(d.metrics);
+if(!d.key&&d.seq!==seq+1){es.close();sse();return;}
+seq=d.seq;M=d.key?d.metrics:Object.assign({},M,d.metrics);
+if(d.sys_info){SI=d.sys_info;mkI();if(!ctrlInit)mkC(d.active||[]);}
+if(d.key||Object.keys(d.metrics).length)upd(M);
 if(d.active)uC(d.active);
 }catch(x){}};
 es.onerror=()=>{es.close();setTimeout(sse,2000);};}
 
 function mkI(){let s=SI;$('si').innerHTML=
-'<div class="sb md"><b>'+s.model_name+'</b></div>'+
+'<div class="sb md"><b>'+s.model_name+'</b>'+(s.probing?' \u2026':'')+'</div>'+
 '<div class="sb os"><b>'+s.os+'</b></div>'+
 '<div class="sb"><b>'+(s.arch||'').toUpperCase()+'</b></div>'+
-'<div class="sb"><b>'+s.cores+'</b> cores \u00b7 <b>'+s.ram_gb+'</b> GB</div>';}
-init();sse();
+'<div class="sb"><b>'+s.cores+'</b> cores \u00b7 <b>'+s.ram_gb+'</b> GB</div>'+
+(s.replay?'<div class="sb"><b>\u25b6</b> Replay \u00b7 '+s.replay+'</div>':'')+
+'<div class="sb">\u2b07 <a href="/api/export?format=csv">CSV</a> \u00b7 <a href="/api/export?format=npz">NPZ</a></div>';}
+init();backfill();sse();wsc();
 </script></body></html>'''
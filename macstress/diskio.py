@@ -0,0 +1,80 @@
+"""Disk throughput from cumulative block-device counters (no blocking `iostat` interval).
+
+macOS: IOBlockStorageDriver "Statistics" via `ioreg -a` (returns immediately).
+Linux: /proc/diskstats."""
+
+import os, sys, time, plistlib, subprocess
+
+
+def _read_ioreg():
+    """{bsd_name: (read_bytes, write_bytes, read_ops, write_ops)} from the IORegistry."""
+    r = subprocess.run(["ioreg", "-a", "-r", "-c", "IOBlockStorageDriver", "-d", "2"],
+                       capture_output=True, timeout=5)
+    if r.returncode != 0 or not r.stdout:
+        return None
+    out = {}
+    for i, drv in enumerate(plistlib.loads(r.stdout)):
+        st = drv.get("Statistics") or {}
+        name = next((c["BSD Name"] for c in drv.get("IORegistryEntryChildren") or () if "BSD Name" in c),
+                    f"disk{i}")
+        out[name] = (st.get("Bytes (Read)", 0), st.get("Bytes (Write)", 0),
+                     st.get("Operations (Read)", 0), st.get("Operations (Write)", 0))
+    return out
+
+
+def _read_diskstats():
+    """Whole block devices only (those listed in /sys/block), loop/ram devices skipped."""
+    out = {}
+    with open("/proc/diskstats") as f:
+        for line in f:
+            p = line.split()
+            if len(p) < 10:
+                continue
+            name = p[2]
+            if name.startswith(("loop", "ram")) or not os.path.exists(f"/sys/block/{name}"):
+                continue
+            # reads completed, sectors read, writes completed, sectors written (512-byte sectors)
+            out[name] = (int(p[5]) * 512, int(p[9]) * 512, int(p[3]), int(p[7]))
+    return out
+
+
+def read_counters():
+    try:
+        if sys.platform == "darwin":
+            return _read_ioreg()
+        if os.path.exists("/proc/diskstats"):
+            return _read_diskstats()
+    except Exception:
+        pass
+    return None
+
+
+class DiskRateSampler:
+    """Turns cumulative counters into per-device MB/s and IOPS using monotonic deltas."""
+
+    def __init__(self):
+        self._prev = None
+        self._prev_t = None
+
+    def sample(self):
+        """Returns {device: {"read_mb", "write_mb", "read_iops", "write_iops"}},
+        {} on the first call, or None when no counters are available."""
+        cur = read_counters()
+        if cur is None:
+            return None
+        now = time.monotonic()
+        prev, dt = self._prev, (now - self._prev_t) if self._prev_t else 0
+        self._prev, self._prev_t = cur, now
+        if not prev or dt <= 0:
+            return {}
+        rates = {}
+        for dev, (rb, wb, ro, wo) in cur.items():
+            if dev not in prev:
+                continue
+            prb, pwb, pro, pwo = prev[dev]
+            # Counters can reset when a device is re-attached — clamp at zero
+            rates[dev] = {"read_mb": max(rb - prb, 0) / dt / 1024**2,
+                          "write_mb": max(wb - pwb, 0) / dt / 1024**2,
+                          "read_iops": max(ro - pro, 0) / dt,
+                          "write_iops": max(wo - pwo, 0) / dt}
+        return rates
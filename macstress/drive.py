@@ -0,0 +1,56 @@
+"""Internal drive inventory — static identity cached per boot, small dynamic health check.
+
+Model, capacity, serial and TRIM come from the slow `system_profiler
+SPNVMeDataType` at most once per boot session; the SMART verdict is refreshed
+with the much cheaper `diskutil info -plist`."""
+
+import re, json, plistlib, subprocess
+from . import libc
+from .system import cache_dir
+
+_IDENTITY_FIELDS = [
+    ("smart_model", r'Model:\s*(.+)', 0),
+    ("smart_capacity", r'Capacity:\s*(.+?)\s*\(', 0),
+    ("smart_trim", r'TRIM\s+Support:\s*(\S+)', 0),
+    ("smart_serial", r'Serial\s+Number:\s*(\S+)', 0),
+    ("smart_status", r'S\.M\.A\.R\.T\.\s*status:\s*(\S+)', re.IGNORECASE),
+]
+
+
+def _profile():
+    raw = subprocess.getoutput("system_profiler SPNVMeDataType 2>/dev/null")
+    found = {}
+    for key, pattern, flags in _IDENTITY_FIELDS:
+        m = re.search(pattern, raw, flags)
+        if m: found[key] = m.group(1).strip()
+    return found
+
+
+def identity(refresh=False):
+    """Static drive fields (plus the SMART status seen at profiling time).
+    Cached on disk and reused while the boot session is unchanged."""
+    path = cache_dir() / "drive.json"
+    boot = libc.boot_time()
+    if not refresh:
+        try:
+            cached = json.loads(path.read_text())
+            if cached.get("boot") == boot and cached.get("identity") is not None:
+                return cached["identity"]
+        except (OSError, ValueError):
+            pass
+    found = _profile()
+    # Cache empty results too — a Mac without NVMe should not be re-profiled every TTL
+    try: path.write_text(json.dumps({"boot": boot, "identity": found}))
+    except OSError: pass
+    return found
+
+
+def health(device="disk0"):
+    """SMART verdict ('Verified', 'Failing', ...) from diskutil, or None."""
+    try:
+        r = subprocess.run(["diskutil", "info", "-plist", device], capture_output=True, timeout=10)
+        if r.returncode == 0:
+            return plistlib.loads(r.stdout).get("SMARTStatus")
+    except Exception:
+        pass
+    return None
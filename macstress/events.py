@@ -0,0 +1,196 @@
+"""EventHub — one encoded /events frame per tick, fanned out to every subscriber.
+
+A single hub thread serializes the snapshot once per collector interval and
+appends the bytes to each subscriber's small queue. Connection handlers only
+write what is queued, so a slow client skips frames and is dropped after
+DROP_AFTER ticks without reading instead of holding up the rest.
+
+Protocol (PROTOCOL = 2), one SSE message per frame with `id: <seq>`:
+    keyframe  {"v": 2, "seq": n, "key": 1, "metrics": {...}, "active": [...], "sys_info": {...}}
+    delta     {"seq": n, "metrics": {changed fields}[, "active": [...]][, "sys_info": {...}]}
+Subscribers that ask for details (/events?details=1) also get "details" in
+keyframes and, when any changed, the changed collector details in deltas —
+so the slower sources arrive at their own rate on the same stream.
+Every connection (including an EventSource resume with Last-Event-ID) starts
+with a keyframe; clients merge deltas into it. A client that sees a gap in
+`seq` reconnects. A subscriber whose queue overflows gets a fresh keyframe in
+place of the frames it missed."""
+
+import json, time, threading
+from collections import deque
+
+PROTOCOL = 2
+MAX_PENDING = 4     # frames buffered per subscriber before its queue is replaced by a keyframe
+DROP_AFTER = 30     # ticks without the client reading before it is closed
+_MISSING = object()
+
+
+def sse_frame(payload, seq=None):
+    data = json.dumps(payload, separators=(",", ":"))
+    return (f"id: {seq}\ndata: {data}\n\n" if seq is not None else f"data: {data}\n\n").encode()
+
+
+class Subscriber:
+    """Per-connection frame queue. `wake` is called after every push — the default
+    suits a blocking handler thread; the asyncio server passes a thread-safe waker."""
+
+    def __init__(self, first=None, wake=None, details=False):
+        self.frames = deque([first] if first else (), maxlen=MAX_PENDING)
+        self.details = details
+        self.skipped = 0
+        self.closed = False
+        self._lagging = 0
+        self._event = threading.Event()
+        self._wake = wake or self._event.set
+
+    def push(self, frame, keyframe=None):
+        """Queue a delta. On overflow the queue is replaced by `keyframe()` (full
+        state as of this frame) so the client's merged state stays correct.
+        Returns the frame queued, or None once the subscriber is closed."""
+        self._lagging += 1
+        if self._lagging >= DROP_AFTER:
+            self.close()
+            return None
+        if len(self.frames) == self.frames.maxlen and keyframe:
+            self.skipped += len(self.frames)
+            self.frames.clear()
+            frame = keyframe()
+        self.frames.append(frame)
+        self._wake()
+        return frame
+
+    def pop(self):
+        try: frame = self.frames.popleft()
+        except IndexError: return None
+        self._lagging = 0
+        return frame
+
+    def get(self, timeout=None):
+        """Next frame, or None on timeout or close (blocking handlers)."""
+        if not self.frames and not self.closed:
+            self._event.wait(timeout)
+            self._event.clear()
+        return self.pop()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+
+class EventHub:
+    def __init__(self, mc, sm, si):
+        self.mc, self.sm, self.si = mc, sm, si
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.seq = 0
+        self._metrics, self._active, self._si_json, self._details = {}, None, None, {}
+        self._keys = {}         # details? -> (seq, encoded keyframe)
+        self.frames = 0         # frames encoded
+        self.encode_ms = 0.0    # cost of the last encode
+        self.bytes = 0          # bytes queued to subscribers
+        self.dropped = 0        # subscribers closed for lagging
+
+    @staticmethod
+    def _changed(old, new):
+        return {k: v for k, v in new.items() if old.get(k, _MISSING) != v}
+
+    def _advance(self, details=False):
+        """Fold the current state in. Returns (delta payload, changed details) —
+        (None, None) when nothing changed. Details are only tracked while wanted."""
+        metrics, active = self.mc.get_snapshot(), self.sm.get_active()
+        si_json = json.dumps(self.si, sort_keys=True)
+        delta = {"metrics": self._changed(self._metrics, metrics)}
+        if active != self._active:
+            delta["active"] = active
+        if si_json != self._si_json:
+            delta["sys_info"] = json.loads(si_json)
+        changed = None
+        if details:
+            cur = self.mc.get_details()
+            changed, self._details = self._changed(self._details, cur), cur
+        if not delta["metrics"] and len(delta) == 1 and not changed:
+            return None, None
+        self.seq += 1
+        self._metrics, self._active, self._si_json = metrics, active, si_json
+        return dict(delta, seq=self.seq), changed
+
+    def _keyframe(self, details=False):
+        key = self._keys.get(details)
+        if key is None or key[0] != self.seq:
+            payload = {"v": PROTOCOL, "seq": self.seq, "key": 1, "metrics": self._metrics,
+                       "active": self._active, "sys_info": json.loads(self._si_json)}
+            if details:
+                payload["details"] = self._details
+            key = self._keys[details] = (self.seq, sse_frame(payload, self.seq))
+        return key[1]
+
+    def subscribe(self, wake=None, details=False):
+        with self._lock:
+            if not self._subs:
+                self._advance(details)  # nobody to send a delta to — just refresh the state
+            elif details and not any(s.details for s in self._subs):
+                self._details = self.mc.get_details()
+                self._keys.pop(True, None)
+            sub = Subscriber(self._keyframe(details), wake, details)
+            self.bytes += len(sub.frames[0])
+            self._subs.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="ms-events")
+                self._thread.start()
+        self.mc.client_connected()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub not in self._subs:
+                return
+            self._subs.discard(sub)
+        sub.close()
+        self.mc.client_disconnected()
+
+    def publish(self):
+        """Encode what changed since the last tick once and queue it for every subscriber."""
+        with self._lock:
+            if not self._subs:
+                return
+            t0 = time.perf_counter()
+            delta, details = self._advance(any(s.details for s in self._subs))
+            if delta is None:
+                return
+            frames = {False: sse_frame(delta, self.seq)}
+            frames[True] = sse_frame(dict(delta, details=details), self.seq) if details else frames[False]
+            self.encode_ms = round((time.perf_counter() - t0) * 1000, 3)
+            self.frames += 1
+            keys = {False: self._keyframe, True: lambda: self._keyframe(True)}
+            lagging = []
+            for sub in self._subs:
+                queued = sub.push(frames[sub.details], keys[sub.details])
+                if queued is None:
+                    lagging.append(sub)
+                else:
+                    self.bytes += len(queued)
+        for sub in lagging:
+            self.dropped += 1
+            self.unsubscribe(sub)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.publish()
+            self._stop.wait(self.mc.get_details()["sample_interval_s"])
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            sub.close()
+
+    def stats(self):
+        with self._lock:
+            subs = list(self._subs)
+        return {"protocol": PROTOCOL, "seq": self.seq, "subscribers": len(subs),
+                "details_subscribers": sum(s.details for s in subs), "frames": self.frames,
+                "encode_ms": self.encode_ms, "bytes": self.bytes,
+                "skipped": sum(s.skipped for s in subs), "dropped": self.dropped}
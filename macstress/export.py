@@ -0,0 +1,133 @@
+"""Export metrics as CSV or NumPy .npz — streamed as byte chunks, never held whole in memory.
+
+Rows come from the on-disk recording or the in-memory history as
+(timestamp, [value per field]) with None for missing values."""
+
+import sys, time, struct, zipfile, tempfile
+from array import array
+from pathlib import Path
+
+CHUNK_ROWS = 1000
+NAN = float("nan")
+FORMATS = {"csv": "text/csv", "npz": "application/zip"}
+
+
+def history_rows(history, start, end, fields):
+    """Rows from History.query (finest tier covering the range)."""
+    _, t, cols = history.query(start, end, fields)
+    columns = [cols[f] for f in fields]
+    for i, ts in enumerate(t):
+        yield ts, [c[i] for c in columns]
+
+
+def csv_stream(rows, fields):
+    yield ("timestamp," + ",".join(fields) + "\n").encode()
+    buf = []
+    for ts, vals in rows:
+        buf.append(f"{ts:.3f}," + ",".join("" if v is None else f"{v:.6g}" for v in vals))
+        if len(buf) >= CHUNK_ROWS:
+            yield ("\n".join(buf) + "\n").encode()
+            buf = []
+    if buf:
+        yield ("\n".join(buf) + "\n").encode()
+
+
+def _npy_header(descr, n):
+    """NPY 1.0 header for a 1-D little-endian array of length n."""
+    d = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({n},), }}"
+    d += " " * (63 - (10 + len(d)) % 64) + "\n"   # total header length is a multiple of 64
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(d)) + d.encode()
+
+
+class _Sink:
+    """Write-only, unseekable target — zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        out = b"".join(self.chunks)
+        self.chunks.clear()
+        return out
+
+
+def npz_stream(rows, fields):
+    """Columnar .npz: 'timestamp' (float64) plus one float32 array per field (NaN = missing).
+    np.load(file)[name] maps each column straight from the archive.
+
+    One pass over `rows` spills each column to its own spooled temp file
+    (in memory up to 1 MB), then the columns are streamed into the zip."""
+    names = ["timestamp", *fields]
+    spools = [tempfile.SpooledTemporaryFile(1 << 20) for _ in names]
+    bufs = [array("d")] + [array("f") for _ in fields]
+    swap = sys.byteorder == "big"
+
+    def spill():
+        for buf, f in zip(bufs, spools):
+            if swap: buf.byteswap()
+            f.write(buf.tobytes())
+            del buf[:]
+
+    n = 0
+    try:
+        for ts, vals in rows:
+            bufs[0].append(ts)
+            for buf, v in zip(bufs[1:], vals):
+                buf.append(NAN if v is None else v)
+            n += 1
+            if len(bufs[0]) >= CHUNK_ROWS:
+                spill()
+        spill()
+        sink = _Sink()
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name, buf, f in zip(names, bufs, spools):
+                f.seek(0)
+                with zf.open(name + ".npy", "w", force_zip64=True) as w:
+                    w.write(_npy_header("<f8" if buf.typecode == "d" else "<f4", n))
+                    while True:
+                        chunk = f.read(1 << 16)
+                        if not chunk:
+                            break
+                        w.write(chunk)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        for f in spools:
+            f.close()
+
+
+def stream(fmt, rows, fields):
+    return npz_stream(rows, fields) if fmt == "npz" else csv_stream(rows, fields)
+
+
+def filename(fmt):
+    return time.strftime("macstress-%Y%m%d-%H%M%S.") + fmt
+
+
+def export_file(path, source, seconds=None):
+    """CLI export: recording `source` (directory or segment) -> `path` (.csv or .npz)."""
+    from .recorder import read, recording_info
+    fmt = Path(path).suffix.lstrip(".").lower()
+    if fmt not in FORMATS:
+        print(f"  ❌ Unknown export format '{fmt}' — use .csv or .npz")
+        return False
+    fields, _ = recording_info(source)
+    if not fields:
+        print(f"  ❌ No recording found in {source}")
+        return False
+    start = time.time() - seconds if seconds else None
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in stream(fmt, read(source, start, fields=fields), fields):
+            f.write(chunk)
+            size += len(chunk)
+    print(f"  ✅ Exported {len(fields)} metrics → {path} ({size / 1024:.0f} KB)")
+    return True
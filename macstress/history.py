@@ -0,0 +1,192 @@
+"""Columnar, multi-resolution metric history.
+
+One typed array per metric and statistic, sharing a timestamp column, kept
+in fixed-size rings at 1 s, 10 s and 60 s resolution. Samples fold into the
+open 1 s bucket; every closed bucket cascades into the next tier, so memory
+is fixed up front however long the app runs."""
+
+import threading
+from array import array
+
+NAN = float("nan")
+
+# (bucket seconds, rows kept): 2 h at 1 s, 24 h at 10 s, 7 days at 60 s
+TIERS = ((1, 7200), (10, 8640), (60, 10080))
+STATS = ("min", "max", "mean")
+
+
+class _Tier:
+    def __init__(self, res, cap, nfields):
+        self.res = res
+        self.cap = cap
+        self.t = array("d", [NAN]) * cap
+        self.cols = {s: [array("f", [NAN]) * cap for _ in range(nfields)] for s in STATS}
+        self.head = 0       # next slot to write
+        self.size = 0
+        self._key = None    # open bucket: index, per-field min / max / sum / count
+        self._acc = None
+
+    def add(self, key, mn, mx, sm, n):
+        """Fold a sample (or a closed finer bucket) into the open bucket.
+        Returns the bucket it closed, as (start, min, max, sum, count), or None.
+        A key older than the open bucket (wall clock stepped back) is merged into
+        it, so the tier stays sorted for bisect."""
+        if self._key is not None and key < self._key:
+            key = self._key
+        if key != self._key:
+            closed = self._close() if self._key is not None else None
+            self._key, self._acc = key, (list(mn), list(mx), list(sm), list(n))
+            return closed
+        amn, amx, asm, an = self._acc
+        for i, c in enumerate(n):
+            if not c:
+                continue
+            if not an[i]:
+                amn[i], amx[i], asm[i], an[i] = mn[i], mx[i], sm[i], c
+                continue
+            if mn[i] < amn[i]: amn[i] = mn[i]
+            if mx[i] > amx[i]: amx[i] = mx[i]
+            asm[i] += sm[i]
+            an[i] += c
+        return None
+
+    def _close(self):
+        start = self._key * self.res
+        amn, amx, asm, an = self._acc
+        h = self.head
+        self.t[h] = start
+        cmin, cmax, cmean = self.cols["min"], self.cols["max"], self.cols["mean"]
+        for i, c in enumerate(an):
+            cmin[i][h], cmax[i][h], cmean[i][h] = (amn[i], amx[i], asm[i] / c) if c else (NAN, NAN, NAN)
+        self.head = (h + 1) % self.cap
+        self.size = min(self.size + 1, self.cap)
+        return start, amn, amx, asm, an
+
+    def oldest(self):
+        return self.t[(self.head - self.size) % self.cap] if self.size else None
+
+    def _at(self, i):
+        return self.t[(self.head - self.size + i) % self.cap]
+
+    def _bisect(self, ts):
+        """First logical row with t >= ts."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._at(mid) < ts: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def _slices(self, lo, hi):
+        """Physical [a, b) ranges for logical rows lo..hi (at most two when wrapped)."""
+        base = (self.head - self.size) % self.cap
+        a, b = base + lo, base + hi
+        if b <= self.cap:
+            return [(a, b)]
+        if a >= self.cap:
+            return [(a - self.cap, b - self.cap)]
+        return [(a, self.cap), (0, b - self.cap)]
+
+    def rows(self, start, end, idx, stat):
+        """(t, [column per field index]) for closed rows in [start, end], plus the open bucket."""
+        lo, hi = self._bisect(start), self._bisect(end + 1e-9)
+        t, cols = [], [[] for _ in idx]
+        for a, b in self._slices(lo, hi):
+            t += self.t[a:b].tolist()
+            for out, i in zip(cols, idx):
+                out += self.cols[stat][i][a:b].tolist()
+        if self._key is not None and start <= self._key * self.res <= end:
+            amn, amx, asm, an = self._acc
+            t.append(float(self._key * self.res))
+            for out, i in zip(cols, idx):
+                if not an[i]: out.append(NAN)
+                else: out.append(amn[i] if stat == "min" else amx[i] if stat == "max" else asm[i] / an[i])
+        return t, cols
+
+
+class History:
+    """Fixed-memory metric history: append() samples, query() ranges."""
+
+    def __init__(self, fields, tiers=TIERS):
+        self.fields = tuple(fields)
+        self.tiers = [_Tier(res, cap, len(self.fields)) for res, cap in tiers]
+        self._index = {f: i for i, f in enumerate(self.fields)}
+        self._lock = threading.Lock()
+
+    def append(self, ts, sample):
+        """Record one sample (a mapping holding some of `fields`; None = missing)."""
+        self.append_values(ts, [sample.get(f) for f in self.fields])
+
+    def append_values(self, ts, vals):
+        """Record one sample given as values in `fields` order (e.g. a recorder row)."""
+        vals = [float(v) if v is not None else NAN for v in vals]
+        n = [0 if v != v else 1 for v in vals]
+        item = (vals, vals, vals, n)
+        with self._lock:
+            for tier in self.tiers:
+                closed = tier.add(int(ts // tier.res), *item)
+                if closed is None:
+                    break
+                start, *item = closed
+                ts = start
+
+    def query(self, start, end, fields=None, stat="mean"):
+        """Rows in [start, end] from the finest tier still holding `start`.
+        Returns (resolution_s, t, {field: values}); missing values are None."""
+        idx = [self._index[f] for f in (fields or self.fields) if f in self._index]
+        with self._lock:
+            tier = next((t for t in self.tiers
+                         if t.size < t.cap or (t.oldest() is not None and t.oldest() <= start)), self.tiers[-1])
+            t, cols = tier.rows(start, end, idx, stat)
+        return tier.res, t, {self.fields[i]: [None if v != v else v for v in col] for i, col in zip(idx, cols)}
+
+    def series(self, start, end, fields=None, points=500, stat="mean"):
+        """Chart-ready downsampled series (bucket starts are whole seconds):
+        {"res": tier seconds, "t0": start, "series": {field: {"t": [offset s], "v": [value]}}}.
+        Each field is reduced to at most `points` with LTTB; the work is bounded by
+        tier size, not by how long the app has been recording."""
+        res, t, cols = self.query(start, end, fields, stat)
+        t0 = int(start)
+        out = {}
+        for f, v in cols.items():
+            pts = lttb(t, v, points)
+            out[f] = {"t": [int(x - t0) for x, _ in pts], "v": [round(y, 2) for _, y in pts]}
+        return {"res": res, "t0": t0, "series": out}
+
+    def span(self):
+        """(oldest, newest) timestamp across all tiers, or None when empty."""
+        with self._lock:
+            old = [t.oldest() for t in self.tiers if t.size]
+            new = [t._key * t.res for t in self.tiers if t._key is not None]
+        return (min(old or new), max(new)) if new else None
+
+    def nbytes(self):
+        return sum(t.t.itemsize * t.cap + sum(c.itemsize * t.cap for cols in t.cols.values() for c in cols)
+                   for t in self.tiers)
+
+
+def lttb(t, v, n):
+    """Largest-Triangle-Three-Buckets: at most n (t, v) points preserving the
+    visual shape (peaks survive, flat runs collapse). None values are dropped."""
+    pts = [(x, y) for x, y in zip(t, v) if y is not None]
+    if len(pts) <= n or n < 3:
+        return pts if len(pts) <= n else [pts[0], pts[-1]][:max(n, 0)]
+    out, a = [pts[0]], 0
+    every = (len(pts) - 2) / (n - 2)
+    for i in range(n - 2):
+        # Average of the next bucket is the third triangle vertex
+        s, e = int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, len(pts))
+        nxt = pts[s:e]
+        avg_x = sum(p[0] for p in nxt) / len(nxt)
+        avg_y = sum(p[1] for p in nxt) / len(nxt)
+        ax, ay = pts[a]
+        best, best_area = s - 1, -1.0
+        for j in range(int(i * every) + 1, s):
+            x, y = pts[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(pts[best])
+        a = best
+    out.append(pts[-1])
+    return out
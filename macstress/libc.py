@@ -0,0 +1,178 @@
+"""In-process system counters via libc (sysctlbyname, host_statistics64) and os.
+
+Every function returns None when the value cannot be read natively, so the
+caller can fall back to the equivalent shell command."""
+
+import os, sys, ctypes, functools
+
+_lib = None
+_host = None    # mach_host_self() send right, taken once (each call adds a port reference)
+if sys.platform == "darwin":
+    try:
+        _lib = ctypes.CDLL("/usr/lib/libSystem.B.dylib", use_errno=True)
+        _lib.sysctlbyname.argtypes = [ctypes.c_char_p, ctypes.c_void_p,
+                                      ctypes.POINTER(ctypes.c_size_t), ctypes.c_void_p, ctypes.c_size_t]
+        _lib.mach_host_self.restype = ctypes.c_uint
+        _lib.host_statistics64.argtypes = [ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+                                           ctypes.POINTER(ctypes.c_uint)]
+        _lib.host_processor_info.argtypes = [ctypes.c_uint, ctypes.c_int, ctypes.POINTER(ctypes.c_uint),
+                                             ctypes.POINTER(ctypes.POINTER(ctypes.c_uint)),
+                                             ctypes.POINTER(ctypes.c_uint)]
+        _lib.vm_deallocate.argtypes = [ctypes.c_uint, ctypes.c_void_p, ctypes.c_size_t]
+        _host = _lib.mach_host_self()
+    except (OSError, AttributeError):
+        _lib = None
+
+
+class _XswUsage(ctypes.Structure):
+    _fields_ = [("total", ctypes.c_uint64), ("avail", ctypes.c_uint64), ("used", ctypes.c_uint64),
+                ("pagesize", ctypes.c_uint32), ("encrypted", ctypes.c_int32)]
+
+
+class _Timeval(ctypes.Structure):
+    _fields_ = [("sec", ctypes.c_long), ("usec", ctypes.c_int32)]
+
+
+class _VmStatistics64(ctypes.Structure):
+    _fields_ = [
+        ("free_count", ctypes.c_uint32), ("active_count", ctypes.c_uint32),
+        ("inactive_count", ctypes.c_uint32), ("wire_count", ctypes.c_uint32),
+        ("zero_fill_count", ctypes.c_uint64), ("reactivations", ctypes.c_uint64),
+        ("pageins", ctypes.c_uint64), ("pageouts", ctypes.c_uint64),
+        ("faults", ctypes.c_uint64), ("cow_faults", ctypes.c_uint64),
+        ("lookups", ctypes.c_uint64), ("hits", ctypes.c_uint64), ("purges", ctypes.c_uint64),
+        ("purgeable_count", ctypes.c_uint32), ("speculative_count", ctypes.c_uint32),
+        ("decompressions", ctypes.c_uint64), ("compressions", ctypes.c_uint64),
+        ("swapins", ctypes.c_uint64), ("swapouts", ctypes.c_uint64),
+        ("compressor_page_count", ctypes.c_uint32), ("throttled_count", ctypes.c_uint32),
+        ("external_page_count", ctypes.c_uint32), ("internal_page_count", ctypes.c_uint32),
+        ("total_uncompressed_pages_in_compressor", ctypes.c_uint64),
+    ]
+
+
+_HOST_VM_INFO64 = 4
+_PROCESSOR_CPU_LOAD_INFO = 2
+_CPU_STATE_MAX = 4  # user, system, idle, nice
+_HOST_VM_INFO64_COUNT = ctypes.sizeof(_VmStatistics64) // 4
+
+
+def sysctl(name, ctype):
+    """Read a fixed-size sysctl into an instance of `ctype`."""
+    if _lib is None:
+        return None
+    val = ctype()
+    size = ctypes.c_size_t(ctypes.sizeof(val))
+    if _lib.sysctlbyname(name.encode(), ctypes.byref(val), ctypes.byref(size), None, 0) != 0:
+        return None
+    return val
+
+
+def sysctl_str(name):
+    if _lib is None:
+        return None
+    size = ctypes.c_size_t(0)
+    if _lib.sysctlbyname(name.encode(), None, ctypes.byref(size), None, 0) != 0:
+        return None
+    buf = ctypes.create_string_buffer(size.value)
+    if _lib.sysctlbyname(name.encode(), buf, ctypes.byref(size), None, 0) != 0:
+        return None
+    return buf.value.decode(errors="replace")
+
+
+@functools.lru_cache(maxsize=None)
+def page_size():
+    v = sysctl("hw.pagesize", ctypes.c_int64)
+    return v.value if v else os.sysconf("SC_PAGE_SIZE")
+
+
+def vm_pages():
+    """host_statistics64(HOST_VM_INFO64) — page counts as reported by vm_stat."""
+    if _lib is None:
+        return None
+    st = _VmStatistics64()
+    count = ctypes.c_uint(_HOST_VM_INFO64_COUNT)
+    if _lib.host_statistics64(_host, _HOST_VM_INFO64,
+                              ctypes.byref(st), ctypes.byref(count)) != 0:
+        return None
+    return {"active": st.active_count, "wired": st.wire_count,
+            "compressed": st.compressor_page_count, "free": st.free_count,
+            "page_size": page_size()}
+
+
+def cpu_ticks():
+    """Cumulative per-core CPU ticks as two parallel lists: (busy, total).
+
+    host_processor_info(PROCESSOR_CPU_LOAD_INFO) on macOS, /proc/stat on Linux."""
+    if _lib is not None:
+        ncpu, info, count = ctypes.c_uint(), ctypes.POINTER(ctypes.c_uint)(), ctypes.c_uint()
+        if _lib.host_processor_info(_host, _PROCESSOR_CPU_LOAD_INFO,
+                                    ctypes.byref(ncpu), ctypes.byref(info), ctypes.byref(count)) != 0:
+            return None
+        try:
+            t = info[:ncpu.value * _CPU_STATE_MAX]
+        finally:
+            _lib.vm_deallocate(ctypes.c_uint.in_dll(_lib, "mach_task_self_").value,
+                               ctypes.cast(info, ctypes.c_void_p), count.value * ctypes.sizeof(ctypes.c_uint))
+        user, system, idle, nice = t[0::4], t[1::4], t[2::4], t[3::4]
+        busy = [u + s + n for u, s, n in zip(user, system, nice)]
+        return busy, [b + i for b, i in zip(busy, idle)]
+    try:
+        busy, total = [], []
+        with open("/proc/stat") as f:
+            for line in f:
+                if not line.startswith("cpu") or line.startswith("cpu "):
+                    continue
+                v = [int(x) for x in line.split()[1:]]
+                idle = v[3] + (v[4] if len(v) > 4 else 0)  # idle + iowait
+                total.append(sum(v[:8]))
+                busy.append(total[-1] - idle)
+        return (busy, total) if total else None
+    except (OSError, ValueError):
+        return None
+
+
+def swap_usage():
+    """(used_gb, total_gb) from vm.swapusage, or /proc/meminfo on Linux."""
+    xsw = sysctl("vm.swapusage", _XswUsage)
+    if xsw:
+        return xsw.used / 1024**3, xsw.total / 1024**3
+    try:
+        info = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                k, v = line.split(":", 1)
+                info[k] = int(v.split()[0]) * 1024
+        return (info["SwapTotal"] - info["SwapFree"]) / 1024**3, info["SwapTotal"] / 1024**3
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def boot_time():
+    """Boot time as a Unix timestamp (kern.boottime, or btime in /proc/stat)."""
+    tv = sysctl("kern.boottime", _Timeval)
+    if tv:
+        return tv.sec
+    try:
+        with open("/proc/stat") as f:
+            for line in f:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def load_avg():
+    try:
+        return list(os.getloadavg())
+    except OSError:
+        return None
+
+
+def disk_usage(path="/"):
+    """(total_gb, avail_gb) like `df -g` — whole gigabytes, avail as seen by non-root."""
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None
+    return st.f_blocks * st.f_frsize // 1024**3, st.f_bavail * st.f_frsize // 1024**3
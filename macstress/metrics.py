@@ -1,38 +1,91 @@
-"""MetricsCollector — system metrics gathering threads."""
+"""MetricsCollector — metric sources on a shared scheduler plus long-lived stream readers."""
 
 import os, re, time, subprocess, threading
-from collections import deque
+from . import libc
 from .system import compile_temp_sensor
+from .streams import TopStream, PowermetricsStream, SensorStream, parse_top_cpu
+from .scheduler import Scheduler, MetricSource, CHEAP, EXPENSIVE
+from .procs import ProcessSampler
+from .diskio import DiskRateSampler
+from .history import History
+from .telemetry import timed, sample_ok
+from . import drive
+
+
+class Snapshot(dict):
+    """Read-only dict published by the collector.
+
+    Writers build a new Snapshot off to the side and swap the reference in;
+    readers share the published object without locking or copying."""
+    __slots__ = ()
+
+    def _readonly(self, *a, **kw):
+        raise TypeError("Snapshot is read-only — copy it with dict(snapshot)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def _freeze(fields):
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in fields.items()}
 
 
 class MetricsCollector:
-    def __init__(self, sys_info):
+    # Adaptive sampling: interval multipliers per demand mode
+    RATE_SCALES = {"stress": 0.5, "viewing": 1.0, "idle": 4.0}
+    DEMAND_TIMEOUT = 10.0   # a poll counts as a viewer for this many seconds
+    SENSOR_INTERVALS_MS = {"stress": 250, "viewing": 1000, "idle": 4000}
+    TOP_INTERVALS_S = {"stress": 1, "viewing": 2, "idle": 8}
+    PM_INTERVALS_MS = {"stress": 1000, "viewing": 1000, "idle": 4000}
+    PM_RETRY_S, PM_RETRY_MAX_S = 2.0, 60.0  # powermetrics stream restart backoff
+    PM_MIN_MS = 250         # fastest -i a /ws client can ask powermetrics for
+    PM_RETUNE_S = 5.0       # at most one powermetrics restart per this many seconds
+    # Numeric data keys kept in the 1 s / 10 s / 60 s history tiers
+    HISTORY_FIELDS = ("cpu_usage", "cpu_temp", "gpu_temp", "mem_used_pct", "mem_used_gb", "swap_used_gb",
+                      "disk_read_mb", "disk_write_mb", "disk_read_iops", "disk_write_iops",
+                      "fan_rpm", "cpu_freq_ghz", "cpu_power_w", "gpu_power_w", "total_power_w",
+                      "p_cluster_usage", "e_cluster_usage")
+
+    def __init__(self, sys_info, adaptive=True, min_interval=0.5, max_interval=300.0, started_at=None,
+                 recorder=None):
         self.sys_info = sys_info
-        self.data = {
+        self.recorder = recorder    # optional on-disk Recorder fed alongside history
+        self._started_at = started_at or time.monotonic()  # for startup_ms
+        self.adaptive = adaptive
+        self._data = Snapshot({
             "cpu_usage": 0, "cpu_temp": None, "gpu_temp": None,
             "mem_used_pct": 0, "mem_used_gb": 0, "mem_total_gb": sys_info["ram_gb"],
             "swap_used_gb": 0, "swap_total_gb": 0,
-            "disk_read_mb": 0, "disk_write_mb": 0,
+            "disk_read_mb": 0, "disk_write_mb": 0, "disk_read_iops": 0, "disk_write_iops": 0,
             "fan_rpm": None, "cpu_freq_ghz": None,
             "cpu_power_w": None, "gpu_power_w": None, "total_power_w": None,
-            "per_core_usage": [], "timestamp": 0,
-        }
+            "per_core_usage": (), "p_cluster_usage": None, "e_cluster_usage": None,
+            "timestamp": 0,
+        })
         self._stop = threading.Event()
-        self._lock = threading.Lock()
-        self._history = deque(maxlen=120)
+        self._lock = threading.Lock()  # serializes writers only; readers never take it
+        self.history = History(self.HISTORY_FIELDS)
+        self._history_ts = 0.0     # timestamp of the newest sample in history
         self._pm_proc = None
-        self._ts_proc = None
+        self._pm_running = False    # one _powermetrics_loop at a time
+        self._sensors = None    # SensorStream (Apple Silicon temperature helper)
+        self._top = TopStream(interval=2)
+        self._pm_interval_ms = 1000
+        self._pm_retuned = 0.0      # monotonic time of the last -i change
+        self._core_ticks = None  # previous (busy, total) arrays for per-core deltas
+        self._procs = ProcessSampler()
+        self._disk = DiskRateSampler()
         # Extended detailed metrics for popover
-        self._details = {
-            "top_cpu": [],      # [{name, cpu_pct}]
-            "top_mem": [],      # [{name, mem_mb}]
+        self._details = Snapshot({
+            "top_cpu": (),      # [{name, cpu_pct}]
+            "top_mem": (),      # [{name, mem_mb}]
             "uptime_sec": 0,
             "disk_free_gb": 0,
             "disk_total_gb": 0,
             "cpu_sys_pct": 0,
             "cpu_user_pct": 0,
             "cpu_idle_pct": 0,
-            "load_avg": [0, 0, 0],
+            "load_avg": (0, 0, 0),
             "battery_pct": None,
             "battery_charging": False,
             "smart_status": None,
@@ -40,250 +93,344 @@ class MetricsCollector:
             "smart_capacity": None,
             "smart_trim": None,
             "smart_serial": None,
-        }
-        self._smart_counter = 0  # collect SMART every 6th cycle (30s)
+            "smart_refresh_ms": None,   # cost of the last SMART refresh
+            "smart_updated": None,      # wall-clock time of the last SMART refresh
+            "disk_devices": (),  # [{name, read_mb, write_mb, read_iops, write_iops}]
+            "sample_mode": "viewing",
+            "sample_interval_s": 2.0,
+            "startup_ms": None,         # process start -> first CPU snapshot
+            "sensor_build_ms": None,    # temperature helper build/cache lookup
+        })
+        self._clients = 0               # connected /events streams
+        self._stream_rates = {}         # /ws session -> requested Hz
+        self._last_demand = 0.0         # monotonic time of last API poll
+        self._stress_probe = None       # callable -> list of active stress tests
+        self.scheduler = Scheduler(min_interval=min_interval, max_interval=max_interval)
+        self._register_sources()
+
+    def _register_sources(self):
+        """Polled metric groups. Streams (top, sensors, powermetrics) run on their own readers."""
+        for name, fn, interval, cost, keys in [
+            ("cpu",           self._sample_cpu,           2.0,  CHEAP,     ("cpu_usage", "timestamp")),
+            ("memory",        self._sample_memory,        2.0,  CHEAP,     ("mem_used_pct", "mem_used_gb")),
+            ("swap",          self._sample_swap,          2.0,  CHEAP,     ("swap_used_gb", "swap_total_gb")),
+            ("per_core",      self._sample_per_core,      2.0,  CHEAP,     ("per_core_usage", "p_cluster_usage", "e_cluster_usage")),
+            ("disk_io",       self._sample_disk_io,       2.0,  CHEAP,     ("disk_read_mb", "disk_write_mb",
+                                                                           "disk_read_iops", "disk_write_iops")),
+            ("cpu_breakdown", self._sample_cpu_breakdown, 5.0,  CHEAP,     ("cpu_user_pct", "cpu_sys_pct", "cpu_idle_pct")),
+            ("uptime",        self._sample_uptime,        5.0,  CHEAP,     ("uptime_sec",)),
+            ("disk_space",    self._sample_disk_space,    5.0,  CHEAP,     ("disk_total_gb", "disk_free_gb")),
+            ("load",          self._sample_load,          5.0,  CHEAP,     ("load_avg",)),
+            ("battery",       self._sample_battery,       5.0,  CHEAP,     ("battery_pct", "battery_charging")),
+            ("top_procs",     self._sample_top_procs,     5.0,  EXPENSIVE, ("top_cpu", "top_mem")),
+            ("smart",         self._sample_smart,         600.0, EXPENSIVE, ("smart_status", "smart_model", "smart_capacity",
+                                                                            "smart_trim", "smart_serial", "smart_refresh_ms")),
+        ]:
+            self.scheduler.register(MetricSource(name, fn, interval, cost, keys))
+        self.scheduler.register(MetricSource("demand", self._update_rate, 1.0, CHEAP,
+                                             ("sample_mode", "sample_interval_s"), scalable=False))
 
     def start(self):
-        threading.Thread(target=self._collect_loop, daemon=True).start()
+        self._top.start()
+        self.scheduler.start()
+        if self.recorder:
+            threading.Thread(target=self._backfill_history, daemon=True).start()
         if self.sys_info["arch"] == "apple_silicon":
-            ts_bin = compile_temp_sensor()
-            if ts_bin:
-                threading.Thread(target=self._sensor_loop, args=(ts_bin,), daemon=True).start()
+            # Helper build (or cache lookup) runs off the startup path
+            threading.Thread(target=self._sensor_loop, daemon=True).start()
         threading.Thread(target=self._powermetrics_loop, daemon=True).start()
-        threading.Thread(target=self._detail_loop, daemon=True).start()
+
+    BACKFILL_SECONDS = 86400
+
+    def _backfill_history(self):
+        """Rebuild in-memory history from the recording after a restart.
+        Built off to the side, then swapped in with the samples taken meanwhile."""
+        h, last = History(self.HISTORY_FIELDS), None
+        try:
+            for ts, vals in self.recorder.read(start=time.time() - self.BACKFILL_SECONDS):
+                h.append_values(ts, vals)
+                last = ts
+            if last is None:
+                return
+            with self._lock:
+                # Only samples already in the old history; later ones append themselves
+                for ts, vals in self.recorder.read(start=last + 1e-6, end=self._history_ts):
+                    h.append_values(ts, vals)
+                self.history = h
+        except Exception as e:
+            print(f"  ⚠️  History backfill: {e}")
 
     def stop(self):
         self._stop.set()
-        for p in [self._pm_proc, self._ts_proc]:
+        self.scheduler.stop()
+        self._top.stop()
+        if self.recorder:
+            self.recorder.close()
+        for p in [self._pm_proc, self._sensors]:
             if p:
                 try: p.kill()
                 except Exception: pass
 
+    @property
+    def data(self):
+        return self._data
+
     def get_snapshot(self):
-        with self._lock:
-            return dict(self.data)
+        """Current metrics as a read-only Snapshot — consistent, shared, never copied."""
+        return self._data
 
     def get_details(self):
-        with self._lock:
-            return dict(self._details)
-
-    def _collect_loop(self):
-        cores = self.sys_info.get("cores", 1) or 1
-        while not self._stop.is_set():
-            try:
-                cpu_total = 0.0
-                try:
-                    # Primary: use top -l 1 (reliable on Apple Silicon .app bundles)
-                    top_raw = subprocess.getoutput(
-                        "top -l 1 -s 0 -n 0 2>/dev/null | grep 'CPU usage'"
-                    )
-                    if top_raw:
-                        user_m = re.search(r'([\d.]+)%\s*user', top_raw)
-                        sys_m = re.search(r'([\d.]+)%\s*sys', top_raw)
-                        if user_m and sys_m:
-                            cpu_total = round(float(user_m.group(1)) + float(sys_m.group(1)), 1)
-                    # Fallback: ps -A if top didn't work
-                    if cpu_total < 0.1:
-                        cpu_raw = subprocess.getoutput(
-                            "ps -A -o %cpu | awk 'NR>1{s+=$1} END {printf \"%.1f\", s}'"
-                        )
-                        cpu_total = min(round(float(cpu_raw.strip()) / cores, 1), 100.0)
-                except (ValueError, ZeroDivisionError):
-                    pass
-
-                vm = subprocess.getoutput("vm_stat")
-                ps = 16384 if self.sys_info["arch"] == "apple_silicon" else 4096
-                active = self._pvm(vm, "Pages active")
-                wired = self._pvm(vm, "Pages wired down")
-                compressed = self._pvm(vm, "Pages occupied by compressor")
-                used_bytes = (active + wired + compressed) * ps
-                used_gb = used_bytes / (1024**3)
-                mem_pct = (used_gb / self.sys_info["ram_gb"]) * 100 if self.sys_info["ram_gb"] > 0 else 0
-
-                swap_used, swap_total = 0.0, 0.0
-                try:
-                    sw = subprocess.getoutput("sysctl vm.swapusage")
-                    m_total = re.search(r'total\s*=\s*([\d.]+)M', sw)
-                    m_used = re.search(r'used\s*=\s*([\d.]+)M', sw)
-                    if m_total: swap_total = float(m_total.group(1)) / 1024
-                    if m_used: swap_used = float(m_used.group(1)) / 1024
-                except Exception: pass
-
-                disk_r = disk_w = 0.0
-                try:
-                    io = subprocess.getoutput("iostat -d -c 2 2>/dev/null | tail -1").split()
-                    if len(io) >= 3:
-                        disk_r, disk_w = float(io[1]) / 1024, float(io[2]) / 1024
-                except Exception: pass
-
-                with self._lock:
-                    self.data.update({
-                        "cpu_usage": min(cpu_total, 100.0),
-                        "mem_used_pct": round(mem_pct, 1),
-                        "mem_used_gb": round(used_gb, 1), "swap_used_gb": round(swap_used, 2),
-                        "swap_total_gb": round(swap_total, 2),
-                        "disk_read_mb": round(disk_r, 2), "disk_write_mb": round(disk_w, 2),
-                        "timestamp": time.time(),
-                    })
-                    self._history.append(dict(self.data))
-            except Exception: pass
-            self._stop.wait(2.0)
-
-    def _detail_loop(self):
-        """Collect extended metrics for popover (runs every 5s)."""
-        cores = self.sys_info.get("cores", 1) or 1
-        while not self._stop.is_set():
-            try:
-                # Top CPU processes (normalized per core)
-                try:
-                    raw = subprocess.getoutput("ps -eo pcpu,comm -r | head -8 | tail -7")
-                    top_cpu = []
-                    for line in raw.strip().split("\n"):
-                        parts = line.strip().split(None, 1)
-                        if len(parts) == 2:
-                            try:
-                                pct = float(parts[0])
-                                name = parts[1].split("/")[-1][:25]
-                                if pct > 0.1:
-                                    # Normalize per-core % to system-wide %
-                                    norm_pct = round(pct / cores * 100, 1) / 100 * cores
-                                    # Show as fraction of total CPU capacity
-                                    display_pct = round(pct / cores, 1)
-                                    top_cpu.append({"name": name, "cpu_pct": display_pct})
-                            except ValueError: pass
-                    with self._lock:
-                        self._details["top_cpu"] = top_cpu[:7]
-                except Exception: pass
-
-                # Top Memory processes
-                try:
-                    raw = subprocess.getoutput("ps -eo rss,comm -m | head -8 | tail -7")
-                    top_mem = []
-                    for line in raw.strip().split("\n"):
-                        parts = line.strip().split(None, 1)
-                        if len(parts) == 2:
-                            try:
-                                rss_kb = int(parts[0])
-                                name = parts[1].split("/")[-1][:25]
-                                mb = round(rss_kb / 1024, 1)
-                                if mb > 10:
-                                    top_mem.append({"name": name, "mem_mb": mb})
-                            except ValueError: pass
-                    with self._lock:
-                        self._details["top_mem"] = top_mem[:7]
-                except Exception: pass
+        return self._details
 
-                # Uptime
-                try:
-                    raw = subprocess.getoutput("sysctl -n kern.boottime")
-                    m = re.search(r'sec\s*=\s*(\d+)', raw)
-                    if m:
-                        boot_sec = int(m.group(1))
-                        with self._lock:
-                            self._details["uptime_sec"] = int(time.time() - boot_sec)
-                except Exception: pass
+    # ── Adaptive sampling ──
 
-                # Disk free space
-                try:
-                    raw = subprocess.getoutput("df -g / | tail -1")
-                    parts = raw.split()
-                    if len(parts) >= 4:
-                        total = int(parts[1])
-                        avail = int(parts[3])
-                        with self._lock:
-                            self._details["disk_total_gb"] = total
-                            self._details["disk_free_gb"] = avail
-                except Exception: pass
+    def set_stress_probe(self, probe):
+        """`probe()` returns the active stress tests (StressManager.get_active)."""
+        self._stress_probe = probe
 
-                # CPU breakdown (sys/user/idle)
-                try:
-                    raw = subprocess.getoutput("top -l 1 -s 0 -n 0 2>/dev/null | grep 'CPU usage'")
-                    if raw:
-                        user_m = re.search(r'([\d.]+)%\s*user', raw)
-                        sys_m = re.search(r'([\d.]+)%\s*sys', raw)
-                        idle_m = re.search(r'([\d.]+)%\s*idle', raw)
-                        with self._lock:
-                            if user_m: self._details["cpu_user_pct"] = float(user_m.group(1))
-                            if sys_m: self._details["cpu_sys_pct"] = float(sys_m.group(1))
-                            if idle_m: self._details["cpu_idle_pct"] = float(idle_m.group(1))
-                except Exception: pass
+    def client_connected(self):
+        with self._lock: self._clients += 1
+        self.scheduler.run_now("demand")
 
-                # Load average
-                try:
-                    raw = subprocess.getoutput("sysctl -n vm.loadavg")
-                    parts = raw.strip("{ }").split()
-                    if len(parts) >= 3:
-                        with self._lock:
-                            self._details["load_avg"] = [float(parts[0]), float(parts[1]), float(parts[2])]
-                except Exception: pass
+    def client_disconnected(self):
+        with self._lock: self._clients = max(0, self._clients - 1)
 
-                # Battery
-                try:
-                    raw = subprocess.getoutput("pmset -g batt")
-                    pct_m = re.search(r'(\d+)%', raw)
-                    if pct_m:
-                        with self._lock:
-                            self._details["battery_pct"] = int(pct_m.group(1))
-                            self._details["battery_charging"] = "charging" in raw.lower() and "not charging" not in raw.lower()
-                except Exception: pass
+    def stream_rate(self, key, hz=None):
+        """A /ws client wants samples at `hz` (None when it leaves). Above 1 Hz the
+        powermetrics and sensor streams follow the fastest client."""
+        with self._lock:
+            if hz: self._stream_rates[key] = hz
+            else: self._stream_rates.pop(key, None)
+        self.scheduler.run_now("demand")
+
+    def note_demand(self):
+        """Called on every API poll — a polling UI counts as a viewer."""
+        idle = self.scheduler.scale == self.RATE_SCALES["idle"]
+        self._last_demand = time.monotonic()
+        if idle:
+            self.scheduler.run_now("demand")
+
+    def sample_mode(self):
+        if self._stress_probe and self._stress_probe():
+            return "stress"
+        if self._clients or time.monotonic() - self._last_demand < self.DEMAND_TIMEOUT:
+            return "viewing"
+        return "idle"
+
+    def _update_rate(self):
+        mode = self.sample_mode() if self.adaptive else "viewing"
+        self.scheduler.set_scale(self.RATE_SCALES[mode])
+        sensor_ms, pm_ms = self.SENSOR_INTERVALS_MS[mode], self.PM_INTERVALS_MS[mode]
+        with self._lock:
+            hz = max(self._stream_rates.values(), default=0)
+        if hz > 1:
+            sensor_ms, pm_ms = min(sensor_ms, int(1000 / hz)), min(pm_ms, max(self.PM_MIN_MS, int(1000 / hz)))
+        if self._sensors:
+            self._sensors.set_interval(sensor_ms)
+        # The streams are the most expensive collectors — idle must slow them too
+        self._top.set_interval(self.TOP_INTERVALS_S[mode])
+        self._set_pm_interval(pm_ms)
+        self._set_details(sample_mode=mode,
+                          sample_interval_s=round(self.scheduler.interval_for(self.scheduler.sources["cpu"]), 2))
+
+    def _set_pm_interval(self, ms):
+        """powermetrics cannot be retuned in place: stop the stream and let the loop
+        restart it with the new -i. Restarts are spaced PM_RETUNE_S apart; a change
+        made sooner is picked up by a later demand tick."""
+        if ms == self._pm_interval_ms:
+            return
+        now = time.monotonic()
+        if self._pm_proc and now - self._pm_retuned < self.PM_RETUNE_S:
+            return
+        self._pm_interval_ms, self._pm_retuned = ms, now
+        if self._pm_proc:
+            self._pm_proc.kill()
+
+    def _set(self, **fields):
+        with self._lock:
+            self._data = Snapshot(self._data, **_freeze(fields))
+            return self._data
 
-                # SMART data (every 30s — 6th cycle)
-                self._smart_counter += 1
-                if self._smart_counter >= 6:
-                    self._smart_counter = 0
-                    try:
-                        raw = subprocess.getoutput("system_profiler SPNVMeDataType 2>/dev/null")
-                        if raw:
-                            model_m = re.search(r'Model:\s*(.+)', raw)
-                            cap_m = re.search(r'Capacity:\s*(.+?)\s*\(', raw)
-                            smart_m = re.search(r'S\.M\.A\.R\.T\.\s*status:\s*(\S+)', raw, re.IGNORECASE)
-                            trim_m = re.search(r'TRIM\s+Support:\s*(\S+)', raw)
-                            serial_m = re.search(r'Serial\s+Number:\s*(\S+)', raw)
-                            with self._lock:
-                                if model_m: self._details["smart_model"] = model_m.group(1).strip()
-                                if cap_m: self._details["smart_capacity"] = cap_m.group(1).strip()
-                                if smart_m: self._details["smart_status"] = smart_m.group(1).strip()
-                                if trim_m: self._details["smart_trim"] = trim_m.group(1).strip()
-                                if serial_m: self._details["smart_serial"] = serial_m.group(1).strip()
-                    except Exception: pass
+    def _set_details(self, **fields):
+        with self._lock:
+            self._details = Snapshot(self._details, **_freeze(fields))
 
-            except Exception: pass
-            self._stop.wait(5.0)
+    # ── Fast sources (2s) ──
 
-    def _sensor_loop(self, binary):
+    def _sample_cpu(self):
+        cores = self.sys_info.get("cores", 1) or 1
+        cpu_total = 0.0
         try:
-            self._ts_proc = subprocess.Popen(
-                [binary], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-            buf = []
-            for line in self._ts_proc.stdout:
-                if self._stop.is_set(): break
-                line = line.strip()
-                if line == "---":
-                    self._parse_sensors(buf); buf = []
-                else:
-                    buf.append(line)
+            # Primary: persistent top stream (reliable on Apple Silicon .app bundles)
+            top = self._top.fresh() or self._top_once()
+            if top:
+                cpu_total = round(top["user"] + top["sys"], 1)
+            # Fallback: ps -A if top didn't work
+            if cpu_total < 0.1:
+                with timed("ps"):
+                    cpu_raw = subprocess.getoutput(
+                        "ps -A -o %cpu | awk 'NR>1{s+=$1} END {printf \"%.1f\", s}'"
+                    )
+                cpu_total = min(round(float(cpu_raw.strip()) / cores, 1), 100.0)
+        except (ValueError, ZeroDivisionError):
+            pass
+        snap = self._set(cpu_usage=min(cpu_total, 100.0), timestamp=time.time())
+        if self.recorder:  # disk writes and rotation stay outside the collector lock
+            try: self.recorder.append(snap["timestamp"], snap)
+            except Exception: pass
+        with self._lock:  # ordered with the history swap in _backfill_history
+            self.history.append(snap["timestamp"], snap)
+            self._history_ts = snap["timestamp"]
+        if self._details["startup_ms"] is None:
+            ms = round((time.monotonic() - self._started_at) * 1000)
+            self._set_details(startup_ms=ms)
+            print(f"  ⏱  First snapshot {ms} ms after start")
+
+    def _sample_memory(self):
+        pages = libc.vm_pages()
+        if pages:
+            ps = pages["page_size"]
+        else:
+            with timed("vm_stat"):
+                raw = subprocess.getoutput("vm_stat")
+            pages = self._parse_vm_stat(raw)
+            ps = 16384 if self.sys_info["arch"] == "apple_silicon" else 4096
+        used_bytes = (pages["active"] + pages["wired"] + pages["compressed"]) * ps
+        used_gb = used_bytes / (1024**3)
+        mem_pct = (used_gb / self.sys_info["ram_gb"]) * 100 if self.sys_info["ram_gb"] > 0 else 0
+        self._set(mem_used_pct=round(mem_pct, 1), mem_used_gb=round(used_gb, 1))
+
+    def _sample_swap(self):
+        swap = libc.swap_usage()
+        swap_used, swap_total = swap if swap else self._swap_from_sysctl()
+        self._set(swap_used_gb=round(swap_used, 2), swap_total_gb=round(swap_total, 2))
+
+    def _sample_per_core(self):
+        ticks = libc.cpu_ticks()
+        if not ticks:
+            return
+        prev, self._core_ticks = self._core_ticks, ticks
+        if not prev or len(prev[1]) != len(ticks[1]):
+            return
+        usage = [round(100.0 * (b - pb) / (t - pt), 1) if t > pt else 0.0
+                 for b, pb, t, pt in zip(ticks[0], prev[0], ticks[1], prev[1])]
+        # Apple Silicon numbers the efficiency cluster first (cpu0..E-1)
+        eff = self.sys_info.get("eff_cores", 0) or 0
+        e, p = usage[:eff], usage[eff:]
+        self._set(per_core_usage=usage,
+                  p_cluster_usage=round(sum(p) / len(p), 1) if p else None,
+                  e_cluster_usage=round(sum(e) / len(e), 1) if e else None)
+
+    def _sample_disk_io(self):
+        with timed("disk_counters"):
+            rates = self._disk.sample()
+        if rates is None:
+            # No cumulative counters — fall back to a blocking one-second iostat
+            with timed("iostat"):
+                io = subprocess.getoutput("iostat -d -c 2 2>/dev/null | tail -1").split()
+            if len(io) >= 3:
+                self._set(disk_read_mb=round(float(io[1]) / 1024, 2), disk_write_mb=round(float(io[2]) / 1024, 2))
+            return
+        if not rates:
+            return
+        tot = {k: sum(r[k] for r in rates.values()) for k in ("read_mb", "write_mb", "read_iops", "write_iops")}
+        self._set(disk_read_mb=round(tot["read_mb"], 2), disk_write_mb=round(tot["write_mb"], 2),
+                  disk_read_iops=round(tot["read_iops"]), disk_write_iops=round(tot["write_iops"]))
+        self._set_details(disk_devices=[dict({k: round(v, 2) for k, v in r.items()}, name=dev)
+                                        for dev, r in sorted(rates.items())])
+
+    # ── Detail sources (5s+) for the popover ──
+
+    def _sample_top_procs(self):
+        cores = self.sys_info.get("cores", 1) or 1
+        with timed("procs"):
+            by_cpu, by_mem = self._procs.sample(7)
+        # CPU shown as fraction of total CPU capacity
+        top_cpu = [{"name": name[:25], "cpu_pct": round(pct / cores, 1)}
+                   for pct, _, name in by_cpu if pct > 0.1]
+        top_mem = [{"name": name[:25], "mem_mb": round(rss / 1024**2, 1)}
+                   for rss, _, name in by_mem if rss > 10 * 1024**2]
+        self._set_details(top_cpu=top_cpu, top_mem=top_mem)
+
+    def _sample_uptime(self):
+        boot_sec = libc.boot_time()
+        if boot_sec is None:
+            m = re.search(r'sec\s*=\s*(\d+)', subprocess.getoutput("sysctl -n kern.boottime"))
+            boot_sec = int(m.group(1)) if m else None
+        if boot_sec:
+            self._set_details(uptime_sec=int(time.time() - boot_sec))
+
+    def _sample_disk_space(self):
+        usage = libc.disk_usage("/")
+        if usage is None:
+            parts = subprocess.getoutput("df -g / | tail -1").split()
+            usage = (int(parts[1]), int(parts[3])) if len(parts) >= 4 else None
+        if usage:
+            self._set_details(disk_total_gb=usage[0], disk_free_gb=usage[1])
+
+    def _sample_cpu_breakdown(self):
+        # Shared with _sample_cpu via the top stream
+        top = self._top.fresh() or self._top_once()
+        if top:
+            self._set_details(cpu_user_pct=top["user"], cpu_sys_pct=top["sys"], cpu_idle_pct=top["idle"])
+
+    def _sample_load(self):
+        load = libc.load_avg()
+        if load is None:
+            parts = subprocess.getoutput("sysctl -n vm.loadavg").strip("{ }").split()
+            load = [float(p) for p in parts[:3]] if len(parts) >= 3 else None
+        if load:
+            self._set_details(load_avg=[round(v, 2) for v in load])
+
+    def _sample_battery(self):
+        raw = subprocess.getoutput("pmset -g batt")
+        pct_m = re.search(r'(\d+)%', raw)
+        if pct_m:
+            self._set_details(battery_pct=int(pct_m.group(1)),
+                              battery_charging="charging" in raw.lower() and "not charging" not in raw.lower())
+
+    def refresh_smart(self):
+        """On-demand SMART health refresh (API) — runs on the expensive worker, not the caller."""
+        self.scheduler.run_now("smart")
+
+    def _sample_smart(self):
+        t0 = time.monotonic()
+        # Identity is static: once per process, from the per-boot disk cache when possible
+        fields = {} if self._details["smart_model"] else drive.identity()
+        status = drive.health()
+        if status:
+            fields["smart_status"] = status
+        self._set_details(smart_refresh_ms=round((time.monotonic() - t0) * 1000, 1),
+                          smart_updated=time.time(), **fields)
+
+    def _sensor_loop(self):
+        t0 = time.monotonic()
+        binary = compile_temp_sensor()
+        self._set_details(sensor_build_ms=round((time.monotonic() - t0) * 1000))
+        if not binary or self._stop.is_set():
+            return
+        mode = self._details["sample_mode"]
+        self._sensors = SensorStream(binary, self.SENSOR_INTERVALS_MS.get(mode, 1000), self._apply_sensors)
+        try: self._sensors.run()
         except Exception: pass
 
-    def _parse_sensors(self, lines):
-        cpu_t, gpu_t = [], []
-        for l in lines:
-            if ':' not in l: continue
-            name_val = l.rsplit(':', 1)
-            if len(name_val) != 2: continue
-            name = name_val[0].strip().lower()
-            try: v = float(name_val[1].strip())
-            except ValueError: continue
-            if v < 1 or v > 130: continue
-            if 'tdie' in name: cpu_t.append(v)
-            elif name.endswith('g') and name.startswith('pmu tp'): gpu_t.append(v)
-            elif name.endswith('s') and name.startswith('pmu tp'): cpu_t.append(v)
+    def _apply_sensors(self, fields):
+        self._set(**{k: round(v, 1) for k, v in fields.items()})
+        sample_ok("sensors")
 
+    def _powermetrics_loop(self):
+        """Runs at most once at a time. /api/request_sudo may call it again with a new
+        password in _sudo_pw; a loop already running picks that up on its next restart."""
         with self._lock:
-            if cpu_t: self.data["cpu_temp"] = round(max(cpu_t), 1)
-            if gpu_t: self.data["gpu_temp"] = round(max(gpu_t), 1)
+            if self._pm_running:
+                return
+            self._pm_running = True
+        try:
+            self._powermetrics_session()
+        finally:
+            self._pm_running = False
 
-    def _powermetrics_loop(self):
+    def _powermetrics_session(self):
         samplers = "smc,cpu_power,gpu_power" if self.sys_info["arch"] == "intel" else "cpu_power,gpu_power"
         pm_cmd = f"powermetrics --samplers {samplers} -i 1000 -n 1"
 
@@ -308,12 +455,39 @@ class MetricsCollector:
                 print(f"  ❌ powermetrics via osascript failed: {r.stderr.strip()}")
             return None
 
-        pw = getattr(self, '_sudo_pw', None)
-        self._sudo_pw = None
+        pw = None
+        # Preferred: one long-lived plist stream; one-shot text runs remain the fallback.
+        # The password is kept for restarts: a long-lived stream never refreshes
+        # sudo's credential timestamp, so `sudo -n` can fail once it has expired.
+        streamed, backoff = False, self.PM_RETRY_S
+        while not self._stop.is_set():
+            pw, self._sudo_pw = getattr(self, "_sudo_pw", None) or pw, None
+            pm = PowermetricsStream(samplers, self._pm_interval_ms, self._apply_pm)
+            self._pm_proc = pm
+            try:
+                n = pm.run(pw)
+            except Exception as e:
+                print(f"  ⚠️  powermetrics stream: {e}")
+                n = 0
+            if pm.interval_ms != self._pm_interval_ms and not self._stop.is_set():
+                continue    # stopped by _set_pm_interval
+            if n:
+                streamed, wait, backoff = True, self.PM_RETRY_S, self.PM_RETRY_S
+            elif not streamed:
+                break
+            else:
+                if backoff == self.PM_RETRY_S:
+                    print("  ⚠️  powermetrics stream stopped — retrying with backoff")
+                wait, backoff = backoff, min(backoff * 2, self.PM_RETRY_MAX_S)
+            self._stop.wait(wait)
+        if streamed:
+            return
 
         while not self._stop.is_set():
+            pw, self._sudo_pw = getattr(self, "_sudo_pw", None) or pw, None
             try:
-                out = _run_once_as_root(pw)
+                with timed("powermetrics"):
+                    out = _run_once_as_root(pw)
                 if out:
                     self._parse_pm(out)
                     pw = None
@@ -322,9 +496,14 @@ class MetricsCollector:
                         break
             except Exception as e:
                 print(f"  ⚠️  powermetrics: {e}")
-            self._stop.wait(2.0)
+            self._stop.wait(max(2.0, self._pm_interval_ms / 1000))
 
     def _parse_pm(self, block):
+        with timed("parse_powermetrics"):
+            fields = self._parse_pm_text(block)
+        self._apply_pm(fields)
+
+    def _parse_pm_text(self, block):
         ct = gt = fan = cpu_pw = gpu_pw = None
         freqs = []  # collect all cluster frequencies, take max
         for l in block.split("\n"):
@@ -359,20 +538,50 @@ class MetricsCollector:
                     ghz = v / 1000 if v > 100 else v
                     freqs.append(ghz)
                 except: pass
-        freq = max(freqs) if freqs else None
-        with self._lock:
-            if ct is not None: self.data["cpu_temp"] = round(ct, 1)
-            if gt is not None: self.data["gpu_temp"] = round(gt, 1)
-            if fan is not None: self.data["fan_rpm"] = fan
-            if cpu_pw is not None: self.data["cpu_power_w"] = round(cpu_pw, 1)
-            if gpu_pw is not None: self.data["gpu_power_w"] = round(gpu_pw, 1)
-            if cpu_pw is not None:
-                self.data["total_power_w"] = round((cpu_pw or 0) + (gpu_pw or 0), 1)
-            if freq is not None: self.data["cpu_freq_ghz"] = round(freq, 2)
-
-    def _pvm(self, text, key):
-        for l in text.split("\n"):
-            if key in l:
-                try: return int(l.split(":")[-1].strip().rstrip('.'))
-                except: pass
-        return 0
+        fields = {"cpu_temp": ct, "gpu_temp": gt, "fan_rpm": fan,
+                  "cpu_power_w": cpu_pw, "gpu_power_w": gpu_pw,
+                  "cpu_freq_ghz": max(freqs) if freqs else None}
+        if cpu_pw is not None:
+            fields["total_power_w"] = (cpu_pw or 0) + (gpu_pw or 0)
+        return {k: v for k, v in fields.items() if v is not None}
+
+    def _apply_pm(self, fields):
+        """Store one powermetrics sample (from the plist stream or the text parser)."""
+        out = {}
+        for k, v in fields.items():
+            if k == "fan_rpm": out[k] = int(v)
+            elif k == "cpu_freq_ghz": out[k] = round(v, 2)
+            else: out[k] = round(v, 1)
+        self._set(**out)
+        sample_ok("powermetrics")
+
+    def _top_once(self):
+        """One-shot `top -l 1` fallback while the stream is starting or has died."""
+        with timed("top"):
+            raw = subprocess.getoutput("top -l 1 -s 0 -n 0 2>/dev/null | grep 'CPU usage'")
+        return parse_top_cpu(raw.strip()) if raw else None
+
+    _VM_STAT_KEYS = {"Pages active": "active", "Pages wired down": "wired",
+                     "Pages occupied by compressor": "compressed", "Pages free": "free"}
+
+    def _parse_vm_stat(self, text):
+        """Single pass over `vm_stat` output (fallback when host_statistics64 is unavailable)."""
+        pages = dict.fromkeys(self._VM_STAT_KEYS.values(), 0)
+        with timed("parse_vm_stat"):
+            for l in text.split("\n"):
+                key, _, val = l.partition(":")
+                if key in self._VM_STAT_KEYS:
+                    try: pages[self._VM_STAT_KEYS[key]] = int(val.strip().rstrip('.'))
+                    except ValueError: pass
+        return pages
+
+    def _swap_from_sysctl(self):
+        swap_used, swap_total = 0.0, 0.0
+        try:
+            sw = subprocess.getoutput("sysctl vm.swapusage")
+            m_total = re.search(r'total\s*=\s*([\d.]+)M', sw)
+            m_used = re.search(r'used\s*=\s*([\d.]+)M', sw)
+            if m_total: swap_total = float(m_total.group(1)) / 1024
+            if m_used: swap_used = float(m_used.group(1)) / 1024
+        except Exception: pass
+        return swap_used, swap_total
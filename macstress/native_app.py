@@ -80,6 +80,7 @@ def run_native_app(port, mc, sm):
             # ── Popover ──
             self._popover = NSPopover.alloc().init()
             self._popover.setBehavior_(1)  # NSPopoverBehaviorTransient
+            self._popover.setDelegate_(self)
 
             # Popover content: WKWebView
             popover_rect = NSMakeRect(0, 0, 320, 520)
@@ -102,9 +103,7 @@ def run_native_app(port, mc, sm):
             vc.setView_(self._popover_webview)
             self._popover.setContentSize_(NSSize(320, 520))
             self._popover.setContentViewController_(vc)
-
-            req = NSURLRequest.requestWithURL_(NSURL.URLWithString_(popover_url))
-            self._popover_webview.loadRequest_(req)
+            # The page is loaded by togglePopover_ on open — a hidden popover must not stream /events
 
             # ── Left-click: toggle popover (use string selector) ──
             button = self._status_item.button()
@@ -191,6 +190,10 @@ def run_native_app(port, mc, sm):
                         button.bounds(), button, NSMinYEdge
                     )
 
+        def popoverDidClose_(self, notification):
+            """Closed popovers keep their WKWebView alive — stop its /events stream."""
+            self._popover_webview.evaluateJavaScript_completionHandler_("pause()", None)
+
         def checkUpdate_(self, sender):
             result = check_for_updates(silent=True)
             has_update = False
@@ -218,6 +218,7 @@ body{font-family:-apple-system,BlinkMacSystemFont,'SF Pro Display','SF Pro Text'
     <div class="metric-row"><span class="metric-label">SMART</span><span class="metric-value" id="pop-smart-status">—</span></div>
     <div class="metric-row"><span class="metric-label">Model</span><span class="metric-value" id="pop-smart-model" style="font-size:10px">—</span></div>
     <div class="metric-row"><span class="metric-label">TRIM</span><span class="metric-value" id="pop-smart-trim">—</span></div>
+    <div class="metric-row"><span class="metric-label">Checked</span><span class="metric-value" id="pop-smart-checked" style="cursor:pointer" onclick="refreshSmart()" title="Refresh now">—</span></div>
   </div>
 </div>
 
@@ -342,6 +343,10 @@ function requestSudo(){
   }).catch(()=>showToast('⚠ Failed to request sudo'));
 }
 
+function refreshSmart(){
+  fetch('/api/refresh_smart',{method:'POST'}).then(()=>showToast('↻ Checking drive health...')).catch(()=>{});
+}
+
 let _confirmCb=null;
 function showConfirm(msg,sub,cb){
   $('confirmMsg').textContent=msg;
@@ -386,97 +391,126 @@ function procHtml(procs,valKey,valSuffix,color,maxVal){
   }).join('');
 }
 
-function update(){
-  fetch('/api/status').then(r=>r.json()).then(d=>{
-    let m=d.metrics||{};
-    // CPU
-    $('pop-cpu-pct').textContent=fv(m.cpu_usage,'%');
-    $('pop-cpu-temp').textContent=m.cpu_temp!=null?Math.round(m.cpu_temp)+'°':'—';
-    $('pop-cpu-freq').textContent=m.cpu_freq_ghz!=null?m.cpu_freq_ghz.toFixed(2)+' GHz':'—';
-    cpuHist.push(m.cpu_usage||0);if(cpuHist.length>MAX_H)cpuHist.shift();
-    sparkline('pop-cpu-spark',cpuHist,'#ff6b6b',100);
-
-    // RAM — used/total combo
-    let usedGB=m.mem_used_gb!=null?m.mem_used_gb.toFixed(1):'?';
-    let totalGB=m.mem_total_gb||'?';
-    $('pop-ram-combo').textContent=usedGB+' / '+totalGB;
-    $('pop-ram-pct').textContent=fv(m.mem_used_pct,'%');
-    $('pop-ram-swap').textContent=fv(m.swap_used_gb,' GB');
-    // Memory pressure estimate
-    let pct=m.mem_used_pct||0;
-    let pressure=pct>90?'Critical':pct>75?'High':pct>50?'Moderate':'Normal';
-    let pColor=pct>90?'var(--red)':pct>75?'var(--orange)':pct>50?'#ccc':'var(--green)';
-    $('pop-ram-pressure').textContent=pressure;
-    $('pop-ram-pressure').style.color=pColor;
-    ramHist.push(pct);if(ramHist.length>MAX_H)ramHist.shift();
-    sparkline('pop-ram-spark',ramHist,'#48dbfb',100);
-
-    // Disk
-    $('pop-disk-read').textContent=fv(m.disk_read_mb,'');
-    $('pop-disk-write').textContent=fv(m.disk_write_mb,'');
-    diskHist.push((m.disk_read_mb||0)+(m.disk_write_mb||0));if(diskHist.length>MAX_H)diskHist.shift();
-    sparkline('pop-disk-spark',diskHist,'#a29bfe',Math.max(...diskHist,0.1));
-
-    // Power
-    let hasPower=m.cpu_power_w!=null||m.gpu_power_w!=null||m.total_power_w!=null;
-    $('pop-pwr-cpu').textContent=fv(m.cpu_power_w,'');
-    $('pop-pwr-gpu').textContent=fv(m.gpu_power_w,'');
-    $('pop-pwr-total').textContent=fv(m.total_power_w,'');
-    $('pop-pwr-fan').textContent=m.fan_rpm!=null?m.fan_rpm+' RPM':'—';
-    // Show/hide auth prompt
-    if(!hasPower){noPowerCount++;} else {noPowerCount=0;}
-    if(noPowerCount>=3){
-      $('pwr-auth').style.display='block';
-    } else if(hasPower){
-      $('pwr-auth').style.display='none';
-    }
-  }).catch(()=>{});
-
-  // Details endpoint
-  fetch('/api/details').then(r=>r.json()).then(d=>{
-    // CPU breakdown
-    $('pop-cpu-user').textContent=fv(d.cpu_user_pct,'%');
-    $('pop-cpu-sys').textContent=fv(d.cpu_sys_pct,'%');
-    $('pop-cpu-idle').textContent=fv(d.cpu_idle_pct,'%');
-    let la=d.load_avg||[0,0,0];
-    $('pop-load-avg').textContent=la.map(v=>v.toFixed(1)).join(' · ');
-
-    // Top processes with bars
-    $('pop-cpu-procs').innerHTML=procHtml(d.top_cpu,'cpu_pct','%','var(--red)',100);
-    $('pop-ram-procs').innerHTML=procHtml(d.top_mem,'mem_mb',' MB','var(--cyan)');
-
-    // Disk storage
-    let free=d.disk_free_gb||0, total=d.disk_total_gb||0, used=total-free;
-    $('pop-disk-free').textContent=free+' GB';
-    $('pop-disk-total').textContent=total+' GB';
-    $('pop-disk-used').textContent=(used>0?used:0)+' GB';
-    if(total>0){
-      $('pop-disk-bar').style.width=(used/total*100).toFixed(0)+'%';
-    }
+function renderMetrics(m){
+  // CPU
+  $('pop-cpu-pct').textContent=fv(m.cpu_usage,'%');
+  $('pop-cpu-temp').textContent=m.cpu_temp!=null?Math.round(m.cpu_temp)+'°':'—';
+  $('pop-cpu-freq').textContent=m.cpu_freq_ghz!=null?m.cpu_freq_ghz.toFixed(2)+' GHz':'—';
+  cpuHist.push(m.cpu_usage||0);if(cpuHist.length>MAX_H)cpuHist.shift();
+  sparkline('pop-cpu-spark',cpuHist,'#ff6b6b',100);
+
+  // RAM — used/total combo
+  let usedGB=m.mem_used_gb!=null?m.mem_used_gb.toFixed(1):'?';
+  let totalGB=m.mem_total_gb||'?';
+  $('pop-ram-combo').textContent=usedGB+' / '+totalGB;
+  $('pop-ram-pct').textContent=fv(m.mem_used_pct,'%');
+  $('pop-ram-swap').textContent=fv(m.swap_used_gb,' GB');
+  // Memory pressure estimate
+  let pct=m.mem_used_pct||0;
+  let pressure=pct>90?'Critical':pct>75?'High':pct>50?'Moderate':'Normal';
+  let pColor=pct>90?'var(--red)':pct>75?'var(--orange)':pct>50?'#ccc':'var(--green)';
+  $('pop-ram-pressure').textContent=pressure;
+  $('pop-ram-pressure').style.color=pColor;
+  ramHist.push(pct);if(ramHist.length>MAX_H)ramHist.shift();
+  sparkline('pop-ram-spark',ramHist,'#48dbfb',100);
+
+  // Disk
+  $('pop-disk-read').textContent=fv(m.disk_read_mb,'');
+  $('pop-disk-write').textContent=fv(m.disk_write_mb,'');
+  diskHist.push((m.disk_read_mb||0)+(m.disk_write_mb||0));if(diskHist.length>MAX_H)diskHist.shift();
+  sparkline('pop-disk-spark',diskHist,'#a29bfe',Math.max(...diskHist,0.1));
+
+  // Power
+  let hasPower=m.cpu_power_w!=null||m.gpu_power_w!=null||m.total_power_w!=null;
+  $('pop-pwr-cpu').textContent=fv(m.cpu_power_w,'');
+  $('pop-pwr-gpu').textContent=fv(m.gpu_power_w,'');
+  $('pop-pwr-total').textContent=fv(m.total_power_w,'');
+  $('pop-pwr-fan').textContent=m.fan_rpm!=null?m.fan_rpm+' RPM':'—';
+  // Show/hide auth prompt
+  if(!hasPower){noPowerCount++;} else {noPowerCount=0;}
+  if(noPowerCount>=3){
+    $('pwr-auth').style.display='block';
+  } else if(hasPower){
+    $('pwr-auth').style.display='none';
+  }
+}
 
-    // SMART data
-    if(d.smart_status){
-      $('smart-section').style.display='block';
-      let isOk=d.smart_status.toLowerCase()==='verified';
-      $('pop-smart-status').innerHTML=isOk?
-        '<span class="smart-badge smart-ok">✓ Verified</span>':
-        '<span class="smart-badge smart-warn">⚠ '+d.smart_status+'</span>';
-      $('pop-smart-model').textContent=d.smart_model||'—';
-      $('pop-smart-trim').textContent=d.smart_trim||'—';
-    }
+function renderDetails(d){
+  // CPU breakdown
+  $('pop-cpu-user').textContent=fv(d.cpu_user_pct,'%');
+  $('pop-cpu-sys').textContent=fv(d.cpu_sys_pct,'%');
+  $('pop-cpu-idle').textContent=fv(d.cpu_idle_pct,'%');
+  let la=d.load_avg||[0,0,0];
+  $('pop-load-avg').textContent=la.map(v=>v.toFixed(1)).join(' · ');
+
+  // Top processes with bars
+  $('pop-cpu-procs').innerHTML=procHtml(d.top_cpu,'cpu_pct','%','var(--red)',100);
+  $('pop-ram-procs').innerHTML=procHtml(d.top_mem,'mem_mb',' MB','var(--cyan)');
+
+  // Disk storage
+  let free=d.disk_free_gb||0, total=d.disk_total_gb||0, used=total-free;
+  $('pop-disk-free').textContent=free+' GB';
+  $('pop-disk-total').textContent=total+' GB';
+  $('pop-disk-used').textContent=(used>0?used:0)+' GB';
+  if(total>0){
+    $('pop-disk-bar').style.width=(used/total*100).toFixed(0)+'%';
+  }
 
-    // Battery
-    if(d.battery_pct!=null){
-      $('pop-pwr-battery').textContent=d.battery_pct+'%'+(d.battery_charging?' ⚡':'');
+  // SMART data
+  if(d.smart_status){
+    $('smart-section').style.display='block';
+    let isOk=d.smart_status.toLowerCase()==='verified';
+    $('pop-smart-status').innerHTML=isOk?
+      '<span class="smart-badge smart-ok">✓ Verified</span>':
+      '<span class="smart-badge smart-warn">⚠ '+d.smart_status+'</span>';
+    $('pop-smart-model').textContent=d.smart_model||'—';
+    $('pop-smart-trim').textContent=d.smart_trim||'—';
+    if(d.smart_updated){
+      let ago=Math.max(0,Math.round(Date.now()/1000-d.smart_updated));
+      $('pop-smart-checked').textContent=(ago<60?ago+'s':Math.round(ago/60)+'m')+' ago · '+d.smart_refresh_ms+' ms ↻';
     }
+  }
 
-    // Uptime
-    $('pop-uptime').textContent=fmtUptime(d.uptime_sec||0);
-  }).catch(()=>{});
+  // Battery
+  if(d.battery_pct!=null){
+    $('pop-pwr-battery').textContent=d.battery_pct+'%'+(d.battery_charging?' ⚡':'');
+  }
+
+  // Uptime
+  $('pop-uptime').textContent=fmtUptime(d.uptime_sec||0);
 }
 
-update();
-setInterval(update,2000);
+// One /events stream carries metrics and (with details=1) the slower collector details,
+// each only when changed. Closed while the page is hidden; a seq gap means resync.
+let M={},D={},seq=0,es=null,want=true;
+function connect(){
+  if(es||!want)return;
+  es=new EventSource('/events?details=1');
+  es.onmessage=e=>{try{let d=JSON.parse(e.data);
+    if(!d.key&&d.seq!==seq+1){es.close();es=null;connect();return;}
+    seq=d.seq;
+    if(d.key){M=d.metrics;D=d.details||{};}
+    else{M=Object.assign({},M,d.metrics);if(d.details)D=Object.assign({},D,d.details);}
+    if(d.key||Object.keys(d.metrics).length)renderMetrics(M);
+    if(d.key||d.details)renderDetails(D);
+  }catch(x){}};
+  es.onerror=()=>{es.close();es=null;setTimeout(connect,2000);};
+}
+// Also called by the native app when the popover closes — its WKWebView stays alive
+function pause(){want=false;if(es){es.close();es=null;}}
+function resume(){want=true;connect();}
+document.addEventListener('visibilitychange',()=>document.hidden?pause():resume());
+
+// Backfill sparklines from server-side history so reopening the popover isn't empty
+fetch('/api/history?range='+MAX_H*2+'&points='+MAX_H+'&metrics=cpu_usage,mem_used_pct,disk_read_mb,disk_write_mb').then(r=>r.json()).then(d=>{
+  let s=d.series,c=s.cpu_usage;if(!c||!c.t.length)return;
+  // Series are downsampled independently — align the others on the CPU timestamps
+  let at=(k,t)=>{let q=s[k];if(!q||!q.t.length)return 0;let j=0;while(j+1<q.t.length&&q.t[j+1]<=t)j++;return q.v[j]||0;};
+  cpuHist=c.v.concat(cpuHist).slice(-MAX_H);
+  ramHist=c.t.map(t=>at('mem_used_pct',t)).concat(ramHist).slice(-MAX_H);
+  diskHist=c.t.map(t=>at('disk_read_mb',t)+at('disk_write_mb',t)).concat(diskHist).slice(-MAX_H);
+}).catch(()=>{});
+document.hidden?pause():connect();  // a page loaded hidden waits for resume()
 </script>
 </body></html>'''
 '''Popover HTML for status bar popover.'''
@@ -0,0 +1,168 @@
+"""Process table sampler — one pass per cycle, exact interval CPU % from per-PID deltas.
+
+Backends: libproc (macOS, via ctypes), /proc (Linux), `ps` otherwise. On macOS
+without root, processes libproc may not inspect (other users', system daemons
+such as WindowServer) are read with one `ps -p` call at most every PS_REFRESH
+seconds; between refreshes they keep the CPU % averaged over the last interval."""
+
+import os, sys, time, heapq, ctypes, subprocess
+from itertools import chain
+
+_lib = None
+if sys.platform == "darwin":
+    try:
+        _lib = ctypes.CDLL("/usr/lib/libSystem.B.dylib", use_errno=True)
+        _lib.proc_listallpids.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        _lib.proc_pidinfo.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_uint64, ctypes.c_void_p, ctypes.c_int]
+        _lib.proc_name.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _lib.mach_timebase_info.argtypes = [ctypes.c_void_p]
+    except (OSError, AttributeError):
+        _lib = None
+
+
+class _ProcTaskInfo(ctypes.Structure):
+    _fields_ = [("virtual_size", ctypes.c_uint64), ("resident_size", ctypes.c_uint64),
+                ("total_user", ctypes.c_uint64), ("total_system", ctypes.c_uint64),
+                ("threads_user", ctypes.c_uint64), ("threads_system", ctypes.c_uint64)] + \
+               [(f, ctypes.c_int32) for f in ("policy", "faults", "pageins", "cow_faults",
+                                              "messages_sent", "messages_received", "syscalls_mach",
+                                              "syscalls_unix", "csw", "threadnum", "numrunning", "priority")]
+
+
+class _Timebase(ctypes.Structure):
+    _fields_ = [("numer", ctypes.c_uint32), ("denom", ctypes.c_uint32)]
+
+
+_PROC_PIDTASKINFO = 4
+
+
+def _parse_cputime(s):
+    """ps TIME ('[dd-][hh:]mm:ss[.cc]') -> seconds."""
+    days, _, rest = s.rpartition("-")
+    secs = 0.0
+    for part in rest.split(":"):
+        secs = secs * 60 + float(part)
+    return secs + (int(days) * 86400 if days else 0)
+
+
+_tick_s = None
+
+
+def _read_libproc(denied=None):
+    """[(pid, name, cpu_seconds, rss_bytes)] via proc_pidinfo; PIDs it may not inspect
+    are appended to `denied`."""
+    global _tick_s
+    if _tick_s is None:
+        # pti_total_* are Mach absolute time units (not ns on Apple Silicon)
+        tb = _Timebase()
+        _lib.mach_timebase_info(ctypes.byref(tb))
+        _tick_s = tb.numer / tb.denom / 1e9
+    n = _lib.proc_listallpids(None, 0)
+    pids = (ctypes.c_int * (n + 64))()
+    n = _lib.proc_listallpids(pids, ctypes.sizeof(pids))
+    info, size = _ProcTaskInfo(), ctypes.sizeof(_ProcTaskInfo)
+    name = ctypes.create_string_buffer(256)
+    rows = []
+    for pid in pids[:n]:
+        if pid <= 0:
+            continue
+        if _lib.proc_pidinfo(pid, _PROC_PIDTASKINFO, 0, ctypes.byref(info), size) != size:
+            if denied is not None:
+                denied.append(pid)
+            continue
+        _lib.proc_name(pid, name, ctypes.sizeof(name))
+        rows.append((pid, name.value.decode(errors="replace"),
+                     (info.total_user + info.total_system) * _tick_s, info.resident_size))
+    return rows
+
+
+def _read_ps(pids=None):
+    cmd = ["ps", "-o", "pid=,time=,rss=,comm="]
+    cmd += ["-p", ",".join(map(str, pids))] if pids else ["-ax"]
+    rows = []
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return rows
+    for line in out.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) == 4:
+            try:
+                rows.append((int(parts[0]), parts[3].rsplit("/", 1)[-1],
+                             _parse_cputime(parts[1]), int(parts[2]) * 1024))
+            except ValueError: pass
+    return rows
+
+
+def _read_proc(denied=None):
+    hz = os.sysconf("SC_CLK_TCK")
+    page = os.sysconf("SC_PAGE_SIZE")
+    rows = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                raw = f.read().decode(errors="replace")
+        except OSError:
+            continue  # exited between listdir and open
+        lp, rp = raw.find("("), raw.rfind(")")
+        fields = raw[rp + 2:].split()
+        # fields[0] is state (field 3); utime/stime are fields 14/15, rss is 24
+        try:
+            rows.append((int(entry), raw[lp + 1:rp],
+                         (int(fields[11]) + int(fields[12])) / hz, int(fields[21]) * page))
+        except (IndexError, ValueError): pass
+    return rows
+
+
+class ProcessSampler:
+    """Reads the process table once per sample() and keeps previous CPU times per PID."""
+
+    PS_REFRESH = 30.0   # seconds between `ps` runs for PIDs libproc cannot read
+
+    def __init__(self):
+        if _lib is not None:
+            self._read = _read_libproc
+        elif os.path.isdir("/proc/self"):
+            self._read = _read_proc
+        else:
+            self._read = lambda denied: _read_ps()
+        self._prev = {}      # pid -> cpu seconds
+        self._prev_t = None
+        self._ps = {}        # unreadable pid -> (cpu %, name, rss) from the last `ps`
+        self._ps_prev, self._ps_at, self._ps_next = {}, None, 0.0
+
+    def sample(self, n=7):
+        """Returns (top_cpu, top_mem): n largest by interval CPU % (of one core) and by RSS.
+        top_cpu rows are (pct, pid, name); top_mem rows are (rss_bytes, pid, name)."""
+        denied = []
+        rows = self._read(denied)
+        now = time.monotonic()
+        extra = self._unreadable(denied, now)
+        prev, dt = self._prev, (now - self._prev_t) if self._prev_t else 0
+        self._prev = {pid: cpu for pid, _, cpu, _ in rows}
+        self._prev_t = now
+        top_cpu = []
+        if dt > 0:
+            top_cpu = heapq.nlargest(n, chain((
+                ((cpu - prev[pid]) / dt * 100, pid, name)
+                for pid, name, cpu, _ in rows if pid in prev
+            ), ((pct, pid, name) for pct, pid, name, _ in extra)))
+        top_mem = heapq.nlargest(n, chain(((rss, pid, name) for pid, name, _, rss in rows),
+                                          ((rss, pid, name) for _, pid, name, rss in extra)))
+        return top_cpu, top_mem
+
+    def _unreadable(self, pids, now):
+        """[(cpu %, pid, name, rss)] for `pids`, from a `ps` run at most every PS_REFRESH
+        seconds. CPU % is the average over the interval between the last two runs."""
+        if pids and now >= self._ps_next:
+            rows = _read_ps(pids)
+            dt = now - self._ps_at if self._ps_at is not None else 0
+            prev, self._ps_prev = self._ps_prev, {pid: cpu for pid, _, cpu, _ in rows}
+            self._ps = {pid: ((cpu - prev[pid]) / dt * 100 if dt and pid in prev else 0.0, name, rss)
+                        for pid, name, cpu, rss in rows}
+            # The first run has no rate yet: take the second one a normal cycle later
+            self._ps_at, self._ps_next = now, now + (self.PS_REFRESH if dt else 5.0)
+        live = set(pids)
+        return [(pct, pid, name, rss) for pid, (pct, name, rss) in self._ps.items() if pid in live]
@@ -0,0 +1,274 @@
+"""Crash-safe metric recording — fixed-size records appended to memory-mapped segments.
+
+Segment layout (little-endian):
+    header  HEADER_BYTES: magic, version, record size, JSON length, then
+            JSON {"fields", "sys_info", "created"}; zero padded
+    records f64 timestamp, f32 per field (NaN = missing), u32 CRC32 of both
+
+Segments are preallocated, so unwritten space reads as zeros. A process
+kill loses nothing (the pages live in the page cache); a kernel panic
+loses at most `flush_interval` seconds. On reopen the write position is
+found by binary search, and a torn last record fails its CRC and is
+overwritten."""
+
+import os, json, mmap, time, fcntl, struct, threading, zlib
+from pathlib import Path
+
+MAGIC = b"MSTRREC1"
+VERSION = 1
+HEADER_BYTES = 4096
+SUFFIX = ".msr"
+NAN = float("nan")
+
+_HEAD = struct.Struct("<8sHHI")
+_CRC = struct.Struct("<I")
+_TS = struct.Struct("<d")
+
+
+def _record_struct(nfields):
+    return struct.Struct(f"<d{nfields}f")
+
+
+class Segment:
+    """Read-only view of one segment file; records are paged from the mmap on demand."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.record_size, jlen = _HEAD.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"not a recording segment: {self.path.name}")
+        meta = json.loads(self._mm[_HEAD.size:_HEAD.size + jlen])
+        self.fields = tuple(meta["fields"])
+        self.sys_info = meta.get("sys_info") or {}
+        self.created = meta.get("created", 0)
+        self._rec = _record_struct(len(self.fields))
+        self.capacity = (len(self._mm) - HEADER_BYTES) // self.record_size
+        self.count = _written(self._mm, self.record_size, self.capacity)
+
+    def close(self):
+        self._mm.close()
+
+    def _ts(self, i):
+        return _TS.unpack_from(self._mm, HEADER_BYTES + i * self.record_size)[0]
+
+    def first_ts(self):
+        return self._ts(0) if self.count else None
+
+    def last_ts(self):
+        return self._ts(self.count - 1) if self.count else None
+
+    def records(self, start=None, end=None, chunk=1024):
+        """Yield (ts, values) for valid records in [start, end], `chunk` records per page read.
+        Values are floats in `self.fields` order, None where missing."""
+        lo, hi = 0, self.count
+        if start is not None:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._ts(mid) < start: lo = mid + 1
+                else: hi = mid
+        rs, body = self.record_size, self._rec.size
+        for first in range(lo, self.count, chunk):
+            base = HEADER_BYTES + first * rs
+            page = self._mm[base:base + min(chunk, self.count - first) * rs]
+            for off in range(0, len(page), rs):
+                if _CRC.unpack_from(page, off + body)[0] != zlib.crc32(page[off:off + body]):
+                    return  # torn or corrupt record — nothing valid follows
+                ts, *vals = self._rec.unpack_from(page, off)
+                if end is not None and ts > end:
+                    return
+                yield ts, [None if v != v else v for v in vals]
+
+
+def _written(mm, record_size, capacity):
+    """Records before the first all-zero timestamp (the preallocated tail)."""
+    lo, hi = 0, capacity
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _TS.unpack_from(mm, HEADER_BYTES + mid * record_size)[0] != 0: lo = mid + 1
+        else: hi = mid
+    return lo
+
+
+def segments(directory):
+    """Segment paths in a recording directory, oldest first."""
+    d = Path(directory)
+    return sorted(d.glob("*" + SUFFIX)) if d.is_dir() else []
+
+
+def _resolve(paths):
+    p = Path(paths) if isinstance(paths, (str, os.PathLike)) else None
+    return segments(p) if p and p.is_dir() else [p] if p else list(paths)
+
+
+def recording_info(paths):
+    """(fields, sys_info) of the first readable segment, or ((), {})."""
+    for path in _resolve(paths):
+        try:
+            seg = Segment(path)
+        except (OSError, ValueError):
+            continue
+        seg.close()
+        return seg.fields, seg.sys_info
+    return (), {}
+
+
+def read(paths, start=None, end=None, fields=None):
+    """Yield (ts, values) across segments in time order. `paths` is a directory,
+    a segment file or a list of segment files; values follow `fields`
+    (default: the first segment's fields), None where a segment lacks one."""
+    for path in _resolve(paths):
+        try:
+            seg = Segment(path)
+        except (OSError, ValueError):
+            continue
+        try:
+            if end is not None and (seg.first_ts() or 0) > end:
+                return
+            if fields is None:
+                fields = seg.fields
+            idx = [seg.fields.index(f) if f in seg.fields else None for f in fields]
+            if start is not None and (seg.last_ts() or 0) < start:
+                continue
+            for ts, vals in seg.records(start, end):
+                yield ts, [None if j is None else vals[j] for j in idx]
+        finally:
+            seg.close()
+
+
+class Recorder:
+    """Appends metric samples to the newest segment, rotating and pruning old ones."""
+
+    def __init__(self, directory, fields, sys_info=None, segment_bytes=4 * 1024**2,
+                 max_bytes=256 * 1024**2, max_age_days=30, flush_interval=5.0):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.fields = tuple(fields)
+        self.sys_info = sys_info
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.flush_interval = flush_interval
+        self._rec = _record_struct(len(self.fields))
+        self.record_size = self._rec.size + _CRC.size
+        self._lock = threading.Lock()
+        self._file = self._mm = self.path = None
+        self._off = self._end = 0
+        self._flushed = time.monotonic()
+        self.recovered = 0     # valid records found in a reopened segment
+        if not self._reopen():
+            self._rotate()
+
+    def _reopen(self):
+        """Continue the newest segment after a restart or crash, if it is compatible."""
+        segs = segments(self.dir)
+        if not segs:
+            return False
+        f = None
+        try:
+            f = open(segs[-1], "r+b")
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)   # another instance still writing
+            mm = mmap.mmap(f.fileno(), 0)
+            magic, version, rs, jlen = _HEAD.unpack_from(mm, 0)
+            meta = json.loads(mm[_HEAD.size:_HEAD.size + jlen])
+            if magic != MAGIC or version != VERSION or rs != self.record_size or tuple(meta["fields"]) != self.fields:
+                mm.close(); f.close()
+                return False
+        except (OSError, ValueError, KeyError, struct.error):
+            if f: f.close()
+            return False
+        cap = (len(mm) - HEADER_BYTES) // rs
+        n = _written(mm, rs, cap)
+        body = self._rec.size
+        # Drop a torn tail: step back over records whose CRC does not match
+        while n:
+            off = HEADER_BYTES + (n - 1) * rs
+            if _CRC.unpack_from(mm, off + body)[0] == zlib.crc32(mm[off:off + body]):
+                break
+            n -= 1
+            mm[off:off + rs] = bytes(rs)
+        self._file, self._mm, self.path = f, mm, segs[-1]
+        self._off, self._end = HEADER_BYTES + n * rs, HEADER_BYTES + cap * rs
+        self.recovered = n
+        return True
+
+    def _rotate(self):
+        self._close_segment()
+        try: stamp = int(self.path.stem) + 1 if self.path else 0
+        except ValueError: stamp = 0
+        stamp = max(stamp, int(time.time() * 1000))
+        meta = {"fields": self.fields, "sys_info": self.sys_info, "created": time.time()}
+        blob = json.dumps(meta).encode()
+        if len(blob) > HEADER_BYTES - _HEAD.size:
+            blob = json.dumps(dict(meta, sys_info=None)).encode()
+        while True:  # names stay unique and ordered even within one millisecond
+            path = self.dir / f"{stamp:015d}{SUFFIX}"
+            try:
+                f = open(path, "x+b")
+                break
+            except FileExistsError:
+                stamp += 1
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        size = HEADER_BYTES + max(1, (self.segment_bytes - HEADER_BYTES) // self.record_size) * self.record_size
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+        _HEAD.pack_into(mm, 0, MAGIC, VERSION, self.record_size, len(blob))
+        mm[_HEAD.size:_HEAD.size + len(blob)] = blob
+        mm.flush()
+        self._file, self._mm, self.path = f, mm, path
+        self._off, self._end = HEADER_BYTES, size
+        self._prune()
+
+    def _prune(self):
+        """Retention: drop the oldest segments beyond max_bytes or max_age (never the current one)."""
+        segs = [p for p in segments(self.dir) if p != self.path]
+        total = sum(p.stat().st_size for p in segs) + self._end
+        cutoff = time.time() - self.max_age
+        for p in segs:
+            try:
+                if total <= self.max_bytes and p.stat().st_mtime >= cutoff:
+                    break
+                total -= p.stat().st_size
+                p.unlink()
+            except OSError:
+                pass
+
+    def _close_segment(self):
+        if self._mm is not None:
+            try:
+                self._mm.flush()
+                self._mm.close()
+            finally:
+                self._file.close()
+                self._mm = self._file = None
+
+    def append(self, ts, sample):
+        vals = [sample.get(f) for f in self.fields]
+        body = self._rec.pack(ts, *[NAN if v is None else v for v in vals])
+        rec = body + _CRC.pack(zlib.crc32(body))
+        with self._lock:
+            if self._mm is None:
+                return
+            if self._off + self.record_size > self._end:
+                self._rotate()
+            self._mm[self._off:self._off + self.record_size] = rec
+            self._off += self.record_size
+            now = time.monotonic()
+            if now - self._flushed >= self.flush_interval:
+                self._mm.flush()
+                self._flushed = now
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+    def read(self, start=None, end=None, fields=None):
+        """Samples from every segment on disk, including the one being written."""
+        return read(self.dir, start, end, fields or self.fields)
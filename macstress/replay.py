@@ -0,0 +1,67 @@
+"""ReplayCollector — plays a recording back through the normal MetricsCollector path.
+
+Samples are re-timed to "now" so history, /api/history, /events and the
+dashboard behave exactly as they do live; the original timestamp is kept in
+details as replay_ts."""
+
+import os, time, threading
+from .metrics import MetricsCollector
+from .recorder import read, recording_info
+
+_DEFAULT_SYS_INFO = {
+    "arch": "unknown", "cpu": "—", "model_id": "", "model_name": "Replay", "gpu": "—", "os": "—",
+    "cores": 1, "perf_cores": 1, "eff_cores": 0, "ram_gb": 0, "probing": False, "has_sudo": False,
+}
+
+
+class ReplayCollector(MetricsCollector):
+    """`speed` is a multiplier (1 = real time, 10 = ten times faster, 0 = as fast as possible).
+    Gaps longer than MAX_GAP seconds (app not running) are shortened to MAX_GAP."""
+
+    MAX_GAP = 10.0
+
+    def __init__(self, source, speed=1.0, loop=False):
+        fields, sys_info = recording_info(source)
+        if not fields:
+            raise ValueError(f"no recording found in {source}")
+        si = dict(_DEFAULT_SYS_INFO, **(sys_info or {}))
+        si["replay"] = os.path.basename(os.path.normpath(str(source)))
+        si["probing"] = False
+        super().__init__(si, adaptive=False)
+        self.source = source
+        self.speed = speed
+        self.loop = loop
+        self._set_details(replay_ts=None, replay_samples=0, replay_done=False)
+
+    def _register_sources(self):
+        pass  # nothing is polled — the replay thread publishes every sample
+
+    def start(self):
+        threading.Thread(target=self._replay_loop, daemon=True, name="ms-replay").start()
+
+    def _replay_loop(self):
+        count = 0
+        while not self._stop.is_set():
+            t0, wall0 = time.monotonic(), time.time()
+            virtual, prev = 0.0, None
+            for ts, vals in read(self.source, fields=self.HISTORY_FIELDS):
+                if self._stop.is_set():
+                    return
+                dt = min(ts - prev, self.MAX_GAP) if prev is not None else 0.0
+                virtual, prev = virtual + max(dt, 0.0), ts
+                if self.speed > 0:
+                    delay = virtual / self.speed - (time.monotonic() - t0)
+                    if delay > 0 and self._stop.wait(delay):
+                        return
+                now = wall0 + (virtual / self.speed if self.speed > 0 else time.monotonic() - t0)
+                fields = {f: round(v, 2) for f, v in zip(self.HISTORY_FIELDS, vals) if v is not None}
+                snap = self._set(**fields, timestamp=now)
+                with self._lock:
+                    self.history.append(now, snap)
+                count += 1
+                # /events pushes at the replayed sample rate
+                step = max(0.05, min(dt / self.speed, 5.0)) if self.speed > 0 and dt > 0 else 0.1
+                self._set_details(replay_ts=ts, replay_samples=count, sample_interval_s=round(step, 3))
+            if not self.loop:
+                break
+        self._set_details(replay_done=True)
@@ -0,0 +1,150 @@
+"""Metric source registry and single cadence scheduler.
+
+Each metric group is a `MetricSource` that declares its interval, cost class and
+the keys it writes. One `Scheduler` thread dispatches due sources onto small
+worker pools, so a slow command (system_profiler, ps) never delays cheap ones."""
+
+import time, heapq, threading
+from concurrent.futures import ThreadPoolExecutor
+from . import telemetry
+
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+
+
+class MetricSource:
+    def __init__(self, name, fn, interval, cost=CHEAP, keys=(), scalable=True):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.cost = cost
+        self.keys = tuple(keys)
+        self.scalable = scalable    # follows the scheduler's adaptive rate scale
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.last_ok = 0.0          # wall-clock time of last successful run
+        self.last_duration = 0.0    # seconds
+        self.last_start = 0.0       # monotonic
+        self.running = False
+
+    def stats(self):
+        return {"interval": self.interval, "cost": self.cost, "runs": self.runs,
+                "errors": self.errors, "skipped": self.skipped,
+                "last_ok": self.last_ok, "last_ms": round(self.last_duration * 1000, 1)}
+
+
+class Scheduler:
+    """Runs registered sources at their cadence on per-cost-class worker pools.
+
+    `budget` caps the share of wall time an expensive source may occupy:
+    a source that took 3 s with budget 0.05 is not run again for 60 s,
+    whatever its nominal interval.
+
+    `scale` multiplies every scalable interval (adaptive sampling); the
+    result is clamped to [min_interval, max_interval]."""
+
+    def __init__(self, workers=2, budget=0.05, min_interval=0.5, max_interval=300.0):
+        self.sources = {}
+        self.budget = budget
+        self.scale = 1.0
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._pools = {
+            CHEAP: ThreadPoolExecutor(workers, thread_name_prefix="ms-cheap"),
+            EXPENSIVE: ThreadPoolExecutor(1, thread_name_prefix="ms-expensive"),
+        }
+        self._queue = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def register(self, source, delay=0.0):
+        with self._lock:
+            self.sources[source.name] = source
+            heapq.heappush(self._queue, (time.monotonic() + delay, source.name))
+        self._wake.set()
+        return source
+
+    def run_now(self, name):
+        """Schedule a source immediately (e.g. on-demand refresh from the API)."""
+        with self._lock:
+            heapq.heappush(self._queue, (time.monotonic(), name))
+        self._wake.set()
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="ms-scheduler").start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for pool in self._pools.values():
+            pool.shutdown(wait=False)
+
+    def set_scale(self, scale):
+        """Change the adaptive rate scale and re-time every queued source."""
+        if scale == self.scale:
+            return
+        self.scale = scale
+        now = time.monotonic()
+        with self._lock:
+            self._queue = [(max(now, src.last_start + self.interval_for(src)) if src.last_start else now, name)
+                           for name, src in self.sources.items()]
+            heapq.heapify(self._queue)
+        self._wake.set()
+
+    def interval_for(self, src):
+        """Effective interval — nominal x scale within the floor/ceiling,
+        stretched for expensive sources over budget."""
+        interval = src.interval
+        if src.scalable:
+            # The ceiling bounds stretching only — never shortens a long nominal TTL
+            interval = min(max(interval * self.scale, self.min_interval), max(self.max_interval, src.interval))
+        if src.cost == EXPENSIVE and self.budget:
+            return max(interval, src.last_duration / self.budget)
+        return interval
+
+    def stats(self):
+        return {name: dict(src.stats(), effective=round(self.interval_for(src), 2))
+                for name, src in self.sources.items()}
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                while self._queue and self._queue[0][0] <= now:
+                    due.append(heapq.heappop(self._queue)[1])
+                next_at = self._queue[0][0] if self._queue else now + 1.0
+            for name in due:
+                src = self.sources.get(name)
+                if src is None:
+                    continue
+                if src.running:
+                    src.skipped += 1
+                else:
+                    src.running = True
+                    try:
+                        self._pools[src.cost].submit(self._run, src)
+                    except RuntimeError:
+                        return  # pool shut down
+                with self._lock:
+                    if not any(n == name for _, n in self._queue):
+                        heapq.heappush(self._queue, (now + self.interval_for(src), name))
+                    next_at = min(next_at, self._queue[0][0])
+            self._wake.wait(max(0.0, next_at - time.monotonic()))
+
+    def _run(self, src):
+        t0 = src.last_start = time.monotonic()
+        try:
+            src.fn()
+            src.last_ok = time.time()
+            telemetry.sample_ok(src.name, src.last_ok)
+        except Exception:
+            src.errors += 1
+        finally:
+            src.last_duration = time.monotonic() - t0
+            src.runs += 1
+            src.running = False
+            telemetry.SOURCE_SECONDS.observe(src.last_duration, src.name)
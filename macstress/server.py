@@ -1,6 +1,6 @@
 """HTTP server and API endpoints."""
 
-import json, time, threading, os, sys
+import json, math, time, threading, os, sys, gzip, select, hashlib
 import urllib.parse
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from socketserver import ThreadingMixIn
@@ -9,53 +9,143 @@ from . import VERSION, GITHUB_REPO
 from .dashboard import DASHBOARD_HTML
 from .popover import POPOVER_HTML
 from .benchmark import run_disk_benchmark, get_bench_status
+from . import export
+from .events import EventHub
+from . import telemetry, websocket
 from .updater import check_for_updates, self_update
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 
 class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     daemon_threads = True
 
 
+def _precompress(html):
+    """A static page encoded once: {content-coding: (body, strong ETag)}."""
+    body = html.encode()
+    tag = hashlib.sha256(body).hexdigest()[:16]
+    page = {"identity": (body, f'"{tag}"'), "gzip": (gzip.compress(body, 9, mtime=0), f'"{tag}-gz"')}
+    if brotli:
+        page["br"] = (brotli.compress(body), f'"{tag}-br"')
+    return page
+
+
+_DASHBOARD = _precompress(DASHBOARD_HTML)
+PAGES = {"/": _DASHBOARD, "/index.html": _DASHBOARD, "/popover": _precompress(POPOVER_HTML)}
+
+SSE_HEADERS = [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache"),
+               ("Connection", "keep-alive"), ("Access-Control-Allow-Origin", "*")]
+
+
+def _accepts(header, coding):
+    """True when Accept-Encoding allows `coding` (named or via *) with q > 0."""
+    q = {}
+    for item in header.lower().split(","):
+        name, *params = [p.strip() for p in item.split(";")]
+        try: q[name] = float(next((p[2:] for p in params if p.startswith("q=")), "1"))
+        except ValueError: q[name] = 0.0
+    return q.get(coding, q.get("*", 0.0)) > 0
+
+
 # Module-level references set by __main__
 _mc = None
 _sm = None
 _si = None
+_hub = None
+_expo = None
 
 
 def set_globals(mc, sm, si):
-    global _mc, _sm, _si
+    global _mc, _sm, _si, _hub, _expo
     _mc, _sm, _si = mc, sm, si
+    _hub = EventHub(mc, sm, si)
+    _expo = telemetry.Exposition(mc, sm, si)
 
 
 class Handler(BaseHTTPRequestHandler):
+    # Keep-alive: every non-streaming response carries Content-Length (or is chunked);
+    # idle persistent connections are closed after `timeout` seconds
+    protocol_version = "HTTP/1.1"
+    timeout = 30
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't wait for the ACK
+
     def log_message(self, *a): pass
 
     def do_GET(self):
-        if self.path in ("/", "/index.html"):
-            self._ok("text/html", DASHBOARD_HTML.encode())
-        elif self.path == "/popover":
-            self._ok("text/html", POPOVER_HTML.encode())
-        elif self.path == "/events":
+        if self.path in PAGES:
+            self._page(PAGES[self.path])
+        elif self.path.split("?")[0] == "/events":
             self.send_response(200)
-            for k, v in [("Content-Type","text/event-stream"),("Cache-Control","no-cache"),
-                         ("Connection","keep-alive"),("Access-Control-Allow-Origin","*")]:
+            for k, v in SSE_HEADERS:
                 self.send_header(k, v)
             self.end_headers()
-            self._send_event(json.dumps({"sys_info": _si, "active": _sm.get_active()}))
+            self.close_connection = True    # the stream ends with the connection
+            sub = _hub.subscribe(details=self._params().get("details") == "1")
             try:
-                while True:
-                    self._send_event(json.dumps({
-                        "metrics": _mc.get_snapshot(), "active": _sm.get_active(), "sys_info": _si
-                    }))
-                    time.sleep(2.0)
+                while not sub.closed:
+                    frame = sub.get(timeout=5.0)
+                    if frame:
+                        self.wfile.write(frame); self.wfile.flush()
             except (BrokenPipeError, ConnectionResetError, OSError): pass
+            finally:
+                _hub.unsubscribe(sub)
+        elif self.path.split("?")[0] == "/ws":
+            self._websocket()
+        elif self.path == "/metrics":
+            # Prometheus scrape — not a viewer, so no note_demand()
+            self._ok(telemetry.CONTENT_TYPE, _expo.render())
         elif self.path == "/api/status":
+            _mc.note_demand()
             self._ok("application/json", json.dumps({"metrics": _mc.get_snapshot(), "active": _sm.get_active(), "sys_info": _si}).encode())
         elif self.path == "/api/details":
-            details = _mc.get_details()
+            _mc.note_demand()
             from . import launchd
-            details["launchd_installed"] = launchd.is_installed()
+            details = dict(_mc.get_details(), launchd_installed=launchd.is_installed(), events=_hub.stats())
             self._ok("application/json", json.dumps(details).encode())
+        elif self.path.startswith("/api/history"):
+            p = self._params()
+            try:
+                start, end = self._time_range(p, 3600)
+                points = max(3, min(int(p.get("points", 500)), 5000))
+            except ValueError:
+                self.send_error(400); return
+            stat = p.get("stat", "mean")
+            body = _mc.history.series(start, end, self._fields(p), points, stat if stat in ("min", "max", "mean") else "mean")
+            self._ok("application/json", json.dumps(body, separators=(",", ":")).encode())
+        elif self.path.startswith("/api/export"):
+            p = self._params()
+            fmt = p.get("format", "csv")
+            try:
+                start, end = self._time_range(p, None)
+            except ValueError:
+                self.send_error(400); return
+            if fmt not in export.FORMATS:
+                self.send_error(400); return
+            fields = self._fields(p) or list(_mc.HISTORY_FIELDS)
+            if p.get("source", "recording") == "recording" and _mc.recorder:
+                rows = _mc.recorder.read(start, end, fields)
+            else:
+                rows = export.history_rows(_mc.history, start or 0, end, fields)
+            self.send_response(200)
+            self.send_header("Content-Type", export.FORMATS[fmt])
+            self.send_header("Content-Disposition", f'attachment; filename="{export.filename(fmt)}"')
+            chunked = self.request_version >= "HTTP/1.1"    # HTTP/1.0: body ends with the connection
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            try:
+                for chunk in export.stream(fmt, rows, fields):
+                    if chunk: self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                if chunked: self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
         elif self.path == "/api/launchd_status":
             from . import launchd
             self._ok("application/json", json.dumps({"installed": launchd.is_installed()}).encode())
@@ -78,6 +168,12 @@ class Handler(BaseHTTPRequestHandler):
             self.send_error(404)
 
     def do_POST(self):
+        # Bodies are unused, but must be consumed so the next request on the connection parses
+        try: length = int(self.headers.get("Content-Length", 0))
+        except ValueError: length = -1
+        if length < 0:
+            self.send_error(400); return
+        self.rfile.read(length)
         if self.path.startswith("/api/toggle?"):
             t = self.path.split("test=")[-1].split("&")[0]
             if t in ("cpu","gpu","memory","disk"):
@@ -115,6 +211,9 @@ class Handler(BaseHTTPRequestHandler):
                     threading.Thread(target=lambda: (time.sleep(1), os.execv(sys.executable, [sys.executable] + sys.argv)), daemon=True).start()
             except Exception as e:
                 self._ok("application/json", json.dumps({"ok": False, "error": str(e)}).encode())
+        elif self.path == "/api/refresh_smart":
+            _mc.refresh_smart()
+            self._ok("application/json", b'{"ok":true}')
         elif self.path == "/api/open_dashboard":
             self._ok("application/json", b'{"ok":true}')
         elif self.path == "/api/quit_app":
@@ -123,6 +222,7 @@ class Handler(BaseHTTPRequestHandler):
                 time.sleep(0.3)
                 _sm.stop_all()
                 _mc.stop()
+                _hub.stop()
                 # Try NSApp terminate for clean native app shutdown
                 try:
                     from AppKit import NSApp
@@ -186,8 +286,69 @@ class Handler(BaseHTTPRequestHandler):
         else:
             self.send_error(404)
 
+    def _websocket(self):
+        """Binary metric frames (see websocket.py) until the client closes."""
+        key = self.headers.get("Sec-WebSocket-Key")
+        if not key or self.headers.get("Upgrade", "").lower() != "websocket":
+            self.send_error(400); return
+        p = self._params()
+        ws = websocket.Session(_mc, p.get("fields"), p.get("rate"))
+        self.close_connection = True
+        _mc.client_connected()
+        try:
+            self.wfile.write(websocket.handshake(key) + ws.schema())
+            while not ws.closed:
+                if select.select([self.connection], [], [], ws.wait() or ws.interval)[0]:
+                    data = self.connection.recv(65536)
+                    if not data:
+                        break
+                    for out in ws.feed(data):
+                        self.wfile.write(out)
+                    if ws.closed:   # nothing may follow our close frame
+                        break
+                frame = ws.sample()
+                if frame:
+                    self.wfile.write(frame)
+        except OSError: pass
+        finally:
+            ws.close()
+            _mc.client_disconnected()
+
+    def _params(self):
+        return {k: v[0] for k, v in urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).items()}
+
+    def _time_range(self, p, default_range):
+        """(start, end) from ?start=&end= or ?range= seconds; start is None for 'everything'.
+        Raises ValueError for anything that is not a finite number."""
+        end = float(p.get("end", time.time()))
+        rng = p.get("range", default_range)
+        start = float(p["start"]) if "start" in p else (end - float(rng) if rng is not None else None)
+        if not math.isfinite(end) or (start is not None and not math.isfinite(start)):
+            raise ValueError("non-finite time range")
+        return start, end
+
+    def _fields(self, p):
+        return [f for f in p.get("metrics", "").split(",") if f in _mc.HISTORY_FIELDS] or None
+
     def _ok(self, ct, body):
-        self.send_response(200); self.send_header("Content-Type", ct); self.end_headers(); self.wfile.write(body)
+        self.send_response(200); self.send_header("Content-Type", ct)
+        self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
 
-    def _send_event(self, data):
-        self.wfile.write(f"data: {data}\n\n".encode()); self.wfile.flush()
+    def _page(self, page):
+        """Precompressed static page; 304 when the client's ETag still matches."""
+        accept = self.headers.get("Accept-Encoding", "")
+        enc = next((e for e in ("br", "gzip") if e in page and _accepts(accept, e)), "identity")
+        body, etag = page[enc]
+        fresh = etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        self.send_response(304 if fresh else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if not fresh:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if enc != "identity":
+                self.send_header("Content-Encoding", enc)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not fresh:
+            self.wfile.write(body)
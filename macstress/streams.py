@@ -0,0 +1,331 @@
+"""Long-lived subprocess readers — one process per data source instead of a fork per sample."""
+
+import os, time, shutil, struct, plistlib, subprocess, threading
+from .telemetry import timed, sample_ok
+
+
+def parse_top_cpu(line):
+    """Parse a `top` header line 'CPU usage: 7.69% user, 15.38% sys, 76.92% idle'.
+    Returns {"user", "sys", "idle"} or None for any other line."""
+    if not line.startswith("CPU usage:"):
+        return None
+    out = {}
+    for field in line[10:].split(","):
+        parts = field.strip().split("%", 1)
+        if len(parts) != 2:
+            continue
+        try:
+            out[parts[1].strip()] = float(parts[0])
+        except ValueError:
+            pass
+    if "user" not in out or "sys" not in out:
+        return None
+    out.setdefault("idle", max(0.0, 100.0 - out["user"] - out["sys"]))
+    return out
+
+
+class TopStream:
+    """Keeps one `top -l 0 -s N` process alive and parses its output incrementally.
+
+    `latest` holds the most recent CPU usage split; both the fast collector and
+    the detail loop read it, so no `top` is forked per cycle."""
+
+    def __init__(self, interval=2):
+        self.interval = interval
+        self.latest = None
+        self.updated = 0.0
+        self._proc = None
+
+    def start(self):
+        if not shutil.which("top"):
+            return False
+        try:
+            self._proc = subprocess.Popen(
+                ["top", "-l", "0", "-s", str(self.interval), "-n", "0"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1
+            )
+        except Exception:
+            self._proc = None
+            return False
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        return True
+
+    def stop(self):
+        if self._proc:
+            try: self._proc.kill()
+            except Exception: pass
+
+    def set_interval(self, seconds):
+        """Restart `top` with a new -s; a running process cannot be retuned."""
+        if seconds != self.interval:
+            self.interval = seconds
+            if self._proc:
+                self.stop()
+                self.start()
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def fresh(self):
+        """Latest sample, or None if the stream has stalled or died."""
+        if self.latest is None or not self.alive():
+            return None
+        if time.monotonic() - self.updated > self.interval * 3:
+            return None
+        return self.latest
+
+    def _read_loop(self):
+        first = True
+        try:
+            for line in self._proc.stdout:
+                cpu = parse_top_cpu(line)
+                if cpu is None:
+                    continue
+                # First sample is averaged since boot — not a live reading
+                if first:
+                    first = False
+                    continue
+                self.latest = cpu
+                self.updated = time.monotonic()
+                sample_ok("top")
+        except Exception: pass
+
+
+# ═══════════════════════ powermetrics (plist stream) ═════════════════════
+
+class PlistSplitter:
+    """Incrementally splits `powermetrics -f plist` output into sample documents.
+    Samples are NUL-delimited; feed() returns every sample completed by `data`."""
+
+    def __init__(self):
+        self._buf = b""
+
+    def feed(self, data):
+        self._buf += data
+        *done, self._buf = self._buf.split(b"\0")
+        return [d.strip() for d in done if d.strip()]
+
+
+def _mw(v):
+    return v / 1000 if isinstance(v, (int, float)) else None
+
+
+def parse_pm_sample(sample):
+    """Map one decoded powermetrics plist sample to MetricsCollector.data fields.
+    Only fields present in the sample are returned."""
+    out = {}
+    proc = sample.get("processor") or {}
+    gpu = sample.get("gpu") or {}
+    smc = sample.get("smc") or {}
+
+    cpu_w = _mw(proc.get("cpu_power"))
+    if cpu_w is None:
+        cpu_w = proc.get("package_watts")
+    gpu_w = _mw(proc.get("gpu_power"))
+    if gpu_w is None:
+        gpu_w = _mw(gpu.get("gpu_power"))
+    if cpu_w is not None:
+        out["cpu_power_w"] = cpu_w
+        total = _mw(proc.get("combined_power"))
+        out["total_power_w"] = total if total is not None else cpu_w + (gpu_w or 0)
+    if gpu_w is not None:
+        out["gpu_power_w"] = gpu_w
+
+    freqs = [c["freq_hz"] for c in proc.get("clusters") or () if c.get("freq_hz")]
+    if not freqs and proc.get("freq_hz"):
+        freqs = [proc["freq_hz"]]
+    if freqs:
+        out["cpu_freq_ghz"] = max(freqs) / 1e9
+
+    if isinstance(smc.get("cpu_die"), (int, float)): out["cpu_temp"] = smc["cpu_die"]
+    if isinstance(smc.get("gpu_die"), (int, float)): out["gpu_temp"] = smc["gpu_die"]
+    if isinstance(smc.get("fan"), (int, float)): out["fan_rpm"] = int(smc["fan"])
+    return out
+
+
+class PowermetricsStream:
+    """Keeps one privileged `powermetrics -f plist -i <ms>` process alive.
+
+    Every decoded sample is passed to `on_sample(fields)`; run() blocks until
+    the process exits and returns the number of samples delivered."""
+
+    def __init__(self, samplers, interval_ms, on_sample):
+        self.samplers = samplers
+        self.interval_ms = interval_ms
+        self.on_sample = on_sample
+        self.proc = None
+        self.stopped = False
+
+    def command(self, pw=None):
+        cmd = ["powermetrics", "--samplers", self.samplers, "-f", "plist", "-i", str(self.interval_ms)]
+        if os.geteuid() == 0:
+            return cmd
+        if pw:
+            return ["sudo", "-S", "-p", "", *cmd]
+        return ["sudo", "-n", *cmd]
+
+    def run(self, pw=None):
+        # Own session: sudo only relays signals sent from outside the command's process group
+        self.proc = subprocess.Popen(
+            self.command(pw), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        if self.stopped:    # kill() raced the launch
+            self.kill()
+        try:
+            self.proc.stdin.write((pw + "\n").encode() if pw else b"")
+            self.proc.stdin.close()
+        except Exception: pass
+        splitter, count = PlistSplitter(), 0
+        fd = self.proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            for doc in splitter.feed(chunk):
+                try:
+                    with timed("parse_powermetrics_plist"):
+                        fields = parse_pm_sample(plistlib.loads(doc))
+                except Exception: continue
+                self.on_sample(fields)
+                count += 1
+        self.proc.wait()
+        return count
+
+    def kill(self):
+        """SIGTERM, which sudo passes on to powermetrics; SIGKILL would only stop sudo
+        and leave the root child running with our pipe open. Waits for the exit."""
+        self.stopped = True
+        if self.proc:
+            try:
+                self.proc.terminate()
+                self.proc.wait(5)
+            except subprocess.TimeoutExpired:
+                try: self.proc.kill()
+                except Exception: pass
+            except Exception: pass
+
+
+# ═══════════════════════ Temperature sensor helper (framed) ══════════════
+
+class SensorFrames:
+    """Incremental decoder for the temperature helper's binary frames.
+
+    'N' u16 count, count x (u8 len, name)         -> ("names", [name, ...])
+    'S' u16 count, count x (u16 index, f32 degC)  -> ("sample", (idx, val, idx, val, ...))"""
+
+    _HDR = struct.Struct("<cH")
+
+    def __init__(self):
+        self._buf = b""
+        self._recs = {}  # record count -> compiled Struct
+
+    def _rec_struct(self, n):
+        st = self._recs.get(n)
+        if st is None:
+            st = self._recs[n] = struct.Struct("<" + "Hf" * n)
+        return st
+
+    def feed(self, data):
+        self._buf += data
+        buf, pos, out = self._buf, 0, []
+        while len(buf) - pos >= self._HDR.size:
+            kind, n = self._HDR.unpack_from(buf, pos)
+            body = pos + self._HDR.size
+            if kind == b"S":
+                st = self._rec_struct(n)
+                if len(buf) - body < st.size:
+                    break
+                out.append(("sample", st.unpack_from(buf, body)))
+                pos = body + st.size
+            elif kind == b"N":
+                names, p = [], body
+                while len(names) < n and p < len(buf) and p + 1 + buf[p] <= len(buf):
+                    names.append(buf[p + 1:p + 1 + buf[p]].decode(errors="replace"))
+                    p += 1 + buf[p]
+                if len(names) < n:
+                    break
+                out.append(("names", names))
+                pos = p
+            else:
+                pos = len(buf)  # out of sync — drop and wait for the next table
+        self._buf = buf[pos:]
+        return out
+
+
+# Substrings sent to the helper as its filter; classify_sensors() maps the result
+SENSOR_FILTER = ("tdie", "pmu tp")
+
+
+def classify_sensors(names):
+    """Split a name table into (cpu, gpu) index sets — once per table, not per sample."""
+    cpu, gpu = set(), set()
+    for i, name in enumerate(names):
+        name = name.strip().lower()
+        if "tdie" in name: cpu.add(i)
+        elif name.startswith("pmu tp") and name.endswith("g"): gpu.add(i)
+        elif name.startswith("pmu tp") and name.endswith("s"): cpu.add(i)
+    return frozenset(cpu), frozenset(gpu)
+
+
+class SensorStream:
+    """Drives the long-lived temperature helper.
+
+    Each sample is reduced to {"cpu_temp", "gpu_temp"} (max of each class,
+    1-130 °C) and passed to `on_sample(fields)`; run() blocks until the helper
+    exits and returns the number of samples delivered."""
+
+    def __init__(self, binary, interval_ms, on_sample):
+        self.binary = binary
+        self.interval_ms = interval_ms
+        self.on_sample = on_sample
+        self.proc = None
+
+    def _send(self, line):
+        try:
+            self.proc.stdin.write((line + "\n").encode())
+            self.proc.stdin.flush()
+        except Exception: pass
+
+    def set_interval(self, ms):
+        if ms != self.interval_ms:
+            self.interval_ms = ms
+            if self.proc:
+                self._send(f"i {ms}")
+
+    def run(self):
+        self.proc = subprocess.Popen(
+            [self.binary], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._send(f"i {self.interval_ms}")
+        self._send("f " + ",".join(SENSOR_FILTER))
+        frames, count = SensorFrames(), 0
+        cpu = gpu = frozenset()
+        fd = self.proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            for kind, payload in frames.feed(chunk):
+                if kind == "names":
+                    cpu, gpu = classify_sensors(payload)
+                    continue
+                ct = gt = None
+                for i in range(0, len(payload), 2):
+                    idx, v = payload[i], payload[i + 1]
+                    if v < 1 or v > 130: continue
+                    if idx in cpu: ct = v if ct is None or v > ct else ct
+                    elif idx in gpu: gt = v if gt is None or v > gt else gt
+                fields = {}
+                if ct is not None: fields["cpu_temp"] = ct
+                if gt is not None: fields["gpu_temp"] = gt
+                if fields:
+                    self.on_sample(fields)
+                count += 1
+        self.proc.wait()
+        return count
+
+    def kill(self):
+        if self.proc:
+            try: self.proc.kill()
+            except Exception: pass
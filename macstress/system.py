@@ -1,48 +1,137 @@
 """System detection and temperature sensor compilation."""
 
-import os, platform, subprocess, hashlib, tempfile
+import os, re, sys, json, ctypes, platform, subprocess, hashlib, threading
 import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from . import libc
+
+
+def cache_dir():
+    """Per-user cache directory (survives reboots, unlike the system temp dir)."""
+    if sys.platform == "darwin":
+        d = Path.home() / "Library" / "Caches" / "MacStress"
+    else:
+        d = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "macstress"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def data_dir():
+    """Per-user data directory for files worth keeping (recordings)."""
+    if sys.platform == "darwin":
+        d = Path.home() / "Library" / "Application Support" / "MacStress"
+    else:
+        d = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "macstress"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def _sysctl_str(name):
+    v = libc.sysctl_str(name)
+    return v.strip() if v is not None else subprocess.getoutput(f"sysctl -n {name}").strip()
+
+
+def _sysctl_int(name):
+    v = libc.sysctl(name, ctypes.c_int64)
+    return v.value if v is not None else int(subprocess.getoutput(f"sysctl -n {name}").strip())
+
+
+def _core_split(core_count):
+    try:
+        return _sysctl_int("hw.perflevel0.logicalcpu"), _sysctl_int("hw.perflevel1.logicalcpu")
+    except Exception:
+        return core_count, 0
+
+
+def _os_string():
+    vers = dict(l.split(":", 1) for l in subprocess.getoutput("sw_vers").splitlines() if ":" in l)
+    vers = {k.strip(): v.strip() for k, v in vers.items()}
+    return f"{vers.get('ProductName', '')} {vers.get('ProductVersion', '')} ({vers.get('BuildVersion', '')})"
+
+
+def _profiler_field(data_type, label):
+    """First `label: value` in `system_profiler <data_type>` output, or ''."""
+    try:
+        out = subprocess.run(["system_profiler", data_type], capture_output=True, text=True, timeout=30).stdout
+    except Exception:
+        return ""
+    m = re.search(rf"^\s*{re.escape(label)}:\s*(.+)$", out, re.M)
+    return m.group(1).strip() if m else ""
+
+
+def _fill_slow(info, key, path):
+    """system_profiler fields, filled into `info` in place (clients see them on the next frame)."""
+    with ThreadPoolExecutor(2) as pool:
+        model = pool.submit(_profiler_field, "SPHardwareDataType", "Model Name")
+        gpu = pool.submit(_profiler_field, "SPDisplaysDataType", "Chipset Model") if info["arch"] == "intel" else None
+        info["model_name"] = model.result() or info["model_id"]
+        if gpu:
+            info["gpu"] = gpu.result() or info["gpu"]
+    info["probing"] = False
+    if key:
+        try: path.write_text(json.dumps({"key": key, "info": info}))
+        except OSError: pass
 
 
 def detect_system():
+    """System info dict. Warm starts read it from a cache keyed by boot time and OS
+    build; cold starts probe in parallel and return before system_profiler finishes
+    (model_name/gpu hold placeholders while `probing` is True)."""
+    boot, build = libc.boot_time(), libc.sysctl_str("kern.osversion")
+    key = [boot, build] if boot and build else None
+    path = cache_dir() / "system.json"
+    if key:
+        try:
+            cached = json.loads(path.read_text())
+            if cached.get("key") == key:
+                return cached["info"]
+        except (OSError, ValueError, KeyError):
+            pass
+
     arch = platform.machine()
     is_apple_silicon = arch == "arm64"
-    cpu_brand = subprocess.getoutput("sysctl -n machdep.cpu.brand_string").strip()
     core_count = mp.cpu_count()
-    try:
-        perf_cores = int(subprocess.getoutput("sysctl -n hw.perflevel0.logicalcpu").strip())
-        eff_cores = int(subprocess.getoutput("sysctl -n hw.perflevel1.logicalcpu").strip())
-    except Exception:
-        perf_cores, eff_cores = core_count, 0
-    mem_bytes = int(subprocess.getoutput("sysctl -n hw.memsize").strip())
-    model_id = subprocess.getoutput("sysctl -n hw.model").strip()
-    model_name = subprocess.getoutput(
-        "system_profiler SPHardwareDataType 2>/dev/null | grep 'Model Name' | cut -d: -f2"
-    ).strip() or model_id
-    os_ver = subprocess.getoutput("sw_vers -productVersion").strip()
-    os_name = subprocess.getoutput("sw_vers -productName").strip()
-    os_build = subprocess.getoutput("sw_vers -buildVersion").strip()
-    gpu_name = cpu_brand if is_apple_silicon else (
-        subprocess.getoutput(
-            "system_profiler SPDisplaysDataType 2>/dev/null | grep 'Chipset Model' | head -1 | cut -d: -f2"
-        ).strip() or "Intel Integrated"
-    )
-    return {
-        "arch": "apple_silicon" if is_apple_silicon else "intel",
-        "cpu": cpu_brand, "model_id": model_id, "model_name": model_name,
-        "gpu": gpu_name, "os": f"{os_name} {os_ver} ({os_build})",
-        "cores": core_count, "perf_cores": perf_cores, "eff_cores": eff_cores,
-        "ram_gb": round(mem_bytes / (1024**3), 1),
-    }
+    with ThreadPoolExecutor(6) as pool:
+        cpu_brand = pool.submit(_sysctl_str, "machdep.cpu.brand_string")
+        split = pool.submit(_core_split, core_count)
+        mem_bytes = pool.submit(_sysctl_int, "hw.memsize")
+        model_id = pool.submit(_sysctl_str, "hw.model")
+        os_str = pool.submit(_os_string)
+        cpu_brand, model_id = cpu_brand.result(), model_id.result()
+        perf_cores, eff_cores = split.result()
+        info = {
+            "arch": "apple_silicon" if is_apple_silicon else "intel",
+            "cpu": cpu_brand, "model_id": model_id, "model_name": model_id,
+            "gpu": cpu_brand if is_apple_silicon else "Intel Integrated", "os": os_str.result(),
+            "cores": core_count, "perf_cores": perf_cores, "eff_cores": eff_cores,
+            "ram_gb": round(mem_bytes.result() / (1024**3), 1),
+            "probing": True,
+        }
+    threading.Thread(target=_fill_slow, args=(info, key, path), daemon=True).start()
+    return info
 
 
 # ═══════════════════════ Temperature Sensor (Apple Silicon) ══════════════
 # Based on fermion-star/apple_sensors (BSD-3-Clause license)
 
 TEMP_SENSOR_SRC = r'''
+// Long-lived helper: resolves the HID temperature services once, then writes
+// binary frames to stdout (native little-endian):
+//   'N' u16 count, count x (u8 len, name bytes)   name table, on (re)resolve
+//   'S' u16 count, count x (u16 index, f32 degC)   one sample
+// Commands on stdin, one per line:
+//   i <ms>          sampling interval (min 50)
+//   f <a,b,...>     only sensors whose name contains one of the substrings
+//   r               re-resolve the service list
+// Exits when stdin is closed.
 #include <stdio.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
 #include <unistd.h>
+#include <poll.h>
 #import <Foundation/Foundation.h>
 #import <IOKit/hidsystem/IOHIDEventSystemClient.h>
 
@@ -55,6 +144,7 @@ typedef float IOHIDFloat;
 #endif
 #define kIOHIDEventTypeTemperature 15
 #define IOHIDEventFieldBase(type) (type << 16)
+#define MAX_SENSORS 256
 
 IOHIDEventSystemClientRef IOHIDEventSystemClientCreate(CFAllocatorRef allocator);
 int IOHIDEventSystemClientSetMatching(IOHIDEventSystemClientRef client, CFDictionaryRef match);
@@ -62,6 +152,81 @@ IOHIDEventRef IOHIDServiceClientCopyEvent(IOHIDServiceClientRef, int64_t, int32_
 CFStringRef IOHIDServiceClientCopyProperty(IOHIDServiceClientRef service, CFStringRef property);
 IOHIDFloat IOHIDEventGetFloatValue(IOHIDEventRef event, int32_t field);
 
+#pragma pack(push, 1)
+typedef struct { uint16_t idx; float val; } rec_t;
+#pragma pack(pop)
+
+static IOHIDEventSystemClientRef sys_client;
+static CFArrayRef services;
+static IOHIDServiceClientRef sensors[MAX_SENSORS];
+static char names[MAX_SENSORS][64];
+static int n_sensors;
+static char filter[512];
+static int interval_ms = 1000;
+
+static int matches(const char *name) {
+    if (!filter[0]) return 1;
+    char buf[sizeof(filter)];
+    strcpy(buf, filter);
+    for (char *tok = strtok(buf, ","); tok; tok = strtok(NULL, ","))
+        if (*tok && strcasestr(name, tok)) return 1;
+    return 0;
+}
+
+static void resolve(void) {
+    if (services) CFRelease(services);
+    services = IOHIDEventSystemClientCopyServices(sys_client);
+    n_sensors = 0;
+    long count = services ? CFArrayGetCount(services) : 0;
+    for (long i = 0; i < count && n_sensors < MAX_SENSORS; i++) {
+        IOHIDServiceClientRef sc = (IOHIDServiceClientRef)CFArrayGetValueAtIndex(services, i);
+        CFStringRef name = IOHIDServiceClientCopyProperty(sc, CFSTR("Product"));
+        if (!name) continue;
+        char buf[64];
+        Boolean ok = CFStringGetCString(name, buf, sizeof(buf), kCFStringEncodingUTF8);
+        CFRelease(name);
+        if (!ok || !matches(buf)) continue;
+        sensors[n_sensors] = sc;
+        strcpy(names[n_sensors++], buf);
+    }
+    uint16_t n = n_sensors;
+    putchar('N'); fwrite(&n, sizeof(n), 1, stdout);
+    for (int i = 0; i < n_sensors; i++) {
+        uint8_t len = strlen(names[i]);
+        putchar(len); fwrite(names[i], 1, len, stdout);
+    }
+    fflush(stdout);
+}
+
+static void sample(void) {
+    static rec_t recs[MAX_SENSORS];
+    uint16_t k = 0;
+    for (int i = 0; i < n_sensors; i++) {
+        IOHIDEventRef event = IOHIDServiceClientCopyEvent(sensors[i], kIOHIDEventTypeTemperature, 0, 0);
+        if (!event) continue;
+        double val = IOHIDEventGetFloatValue(event, IOHIDEventFieldBase(kIOHIDEventTypeTemperature));
+        CFRelease(event);
+        if (val > 0) { recs[k].idx = i; recs[k].val = (float)val; k++; }
+    }
+    putchar('S'); fwrite(&k, sizeof(k), 1, stdout);
+    fwrite(recs, sizeof(rec_t), k, stdout);
+    fflush(stdout);
+}
+
+static void command(char *line) {
+    if (line[0] == 'i') {
+        int ms = atoi(line + 1);
+        if (ms >= 50) interval_ms = ms;
+    } else if (line[0] == 'f') {
+        char *f = line + 1;
+        while (*f == ' ') f++;
+        strncpy(filter, f, sizeof(filter) - 1);
+        resolve();
+    } else if (line[0] == 'r') {
+        resolve();
+    }
+}
+
 int main() {
     CFNumberRef nums[2]; CFStringRef keys[2];
     int page = 0xff00, usage = 5;
@@ -71,53 +236,83 @@ int main() {
     nums[1] = CFNumberCreate(0, kCFNumberSInt32Type, &usage);
     CFDictionaryRef match = CFDictionaryCreate(0, (const void**)keys, (const void**)nums, 2,
                               &kCFTypeDictionaryKeyCallBacks, &kCFTypeDictionaryValueCallBacks);
+    sys_client = IOHIDEventSystemClientCreate(kCFAllocatorDefault);
+    IOHIDEventSystemClientSetMatching(sys_client, match);
+    resolve();
+
+    char in[1024]; size_t in_len = 0;
+    struct pollfd pfd = {0, POLLIN, 0};
     while (1) {
-        IOHIDEventSystemClientRef system = IOHIDEventSystemClientCreate(kCFAllocatorDefault);
-        IOHIDEventSystemClientSetMatching(system, match);
-        CFArrayRef srvs = IOHIDEventSystemClientCopyServices(system);
-        if (srvs) {
-            long count = CFArrayGetCount(srvs);
-            for (int i = 0; i < count; i++) {
-                IOHIDServiceClientRef sc = (IOHIDServiceClientRef)CFArrayGetValueAtIndex(srvs, i);
-                CFStringRef name = IOHIDServiceClientCopyProperty(sc, CFSTR("Product"));
-                IOHIDEventRef event = IOHIDServiceClientCopyEvent(sc, kIOHIDEventTypeTemperature, 0, 0);
-                double val = 0;
-                if (event) { val = IOHIDEventGetFloatValue(event, IOHIDEventFieldBase(kIOHIDEventTypeTemperature)); CFRelease(event); }
-                if (name && val > 0) {
-                    char buf[256];
-                    CFStringGetCString(name, buf, sizeof(buf), kCFStringEncodingUTF8);
-                    printf("%s: %.2f\n", buf, val);
-                }
-                if (name) CFRelease(name);
-            }
-            CFRelease(srvs);
+        sample();
+        // Sleep for the interval, waking early to apply commands from stdin
+        if (poll(&pfd, 1, interval_ms) > 0) {
+            ssize_t r = read(0, in + in_len, sizeof(in) - 1 - in_len);
+            if (r <= 0) return 0;
+            in_len += r; in[in_len] = 0;
+            char *line = in, *nl;
+            while ((nl = strchr(line, '\n'))) { *nl = 0; command(line); line = nl + 1; }
+            in_len = strlen(line);
+            memmove(in, line, in_len + 1);
+            if (in_len == sizeof(in) - 1) in_len = 0;
         }
-        CFRelease(system);
-        printf("---\n"); fflush(stdout);
-        usleep(1500000);
     }
     return 0;
 }
 '''
 
 
+def _sensor_build_key():
+    """Cache key for the helper binary: source, compiler identity and target arch."""
+    try:
+        cc = subprocess.run(["clang", "--version"], capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return None
+    if not cc:
+        return None
+    h = hashlib.sha256(TEMP_SENSOR_SRC.encode())
+    h.update(cc.encode())
+    h.update(platform.machine().encode())
+    return h.hexdigest()[:16]
+
+
 def compile_temp_sensor():
-    sensor_dir = Path(tempfile.gettempdir()) / "macstress_sensor"
+    """Path to the sensor helper — a cached build when the key matches, else a fresh one.
+    If compiling fails, the last good build is returned instead (or None)."""
+    sensor_dir = cache_dir() / "sensor"
     sensor_dir.mkdir(exist_ok=True)
-    src = sensor_dir / "temp_sensor.m"
-    binary = sensor_dir / "temp_sensor"
-    src_hash = hashlib.md5(TEMP_SENSOR_SRC.encode()).hexdigest()[:8]
-    hash_file = sensor_dir / "hash.txt"
-    if binary.exists() and hash_file.exists() and hash_file.read_text().strip() == src_hash:
-        return str(binary)
-    src.write_text(TEMP_SENSOR_SRC)
-    r = subprocess.run(
-        ['clang', '-Wall', '-O2', str(src), '-framework', 'IOKit', '-framework', 'Foundation', '-o', str(binary)],
-        capture_output=True, text=True, timeout=30
-    )
-    if r.returncode == 0:
-        hash_file.write_text(src_hash)
-        print("  ✅ Temperature sensor compiled")
-        return str(binary)
-    print(f"  ⚠️  Sensor compile failed: {r.stderr[:200]}")
+    last_good = sensor_dir / "last_good"
+    key = _sensor_build_key()
+    if key:
+        binary = sensor_dir / f"temp_sensor-{key}"
+        if binary.exists():
+            return str(binary)
+        src = sensor_dir / f"temp_sensor-{key}.m"
+        tmp = sensor_dir / f".temp_sensor-{key}.{os.getpid()}"
+        try:
+            src.write_text(TEMP_SENSOR_SRC)
+            r = subprocess.run(
+                ['clang', '-Wall', '-O2', str(src), '-framework', 'IOKit', '-framework', 'Foundation', '-o', str(tmp)],
+                capture_output=True, text=True, timeout=60
+            )
+            err = r.stderr if r.returncode else None
+        except Exception as e:
+            err = str(e)
+        src.unlink(missing_ok=True)
+        if err is None:
+            os.replace(tmp, binary)  # atomic — a concurrent launch never sees a partial binary
+            for old in sensor_dir.glob("temp_sensor-*"):
+                if old != binary:
+                    old.unlink(missing_ok=True)
+            last_good.write_text(binary.name)
+            print("  ✅ Temperature sensor compiled")
+            return str(binary)
+        tmp.unlink(missing_ok=True)
+        print(f"  ⚠️  Sensor compile failed: {err[:200]}")
+    try:
+        prev = sensor_dir / last_good.read_text().strip()
+        if prev.exists():
+            print("  ♻️  Using last good temperature sensor build")
+            return str(prev)
+    except OSError:
+        pass
     return None
@@ -0,0 +1,165 @@
+"""Collector self-timing and the Prometheus text exposition served at /metrics.
+
+Histograms are cheap enough to observe on every step (a lock and a bisect).
+The exposition text is rendered from the published snapshots and cached for
+RENDER_TTL seconds, so any scrape rate costs at most one render per second."""
+
+import time, threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+RENDER_TTL = 1.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STEP_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+AGE_BUCKETS = (.5, 1, 2, 3, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per value of a single label."""
+
+    def __init__(self, name, help, label, buckets):
+        self.name, self.help, self.label = name, help, label
+        self.buckets = buckets
+        self._series = {}   # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, key):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[i] += 1
+            s[-1] += value
+
+    def lines(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, s in sorted(series.items()):
+            lbl = f'{self.label}="{_escape(key)}"'
+            acc = 0
+            for le, n in zip(self.buckets, s):
+                acc += n
+                out.append(f'{self.name}_bucket{{{lbl},le="{le:g}"}} {acc}')
+            acc += s[len(self.buckets)]
+            out.append(f'{self.name}_bucket{{{lbl},le="+Inf"}} {acc}')
+            out.append(f"{self.name}_sum{{{lbl}}} {s[-1]:.6f}")
+            out.append(f"{self.name}_count{{{lbl}}} {acc}")
+        return out
+
+
+SOURCE_SECONDS = Histogram("macstress_source_duration_seconds",
+                           "Wall time of one scheduled metric source run.", "source", STEP_BUCKETS)
+STEP_SECONDS = Histogram("macstress_step_duration_seconds",
+                         "Wall time of one collector step (command or parser).", "step", STEP_BUCKETS)
+SAMPLE_AGE = Histogram("macstress_sample_age_seconds",
+                       "Age of the previous successful sample when a source refreshes it.", "source", AGE_BUCKETS)
+
+_last_ok = {}   # source -> wall-clock time of its last successful sample
+
+
+@contextmanager
+def timed(step):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STEP_SECONDS.observe(time.perf_counter() - t0, step)
+
+
+def sample_ok(source, now=None):
+    """Record a successful sample; observes how stale the previous one had become."""
+    now = now or time.time()
+    prev = _last_ok.get(source)
+    if prev:
+        SAMPLE_AGE.observe(now - prev, source)
+    _last_ok[source] = now
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**kw):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in kw.items()) + "}"
+
+
+def _num(v):
+    if isinstance(v, bool):
+        return int(v)
+    return v if isinstance(v, (int, float)) else None
+
+
+# String fields with a small fixed set of values, exported one-hot; other strings
+# (drive model, serial, process names) would be unbounded label values and are skipped
+ENUMS = {"sample_mode": ("stress", "viewing", "idle")}
+
+
+def _gauges(prefix, fields, out):
+    """Every field of a data/details snapshot as gauges: numbers and booleans directly,
+    numeric sequences by index, lists of records by rank, known enums one-hot."""
+    for k, v in sorted(fields.items()):
+        name = f"{prefix}_{k}"
+        if v is None:
+            continue
+        if _num(v) is not None:
+            out.append(f"{name} {_num(v)}")
+        elif isinstance(v, str):
+            out += [f"{name}{_labels(value=e)} {int(v == e)}" for e in ENUMS.get(k, ())]
+        elif isinstance(v, (list, tuple)):
+            records = [item for item in v if isinstance(item, dict)]
+            # One contiguous group per family, as the text format requires. Records are
+            # labelled by position: names repeat (many "Python" workers) and churn.
+            for f in sorted({f for item in records for f, x in item.items() if _num(x) is not None}):
+                out += [f"{name}_{f}{_labels(rank=i)} {_num(item[f])}"
+                        for i, item in enumerate(records) if _num(item.get(f)) is not None]
+            out += [f"{name}{_labels(index=i)} {_num(x)}" for i, x in enumerate(v) if _num(x) is not None]
+
+
+class Exposition:
+    """Renders /metrics from the collector's published snapshots (no collector lock)."""
+
+    TESTS = ("cpu", "gpu", "memory", "disk")
+
+    def __init__(self, mc, sm, si):
+        self.mc, self.sm, self.si = mc, sm, si
+        self._text, self._at = b"", 0.0
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def render(self):
+        with self._lock:
+            if self._text and time.monotonic() - self._at < RENDER_TTL:
+                return self._text
+            t0 = time.perf_counter()
+            self._text = self._render().encode()
+            self._at = time.monotonic()
+            self.renders += 1
+            STEP_SECONDS.observe(time.perf_counter() - t0, "render_metrics")
+            return self._text
+
+    def _render(self):
+        si = self.si
+        out = [f"macstress_system_info{_labels(model=si.get('model_name', ''), model_id=si.get('model_id', ''), cpu=si.get('cpu', ''), gpu=si.get('gpu', ''), os=si.get('os', ''), arch=si.get('arch', ''))} 1",
+               f"macstress_cores {si.get('cores', 0)}", f"macstress_ram_gb {si.get('ram_gb', 0)}"]
+        _gauges("macstress", self.mc.get_snapshot(), out)
+        _gauges("macstress_detail", self.mc.get_details(), out)
+        active = set(self.sm.get_active())
+        out += ["# TYPE macstress_stress_active gauge"]
+        out += [f"macstress_stress_active{_labels(test=t)} {int(t in active)}" for t in self.TESTS]
+        now = time.time()
+        stats = self.mc.scheduler.stats()
+        for metric, key, kind in (("macstress_source_runs_total", "runs", "counter"),
+                                  ("macstress_source_errors_total", "errors", "counter"),
+                                  ("macstress_source_skipped_total", "skipped", "counter"),
+                                  ("macstress_source_interval_seconds", "effective", "gauge")):
+            out.append(f"# TYPE {metric} {kind}")
+            out += [f"{metric}{_labels(source=n)} {s[key]}" for n, s in sorted(stats.items())]
+        out.append("# TYPE macstress_source_last_success_age_seconds gauge")
+        out += [f"macstress_source_last_success_age_seconds{_labels(source=n)} {now - t:.3f}"
+                for n, t in sorted(_last_ok.items())]
+        for h in (SOURCE_SECONDS, STEP_SECONDS, SAMPLE_AGE):
+            out += h.lines()
+        return "\n".join(out) + "\n"
@@ -5,10 +5,11 @@ from . import VERSION, GITHUB_REPO
 
 # All package modules to download during self-update
 _PKG_MODULES = [
-    "__init__.py", "__main__.py", "benchmark.py", "dashboard.py",
-    "launchd.py", "launcher.py", "metrics.py", "native_app.py",
-    "popover.py", "server.py", "stress.py", "stress_manager.py",
-    "sudo.py", "system.py", "updater.py",
+    "__init__.py", "__main__.py", "async_server.py", "benchmark.py", "dashboard.py", "diskio.py",
+    "drive.py", "events.py", "export.py", "history.py", "launchd.py", "launcher.py", "libc.py",
+    "metrics.py", "native_app.py", "popover.py", "procs.py", "recorder.py", "replay.py",
+    "scheduler.py", "server.py", "streams.py", "stress.py", "stress_manager.py", "sudo.py",
+    "system.py", "telemetry.py", "updater.py", "websocket.py",
 ]
 
 
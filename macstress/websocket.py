@@ -0,0 +1,146 @@
+"""Binary WebSocket metrics stream (/ws) — sans-IO, shared by both HTTP servers.
+
+After the handshake the server sends one text frame, the schema:
+    {"v": 1, "fields": [...], "rate": hz, "layout": "<d{n}f"}
+and then one binary frame per changed sample: little-endian f64 send time
+(wall clock) followed by one f32 per field (NaN = missing). A browser reads it with
+DataView.getFloat64(0, true) and new Float32Array(buf, 8, n).
+
+Query parameters pick the subset and the rate cap (/ws?fields=a,b&rate=10);
+a text message {"fields": [...], "rate": hz} changes them and re-sends the schema.
+Unknown fields are ignored and a bad rate falls back to DEFAULT_RATE; a message
+that is not a JSON object closes the stream with 1003, an oversized one with 1009.
+Frames go out only when one of the selected values changed. The session's rate is
+registered with the collector (stream_rate), which speeds up powermetrics and
+the temperature helper to match while it is connected; close() releases it.
+Polled sources (CPU, memory, disk) keep their scheduler interval."""
+
+import json, math, time, base64, struct, hashlib
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_RATE = 20.0
+MIN_RATE = 0.1
+DEFAULT_RATE = 10.0
+MAX_MESSAGE = 64 * 1024     # client messages are small JSON objects
+NAN = float("nan")
+
+OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+def handshake(key):
+    """101 response bytes for a client's Sec-WebSocket-Key."""
+    accept = base64.b64encode(hashlib.sha1((key.strip() + GUID).encode()).digest()).decode()
+    return (f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode()
+
+
+def frame(opcode, payload):
+    """One unmasked, unfragmented server frame."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+class Session:
+    """One /ws client: decodes its frames, encodes samples at most `rate` times a second."""
+
+    def __init__(self, mc, fields=None, rate=None):
+        self.mc = mc
+        self.closed = False
+        self._buf = b""
+        self._last = None
+        self._sent_at = 0.0
+        self.configure(fields, rate)
+
+    def configure(self, fields=None, rate=None):
+        allowed = self.mc.HISTORY_FIELDS
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        if not isinstance(fields, (list, tuple)):
+            fields = ()
+        self.fields = tuple(f for f in fields if isinstance(f, str) and f in allowed) or allowed
+        try: rate = float(rate or DEFAULT_RATE)
+        except (TypeError, ValueError): rate = DEFAULT_RATE
+        self.rate = min(max(rate, MIN_RATE), MAX_RATE) if math.isfinite(rate) else DEFAULT_RATE
+        self._rec = struct.Struct(f"<d{len(self.fields)}f")
+        self._last = None
+        self.mc.stream_rate(self, self.rate)
+
+    def close(self):
+        self.closed = True
+        self.mc.stream_rate(self, None)
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate
+
+    def wait(self):
+        """Seconds until the next sample may be sent."""
+        return max(0.0, self._sent_at + self.interval - time.monotonic())
+
+    def schema(self):
+        return frame(OP_TEXT, json.dumps({"v": 1, "fields": self.fields, "rate": self.rate,
+                                          "layout": self._rec.format}).encode())
+
+    def sample(self):
+        """Binary frame for the current snapshot, or None if nothing selected changed,
+        the rate cap has not elapsed or the session is closed."""
+        if self.closed or self.wait() > 0:
+            return None
+        snap = self.mc.get_snapshot()
+        vals = [snap.get(f) for f in self.fields]
+        vals = [NAN if v is None else v for v in vals]
+        if vals == self._last:      # missing fields share the NAN object, so they compare equal
+            return None
+        self._last = vals
+        self._sent_at = time.monotonic()
+        # Stamped now: snapshot "timestamp" only moves with the CPU source, not power or sensors
+        return frame(OP_BINARY, self._rec.pack(time.time(), *vals))
+
+    def feed(self, data):
+        """Decode client bytes; returns frames to send back (pong, schema, close)."""
+        self._buf += data
+        out = []
+        while len(self._buf) >= 2:
+            b0, b1 = self._buf[0], self._buf[1]
+            op, masked, n, pos = b0 & 0x0F, b1 & 0x80, b1 & 0x7F, 2
+            if n == 126:
+                if len(self._buf) < 4: break
+                n, pos = struct.unpack_from("!H", self._buf, 2)[0], 4
+            elif n == 127:
+                if len(self._buf) < 10: break
+                n, pos = struct.unpack_from("!Q", self._buf, 2)[0], 10
+            if n > MAX_MESSAGE:
+                return out + [self._close(1009)]
+            if len(self._buf) < pos + (4 if masked else 0) + n:
+                break
+            mask = self._buf[pos:pos + 4] if masked else None
+            pos += 4 if masked else 0
+            payload = self._buf[pos:pos + n]
+            self._buf = self._buf[pos + n:]
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if op == OP_CLOSE:
+                self.close()
+                out.append(frame(OP_CLOSE, payload[:2]))
+                break
+            if op == OP_PING:
+                out.append(frame(OP_PONG, payload))
+            elif op == OP_TEXT:
+                try: msg = json.loads(payload)
+                except ValueError: msg = None
+                if not isinstance(msg, dict):
+                    out.append(self._close(1003))
+                    break
+                self.configure(msg.get("fields"), msg.get("rate"))
+                out.append(self.schema())
+        return out
+
+    def _close(self, code):
+        self.close()
+        return frame(OP_CLOSE, struct.pack("!H", code))
@@ -0,0 +1,6 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYS_INFO = {"arch": "intel", "cores": 4, "ram_gb": 16.0, "eff_cores": 0, "model_name": "Test Mac",
+            "cpu": "Test CPU", "gpu": "Test GPU", "os": "macOS 14.0", "model_id": "Mac0,0"}
@@ -0,0 +1,88 @@
+import json, socket, threading, http.client
+
+import pytest
+
+from macstress import server
+from macstress.async_server import AsyncHTTPServer
+from macstress.metrics import MetricsCollector
+from conftest import SYS_INFO
+
+
+class FakeStress:
+    def get_active(self): return []
+
+
+@pytest.fixture
+def srv():
+    mc = MetricsCollector(dict(SYS_INFO))
+    server.set_globals(mc, FakeStress(), mc.sys_info)
+    s = AsyncHTTPServer(("127.0.0.1", 0))
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    yield s
+    server._hub.stop()
+    s.shutdown()
+
+
+def _conn(srv):
+    return http.client.HTTPConnection(*srv.server_address, timeout=5)
+
+
+def _events(srv, path="/events"):
+    s = socket.create_connection(srv.server_address, timeout=5)
+    s.sendall(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+    buf = b""
+    while b"\n\n" not in buf.split(b"\r\n\r\n", 1)[-1]:
+        buf += s.recv(65536)
+    return s, buf
+
+
+def test_keep_alive_reuses_the_connection(srv):
+    c, socks = _conn(srv), set()
+    for _ in range(3):
+        c.request("GET", "/api/status")
+        r = c.getresponse()
+        assert r.status == 200
+        assert json.loads(r.read())["sys_info"]["model_name"] == "Test Mac"
+        socks.add(c.sock)
+    assert len(socks) == 1
+    c.request("GET", "/no-such-route")
+    r = c.getresponse()
+    assert r.status == 404 and r.getheader("Connection") == "close"
+
+
+def test_blocking_route_runs_on_the_executor(srv):
+    c = _conn(srv)
+    c.request("GET", "/api/history?fields=cpu_usage")
+    r = c.getresponse()
+    assert r.status == 200
+    assert "cpu_usage" in json.loads(r.read())["series"]
+    sock = c.sock
+    c.request("GET", "/api/status")     # the executor handed the connection back to the loop
+    r = c.getresponse()
+    assert r.status == 200 and c.sock is sock
+    r.read()
+    c.request("GET", "/api/history?start=nan")
+    r = c.getresponse()
+    assert r.status == 400
+    r.read()
+
+
+def test_events_stream(srv):
+    s, buf = _events(srv, "/events?details=1")
+    head, body = buf.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"text/event-stream" in head
+    data = json.loads(body.split(b"data: ", 1)[1].split(b"\n", 1)[0])
+    assert data["key"] == 1 and "details" in data
+    assert server._hub.stats()["details_subscribers"] == 1
+    s.close()
+
+
+def test_event_streams_do_not_add_threads(srv):
+    first, _ = _events(srv)     # the hub thread starts with the first subscriber
+    before = threading.active_count()
+    streams = [_events(srv)[0] for _ in range(20)]
+    assert server._hub.stats()["subscribers"] == 21
+    assert threading.active_count() == before
+    for s in streams + [first]:
+        s.close()
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from macstress import events
+from macstress.events import EventHub, Subscriber, sse_frame
+from conftest import SYS_INFO
+
+
+class FakeCollector:
+    def __init__(self):
+        self.snap = {"cpu_usage": 1.0, "mem_used_gb": 4.0}
+        self.details = {"sample_interval_s": 1.0, "top_pid": 1}
+        self.clients = 0
+
+    def get_snapshot(self): return dict(self.snap)
+    def get_details(self): return dict(self.details)
+    def client_connected(self): self.clients += 1
+    def client_disconnected(self): self.clients -= 1
+
+
+class FakeStress:
+    active = []
+    def get_active(self): return list(self.active)
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.setattr(EventHub, "_loop", lambda self: None)  # ticks are driven by the test
+    return EventHub(FakeCollector(), FakeStress(), dict(SYS_INFO))
+
+
+def parse(frame):
+    head, data = frame.decode().rstrip("\n").split("\n")
+    assert head.startswith("id: ") and data.startswith("data: ")
+    msg = json.loads(data[6:])
+    assert int(head[4:]) == msg["seq"]
+    return msg
+
+
+def test_sse_frame():
+    assert sse_frame({"a": 1}) == b'data: {"a":1}\n\n'
+    assert sse_frame({"a": 1}, 7) == b'id: 7\ndata: {"a":1}\n\n'
+
+
+def test_first_frame_is_a_keyframe(hub):
+    sub = hub.subscribe()
+    key = parse(sub.pop())
+    assert key["v"] == events.PROTOCOL and key["key"] == 1 and key["seq"] == 1
+    assert key["metrics"] == {"cpu_usage": 1.0, "mem_used_gb": 4.0}
+    assert key["active"] == [] and key["sys_info"] == SYS_INFO
+    assert "details" not in key
+    assert hub.mc.clients == 1
+
+
+def test_deltas_carry_only_changes(hub):
+    sub = hub.subscribe()
+    sub.pop()
+    hub.publish()
+    assert sub.pop() is None                # nothing changed, no frame
+    hub.mc.snap["cpu_usage"] = 2.0
+    hub.publish()
+    assert parse(sub.pop()) == {"seq": 2, "metrics": {"cpu_usage": 2.0}}
+    hub.sm.active = ["cpu"]
+    hub.mc.snap["gpu_usage"] = 5.0
+    hub.publish()
+    assert parse(sub.pop()) == {"seq": 3, "metrics": {"gpu_usage": 5.0}, "active": ["cpu"]}
+
+
+def test_merging_deltas_rebuilds_the_state(hub):
+    sub = hub.subscribe()
+    state = parse(sub.pop())["metrics"]
+    for i in range(5):
+        hub.mc.snap["cpu_usage"] = float(i)
+        hub.mc.snap["swap_gb"] = i // 2
+        hub.publish()
+        state.update(parse(sub.pop())["metrics"])
+    late = hub.subscribe()
+    assert parse(late.pop())["metrics"] == state == hub.mc.get_snapshot()
+
+
+def test_details_only_for_subscribers_that_ask(hub):
+    plain, detailed = hub.subscribe(), hub.subscribe(details=True)
+    assert "details" not in parse(plain.pop())
+    assert parse(detailed.pop())["details"] == hub.mc.details
+    hub.mc.details["top_pid"] = 2
+    hub.publish()
+    assert parse(detailed.pop()) == {"seq": 2, "metrics": {}, "details": {"top_pid": 2}}
+    assert parse(plain.pop()) == {"seq": 2, "metrics": {}}
+
+
+def test_overflow_replaces_the_queue_with_a_keyframe(hub):
+    sub = hub.subscribe()
+    for i in range(events.MAX_PENDING + 2):
+        hub.mc.snap["cpu_usage"] = 10.0 + i
+        hub.publish()
+    frames = [parse(f) for f in iter(sub.pop, None)]
+    assert sub.skipped > 0
+    keys = [f for f in frames if f.get("key")]
+    assert len(keys) == 1
+    state = dict(keys[0]["metrics"])
+    for f in frames[frames.index(keys[0]) + 1:]:
+        state.update(f["metrics"])
+    assert state == hub.mc.get_snapshot()
+    seqs = [f["seq"] for f in frames]
+    assert seqs == list(range(seqs[0], seqs[0] + len(seqs)))
+
+
+def test_lagging_subscriber_is_dropped(hub):
+    slow, fast = hub.subscribe(), hub.subscribe()
+    for i in range(events.DROP_AFTER):
+        hub.mc.snap["cpu_usage"] = float(i)
+        hub.publish()
+        fast.pop()
+    assert slow.closed and not fast.closed
+    assert hub.dropped == 1 and hub.stats()["subscribers"] == 1
+    assert hub.mc.clients == 1
+
+
+def test_subscriber_get_times_out_and_wakes_on_close():
+    sub = Subscriber()
+    assert sub.get(timeout=0.01) is None
+    sub.close()
+    assert sub.get() is None and sub.closed
@@ -0,0 +1,83 @@
+import pytest
+
+from macstress.history import History, lttb
+
+
+def test_bucket_stats_at_10hz():
+    h = History(("a",))
+    for i in range(20):     # 2 s at 10 Hz: values 0..9, then 10..19
+        h.append(1000 + i / 10, {"a": i})
+    assert h.query(1000, 1001, stat="mean") == (1, [1000.0, 1001.0], {"a": [4.5, 14.5]})
+    assert h.query(1000, 1001, stat="min")[2]["a"] == [0, 10]
+    assert h.query(1000, 1001, stat="max")[2]["a"] == [9, 19]
+
+
+def test_missing_values_are_none():
+    h = History(("a", "b"))
+    h.append(1000, {"a": 1.0})
+    h.append(1001, {"a": 2.0, "b": None})
+    assert h.query(1000, 1001)[2] == {"a": [1.0, 2.0], "b": [None, None]}
+
+
+def test_cascade_to_coarser_tier():
+    h = History(("a",), tiers=((1, 5), (10, 100)))
+    for i in range(40):
+        h.append(1000 + i, {"a": i})
+    assert h.tiers[0].size == 5     # ring wrapped: only the last 5 s at 1 s
+    res, t, cols = h.query(1000, 1040)
+    assert res == 10
+    assert t == [1000.0, 1010.0, 1020.0, 1030.0]
+    assert cols["a"][:3] == [4.5, 14.5, 24.5]
+
+
+def test_fine_tier_used_while_it_covers_start():
+    h = History(("a",), tiers=((1, 5), (10, 100)))
+    for i in range(40):
+        h.append(1000 + i, {"a": i})
+    assert h.query(1036, 1039)[0] == 1
+
+
+def test_clock_step_back_keeps_tier_sorted():
+    h = History(("a",))
+    for ts in (100, 101, 105, 103, 106, 104, 107, 50, 108):
+        h.append(ts, {"a": ts})
+    t = h.query(0, 200)[1]
+    assert t == sorted(t) == [100, 101, 105, 106, 107, 108]
+
+
+def test_span_and_fixed_memory():
+    h = History(("a", "b"))
+    assert h.span() is None
+    before = h.nbytes()
+    for i in range(5000):
+        h.append(1200 + i, {"a": i, "b": i})
+    assert h.span() == (1200, 6199)     # bucket starts, aligned for every tier
+    assert h.nbytes() == before
+
+
+def test_series_downsamples_with_offsets():
+    h = History(("a",))
+    for i in range(1000):
+        h.append(2000 + i, {"a": 100 if i == 500 else 1})
+    s = h.series(2000, 2999, points=50)
+    pts = s["series"]["a"]
+    assert s["res"] == 1 and s["t0"] == 2000
+    assert len(pts["t"]) == 50 and pts["t"][0] == 0 and pts["t"][-1] == 999
+    assert 100 in pts["v"]      # the spike survives downsampling
+
+
+def test_lttb_edge_cases():
+    t = list(range(10))
+    assert lttb(t, [1] * 10, 20) == list(zip(t, [1] * 10))
+    assert lttb(t, [None, 1, None] + [2] * 7, 100) == [(1, 1)] + [(i, 2) for i in range(3, 10)]
+    assert lttb(t, list(range(10)), 2) == [(0, 0), (9, 9)]
+    assert lttb([], [], 5) == []
+
+
+@pytest.mark.parametrize("n", [3, 10, 99])
+def test_lttb_keeps_endpoints_and_bound(n):
+    t = list(range(1000))
+    v = [(i * 37) % 101 for i in t]
+    out = lttb(t, v, n)
+    assert len(out) == n and out[0] == (0, v[0]) and out[-1] == (999, v[-1])
+    assert [x for x, _ in out] == sorted(x for x, _ in out)
@@ -0,0 +1,149 @@
+import os, sys, stat, time, plistlib, threading
+from pathlib import Path
+
+import pytest
+
+from macstress import metrics
+from macstress.streams import PlistSplitter, parse_pm_sample, PowermetricsStream
+from conftest import SYS_INFO
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _fixture(name):
+    return (FIXTURES / name).read_bytes()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 512, 1 << 20])
+def test_splitter_any_chunking(chunk):
+    data = _fixture("powermetrics_apple_silicon.plist")
+    sp, docs = PlistSplitter(), []
+    for i in range(0, len(data), chunk):
+        docs += sp.feed(data[i:i + chunk])
+    assert len(docs) == 3
+    assert all(plistlib.loads(d)["hw_model"] == "Mac14,2" for d in docs)
+
+
+def test_splitter_holds_partial_sample():
+    data = _fixture("powermetrics_intel.plist")
+    first = data.index(b"\0")
+    sp = PlistSplitter()
+    assert sp.feed(data[:first - 10]) == []
+    assert len(sp.feed(data[first - 10:first + 1])) == 1
+
+
+def _samples(name):
+    return [parse_pm_sample(plistlib.loads(d)) for d in PlistSplitter().feed(_fixture(name))]
+
+
+def test_parse_apple_silicon():
+    s = _samples("powermetrics_apple_silicon.plist")
+    assert s[0] == {"cpu_power_w": 1.234, "gpu_power_w": 0.056, "total_power_w": 1.29,
+                    "cpu_freq_ghz": 2.064}
+    assert s[1]["cpu_freq_ghz"] == pytest.approx(3.204)     # max over clusters
+    assert s[1]["total_power_w"] == pytest.approx(8.77)
+    assert s[2]["gpu_power_w"] == 0.0
+
+
+def test_parse_intel():
+    s = _samples("powermetrics_intel.plist")
+    assert s[0] == {"cpu_power_w": 9.87, "total_power_w": 9.87, "cpu_freq_ghz": 2.6,
+                    "cpu_temp": 52.3, "gpu_temp": 46.3, "fan_rpm": 1200}
+    assert s[1]["fan_rpm"] == 4100 and s[1]["cpu_temp"] == 88.9
+
+
+def test_parse_empty_sample():
+    assert parse_pm_sample({}) == {}
+
+
+def test_stream_run_delivers_samples(tmp_path, monkeypatch):
+    fake = tmp_path / "powermetrics"
+    fake.write_text(f"#!{sys.executable}\nimport sys\n"
+                    f"sys.stdout.buffer.write(open({str(FIXTURES / 'powermetrics_intel.plist')!r}, 'rb').read())\n")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(PowermetricsStream, "command", lambda self, pw=None: [str(fake)])
+    got = []
+    assert PowermetricsStream("smc", 1000, got.append).run() == 2
+    assert [g["cpu_temp"] for g in got] == [52.3, 88.9]
+
+
+class _FakeStream:
+    runs = []
+
+    def __init__(self, samplers, interval_ms, on_sample):
+        self.interval_ms = interval_ms
+
+    def run(self, pw=None):
+        self.runs.append(pw)
+        time.sleep(0.05)
+        return 3 if len(self.runs) in (1, 4) else 0    # streams, sudo expires twice, recovers
+
+    def kill(self):
+        pass
+
+
+def test_loop_keeps_password_and_retries(monkeypatch):
+    _FakeStream.runs = []
+    monkeypatch.setattr(metrics, "PowermetricsStream", _FakeStream)
+    mc = metrics.MetricsCollector(dict(SYS_INFO))
+    mc.PM_RETRY_S, mc.PM_RETRY_MAX_S = 0.01, 0.05
+    mc._sudo_pw = "secret"
+    t = threading.Thread(target=mc._powermetrics_loop, daemon=True)
+    t.start()
+    time.sleep(0.6)
+    # a second start (e.g. /api/request_sudo) while the first is running returns at once
+    second = threading.Thread(target=mc._powermetrics_loop, daemon=True)
+    second.start()
+    second.join(0.5)
+    assert not second.is_alive()
+    mc._stop.set()
+    t.join(2)
+    assert len(_FakeStream.runs) >= 5 and set(_FakeStream.runs) == {"secret"}
+    assert not mc._pm_running
+
+
+def test_kill_stops_the_child_behind_sudo(tmp_path, monkeypatch):
+    """Like sudo, the wrapper only stops its child when it is asked to (SIGTERM is relayed)."""
+    child = tmp_path / "child.py"
+    child.write_text("import sys, time\n"
+                     f"doc = open({str(FIXTURES / 'powermetrics_intel.plist')!r}, 'rb').read().split(b'\\0')[0]\n"
+                     "while True:\n    sys.stdout.buffer.write(doc + b'\\0'); sys.stdout.flush(); time.sleep(0.05)\n")
+    wrapper = tmp_path / "sudo"
+    wrapper.write_text(f"#!{sys.executable}\nimport signal, subprocess, sys\n"
+                       f"p = subprocess.Popen([sys.executable, {str(child)!r}])\n"
+                       "signal.signal(signal.SIGTERM, lambda *a: p.terminate())\n"
+                       "p.wait()\n")
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(PowermetricsStream, "command", lambda self, pw=None: [str(wrapper)])
+    got, result = [], []
+    pm = PowermetricsStream("smc", 50, got.append)
+    t = threading.Thread(target=lambda: result.append(pm.run()), daemon=True)
+    t.start()
+    end = time.monotonic() + 5
+    while not got and time.monotonic() < end:
+        time.sleep(0.01)
+    assert got
+    pm.kill()
+    t.join(5)
+    # run() only returns once every writer of the pipe, the child included, has exited
+    assert not t.is_alive() and result[0] >= 1
+
+
+def test_stream_rates_retune_powermetrics_with_floor_and_debounce(monkeypatch):
+    class Proc:
+        kills = 0
+        def kill(self): self.kills += 1
+    clock = [1000.0]
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: clock[0])
+    mc = metrics.MetricsCollector(dict(SYS_INFO))
+    mc._pm_proc = proc = Proc()
+    mc.stream_rate("a", 20)
+    mc._update_rate()
+    assert mc._pm_interval_ms == mc.PM_MIN_MS and proc.kills == 1
+    for hz in (2, 10, 4, 20, 2):    # a client flipping rates can't force a restart each time
+        mc.stream_rate("a", hz)
+        mc._update_rate()
+    assert mc._pm_interval_ms == mc.PM_MIN_MS and proc.kills == 1
+    clock[0] += mc.PM_RETUNE_S
+    mc._update_rate()               # the deferred change lands on a later demand tick
+    assert mc._pm_interval_ms == 500 and proc.kills == 2
@@ -0,0 +1,74 @@
+from macstress import procs
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def _sampler(monkeypatch, table, unreadable):
+    """ProcessSampler over a fake table: pid -> [name, cpu_seconds, rss]; `unreadable` PIDs
+    are reported as denied (as libproc does without root) and served by a counting fake ps."""
+    clock, ps_calls = _Clock(), []
+    monkeypatch.setattr(procs.time, "monotonic", clock)
+
+    def read(denied):
+        denied.extend(unreadable)
+        return [(pid, n, c, r) for pid, (n, c, r) in table.items() if pid not in unreadable]
+
+    def read_ps(pids=None):
+        ps_calls.append(list(pids))
+        return [(pid, *table[pid]) for pid in pids]
+
+    monkeypatch.setattr(procs, "_read_ps", read_ps)
+    s = procs.ProcessSampler()
+    s._read = read
+    return s, clock, ps_calls
+
+
+def test_interval_cpu_from_deltas(monkeypatch):
+    table = {1: ["a", 10.0, 100], 2: ["b", 0.0, 300]}
+    s, clock, _ = _sampler(monkeypatch, table, [])
+    assert s.sample()[0] == []      # no previous sample yet
+    table[1][1] += 1.0
+    table[2][1] += 3.0
+    clock.t += 2
+    top_cpu, top_mem = s.sample(n=2)
+    assert top_cpu == [(150.0, 2, "b"), (50.0, 1, "a")]
+    assert top_mem == [(300, 2, "b"), (100, 1, "a")]
+
+
+def test_unreadable_pids_use_rate_limited_ps(monkeypatch):
+    table = {1: ["mine", 0.0, 100], 99: ["WindowServer", 0.0, 900]}
+    s, clock, ps_calls = _sampler(monkeypatch, table, [99])
+    s.sample()
+    assert ps_calls == [[99]]
+    for _ in range(2):          # 5 s later: second ps run gives the first rate
+        clock.t += 2.5
+        table[99][1] += 1.25
+        top_cpu, top_mem = s.sample()
+    assert len(ps_calls) == 2
+    assert top_cpu[0] == (50.0, 99, "WindowServer")
+    assert top_mem[0] == (900, 99, "WindowServer")
+    for _ in range(5):          # no more ps until PS_REFRESH has passed; the rate is kept
+        clock.t += 5
+        top_cpu, _ = s.sample()
+        assert top_cpu[0][1] == 99
+    assert len(ps_calls) == 2
+    clock.t += s.PS_REFRESH
+    s.sample()
+    assert len(ps_calls) == 3
+
+
+def test_exited_unreadable_pid_is_dropped(monkeypatch):
+    table = {99: ["daemon", 0.0, 900]}
+    unreadable = [99]
+    s, clock, _ = _sampler(monkeypatch, table, unreadable)
+    s.sample()
+    unreadable.clear()
+    del table[99]
+    clock.t += 2
+    assert s.sample()[1] == []
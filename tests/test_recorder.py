@@ -0,0 +1,63 @@
+import time
+
+from macstress import recorder as rec_mod
+from macstress.recorder import HEADER_BYTES, Recorder, Segment, read, segments
+
+
+def _recorder(tmp_path, **kw):
+    kw.setdefault("max_bytes", 1 << 30)
+    return Recorder(tmp_path, ("a", "b"), {"model_name": "Test Mac"}, **kw)
+
+
+def test_append_and_read(tmp_path):
+    r = _recorder(tmp_path)
+    for i in range(10):
+        r.append(1000 + i, {"a": i, "b": None if i % 2 else i * 2})
+    r.close()
+    rows = list(read(tmp_path))
+    assert [ts for ts, _ in rows] == [1000.0 + i for i in range(10)]
+    assert rows[1][1] == [1.0, None]
+    assert rows[2][1] == [2.0, 4.0]
+    assert list(read(tmp_path, start=1003, end=1005, fields=("b", "x"))) == [
+        (1003.0, [None, None]), (1004.0, [8.0, None]), (1005.0, [None, None])]
+
+
+def test_rotation_within_one_millisecond_keeps_every_record(tmp_path, monkeypatch):
+    monkeypatch.setattr(rec_mod.time, "time", lambda: 1_700_000_000.0)
+    r = _recorder(tmp_path, segment_bytes=8192)
+    for i in range(2000):
+        r.append(i, {"a": i, "b": i})
+    r.close()
+    segs = segments(tmp_path)
+    assert len(segs) == 10       # 204 records per segment
+    assert segs == sorted(segs, key=lambda p: int(p.stem))
+    assert [ts for ts, _ in read(tmp_path)] == [float(i) for i in range(2000)]
+
+
+def test_reopen_drops_torn_tail(tmp_path):
+    r = _recorder(tmp_path)
+    for i in range(5):
+        r.append(1000 + i, {"a": i, "b": i})
+    path, size = r.path, r.record_size
+    r.close()
+    with open(path, "r+b") as f:   # half-written last record
+        f.seek(HEADER_BYTES + 4 * size + size - 2)
+        f.write(b"\xff\xff")
+    assert [ts for ts, _ in read(tmp_path)] == [1000.0, 1001.0, 1002.0, 1003.0]
+    r = _recorder(tmp_path)
+    assert r.path == path and r.recovered == 4
+    r.append(1010, {"a": 10, "b": 10})
+    r.close()
+    assert [ts for ts, _ in read(tmp_path)] == [1000.0, 1001.0, 1002.0, 1003.0, 1010.0]
+
+
+def test_prune_keeps_total_under_max_bytes(tmp_path):
+    r = _recorder(tmp_path, segment_bytes=8192, max_bytes=5 * 8192)
+    for i in range(3000):
+        r.append(time.time(), {"a": i, "b": i})
+    r.close()
+    segs = segments(tmp_path)
+    assert sum(p.stat().st_size for p in segs) <= 6 * 8192
+    seg = Segment(segs[-1])
+    assert seg.fields == ("a", "b") and seg.sys_info["model_name"] == "Test Mac"
+    seg.close()
@@ -0,0 +1,46 @@
+import socket, threading
+
+import pytest
+
+from macstress import server
+from macstress.async_server import AsyncHTTPServer
+from macstress.metrics import MetricsCollector
+from conftest import SYS_INFO
+
+
+class FakeStress:
+    def get_active(self): return []
+
+
+@pytest.fixture(params=["threaded", "async"])
+def srv(request):
+    mc = MetricsCollector(dict(SYS_INFO))
+    server.set_globals(mc, FakeStress(), mc.sys_info)
+    if request.param == "async":
+        s = AsyncHTTPServer(("127.0.0.1", 0))
+    else:
+        s = server.ThreadedHTTPServer(("127.0.0.1", 0), server.Handler)
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    yield s
+    s.shutdown()
+
+
+def _exchange(srv, raw):
+    with socket.create_connection(srv.server_address, timeout=5) as s:
+        s.sendall(raw)
+        buf = b""
+        while chunk := s.recv(65536):
+            buf += chunk
+    return buf
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1", b""])
+def test_bad_content_length_is_a_400(srv, length):
+    res = _exchange(srv, b"POST /api/stop_all HTTP/1.1\r\nHost: x\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert res.startswith(b"HTTP/1.1 400 ")
+
+
+def test_post_body_is_consumed_on_keep_alive(srv):
+    res = _exchange(srv, b"POST /api/toggle?test=none HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\n\r\nhello"
+                         b"GET /api/status HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+    assert res.count(b"HTTP/1.1 200 ") == 2
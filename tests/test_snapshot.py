@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from macstress.metrics import MetricsCollector, Snapshot
+from conftest import SYS_INFO
+
+
+@pytest.fixture
+def mc():
+    return MetricsCollector(dict(SYS_INFO))
+
+
+def test_snapshot_is_read_only():
+    s = Snapshot(a=1, b=[1, 2])
+    for mutate in (lambda: s.__setitem__("a", 2), lambda: s.__delitem__("a"), s.clear,
+                   lambda: s.pop("a"), s.popitem, lambda: s.setdefault("c", 1), lambda: s.update(a=3)):
+        with pytest.raises(TypeError):
+            mutate()
+    with pytest.raises(TypeError):
+        s |= {"a": 2}
+    assert dict(s) == {"a": 1, "b": [1, 2]}
+
+
+def test_readers_share_the_published_object(mc):
+    assert mc.get_snapshot() is mc.get_snapshot()
+    assert mc.get_details() is mc.get_details()
+
+
+def test_set_publishes_a_new_snapshot(mc):
+    before = mc.get_snapshot()
+    after = mc._set(cpu_usage=42.0, per_core_usage=[1.0, 2.0])
+    assert after is mc.get_snapshot() and after is not before
+    assert before["cpu_usage"] == 0 and after["cpu_usage"] == 42.0
+    assert after["per_core_usage"] == (1.0, 2.0)    # lists are frozen to tuples
+    assert after["mem_total_gb"] == before["mem_total_gb"]
+
+
+def test_readers_never_see_a_torn_update(mc):
+    stop, torn = threading.Event(), []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            mc._set(disk_read_mb=i, disk_write_mb=i)
+
+    def reader():
+        while not stop.is_set():
+            s = mc.get_snapshot()
+            if s["disk_read_mb"] != s["disk_write_mb"]:
+                torn.append(s)
+
+    threads = [threading.Thread(target=writer) for _ in range(2)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    threading.Event().wait(0.3)
+    stop.set()
+    for t in threads:
+        t.join()
+    assert not torn
@@ -0,0 +1,63 @@
+import os, sys, stat, time
+
+from macstress.streams import parse_top_cpu, TopStream
+
+
+def test_parse_top_cpu_header():
+    assert parse_top_cpu("CPU usage: 7.69% user, 15.38% sys, 76.92% idle \n") == \
+        {"user": 7.69, "sys": 15.38, "idle": 76.92}
+
+
+def test_parse_top_cpu_fills_missing_idle():
+    assert parse_top_cpu("CPU usage: 10.0% user, 5.0% sys") == {"user": 10.0, "sys": 5.0, "idle": 85.0}
+
+
+def test_parse_top_cpu_ignores_other_lines():
+    assert parse_top_cpu("Processes: 512 total, 3 running") is None
+    assert parse_top_cpu("CPU usage: garbage") is None
+    assert parse_top_cpu("CPU usage: 1.0% user") is None
+
+
+def _fake_top(tmp_path, monkeypatch, lines):
+    script = tmp_path / "top"
+    script.write_text(f"#!{sys.executable}\nimport sys, time\n"
+                      f"for l in {lines!r}:\n    print(l, flush=True)\ntime.sleep(30)\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+def _wait(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_stream_skips_first_sample_since_boot(tmp_path, monkeypatch):
+    _fake_top(tmp_path, monkeypatch, ["CPU usage: 90.0% user, 9.0% sys, 1.0% idle",
+                                      "Load Avg: 1.0", "CPU usage: 20.0% user, 10.0% sys, 70.0% idle"])
+    top = TopStream(interval=1)
+    assert top.start()
+    try:
+        assert _wait(lambda: top.latest is not None)
+        assert top.fresh() == {"user": 20.0, "sys": 10.0, "idle": 70.0}
+    finally:
+        top.stop()
+    assert _wait(lambda: not top.alive())
+    assert top.fresh() is None
+
+
+def test_set_interval_restarts_process(tmp_path, monkeypatch):
+    _fake_top(tmp_path, monkeypatch, [])
+    top = TopStream(interval=2)
+    top.start()
+    first = top._proc
+    try:
+        top.set_interval(8)
+        second = top._proc
+        assert second is not first and top.interval == 8
+        assert _wait(lambda: first.poll() is not None)
+        top.set_interval(8)     # unchanged: no restart
+        assert top._proc is second
+    finally:
+        top.stop()
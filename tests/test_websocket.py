@@ -0,0 +1,160 @@
+import os, json, math, base64, socket, struct, threading
+
+import pytest
+
+from macstress import server, websocket
+from macstress.async_server import AsyncHTTPServer
+from macstress.metrics import MetricsCollector
+from macstress.websocket import OP_BINARY, OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, Session
+from conftest import SYS_INFO
+
+
+class FakeCollector:
+    HISTORY_FIELDS = ("cpu_usage", "cpu_temp", "fan_rpm")
+
+    def __init__(self):
+        self.snap = {"cpu_usage": 10.0, "cpu_temp": None, "fan_rpm": 1200}
+        self.rates = {}
+
+    def get_snapshot(self): return dict(self.snap)
+
+    def stream_rate(self, key, hz=None):
+        if hz: self.rates[key] = hz
+        else: self.rates.pop(key, None)
+
+
+def client_frame(opcode, payload, mask=b"\x01\x02\x03\x04"):
+    """A masked client frame, as a browser sends it."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+    return head + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def parse(data):
+    """Server frames in `data` as (opcode, payload)."""
+    frames = []
+    while data:
+        op, n, pos = data[0] & 0x0F, data[1] & 0x7F, 2
+        if n == 126: n, pos = struct.unpack_from("!H", data, 2)[0], 4
+        elif n == 127: n, pos = struct.unpack_from("!Q", data, 2)[0], 10
+        frames.append((op, data[pos:pos + n]))
+        data = data[pos + n:]
+    return frames
+
+
+def test_handshake_accept():
+    # RFC 6455 section 1.3 example
+    res = websocket.handshake("dGhlIHNhbXBsZSBub25jZQ==")
+    assert res.startswith(b"HTTP/1.1 101 ")
+    assert b"Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in res
+
+
+@pytest.mark.parametrize("n", [0, 125, 126, 65535, 65536])
+def test_frame_lengths(n):
+    [(op, payload)] = parse(websocket.frame(OP_BINARY, b"x" * n))
+    assert op == OP_BINARY and len(payload) == n
+
+
+def test_schema_and_samples():
+    mc = FakeCollector()
+    ws = Session(mc, "cpu_temp,bogus,cpu_usage", "5")
+    [(op, schema)] = parse(ws.schema())
+    assert op == OP_TEXT
+    assert json.loads(schema) == {"v": 1, "fields": ["cpu_temp", "cpu_usage"], "rate": 5.0, "layout": "<d2f"}
+    assert mc.rates == {ws: 5.0}
+    [(op, payload)] = parse(ws.sample())
+    assert op == OP_BINARY
+    ts, temp, cpu = struct.unpack("<d2f", payload)
+    assert ts > 0 and math.isnan(temp) and cpu == 10.0
+    mc.snap["cpu_usage"] = 20.0
+    assert ws.sample() is None      # rate cap
+    ws._sent_at = 0
+    assert struct.unpack("<d2f", parse(ws.sample())[0][1])[2] == 20.0
+    ws._sent_at = 0
+    assert ws.sample() is None      # nothing changed
+
+
+@pytest.mark.parametrize("fields,rate,want_fields,want_rate", [
+    (None, None, FakeCollector.HISTORY_FIELDS, websocket.DEFAULT_RATE),
+    (["fan_rpm", 3], 1000, ("fan_rpm",), websocket.MAX_RATE),
+    ({"a": 1}, 0.001, FakeCollector.HISTORY_FIELDS, websocket.MIN_RATE),
+    ("fan_rpm", "nan", ("fan_rpm",), websocket.DEFAULT_RATE),
+    ("fan_rpm", "inf", ("fan_rpm",), websocket.DEFAULT_RATE),
+    ("fan_rpm", [1], ("fan_rpm",), websocket.DEFAULT_RATE),
+])
+def test_configure_validates(fields, rate, want_fields, want_rate):
+    ws = Session(FakeCollector())
+    ws.configure(fields, rate)
+    assert ws.fields == want_fields and ws.rate == want_rate
+
+
+def test_feed_masked_text_ping_and_split_frames():
+    mc = FakeCollector()
+    ws = Session(mc)
+    data = client_frame(OP_PING, b"hi") + client_frame(OP_TEXT, json.dumps({"fields": ["fan_rpm"], "rate": 2}).encode())
+    assert ws.feed(data[:3]) == []
+    out = ws.feed(data[3:])
+    assert parse(out[0]) == [(OP_PONG, b"hi")]
+    assert json.loads(parse(out[1])[0][1])["fields"] == ["fan_rpm"]
+    assert mc.rates == {ws: 2.0}
+
+
+def test_client_close_is_echoed_and_releases_the_rate():
+    mc = FakeCollector()
+    ws = Session(mc)
+    out = ws.feed(client_frame(OP_CLOSE, struct.pack("!H", 1000)))
+    assert parse(out[0]) == [(OP_CLOSE, struct.pack("!H", 1000))]
+    assert ws.closed and mc.rates == {}
+    assert ws.sample() is None
+
+
+@pytest.mark.parametrize("data,code", [
+    (client_frame(OP_TEXT, b"not json"), 1003),
+    (client_frame(OP_TEXT, b"[1, 2]"), 1003),
+    (client_frame(OP_TEXT, b"x" * (websocket.MAX_MESSAGE + 1)), 1009),
+], ids=["not-json", "not-object", "too-big"])
+def test_bad_input_closes(data, code):
+    ws = Session(FakeCollector())
+    out = ws.feed(data)
+    assert parse(out[-1]) == [(OP_CLOSE, struct.pack("!H", code))]
+    assert ws.closed and ws.sample() is None
+
+
+class FakeStress:
+    def get_active(self): return []
+
+
+@pytest.fixture(params=["threaded", "async"])
+def srv(request):
+    mc = MetricsCollector(dict(SYS_INFO))
+    server.set_globals(mc, FakeStress(), mc.sys_info)
+    if request.param == "async":
+        s = AsyncHTTPServer(("127.0.0.1", 0))
+    else:
+        s = server.ThreadedHTTPServer(("127.0.0.1", 0), server.Handler)
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    yield s
+    s.shutdown()
+
+
+def test_no_data_frame_after_close(srv):
+    key = base64.b64encode(os.urandom(16)).decode()
+    with socket.create_connection(srv.server_address, timeout=5) as s:
+        # At 0.1 Hz the first sample is due right after our message is handled
+        s.sendall(f"GET /ws?fields=cpu_usage&rate=0.1 HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        buf = b""
+        while b"\r\n\r\n" not in buf:
+            buf += s.recv(65536)
+        s.sendall(client_frame(OP_TEXT, b"not json"))
+        while chunk := s.recv(65536):
+            buf += chunk
+    head, body = buf.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 101 ")
+    assert [op for op, _ in parse(body)] == [OP_TEXT, OP_CLOSE]
+    assert parse(body)[-1][1] == struct.pack("!H", 1003)